@@ -6,7 +6,9 @@ from fastapi import Depends, HTTPException, status, Header
 from typing import Optional, Literal
 import logging
 
+from auth import user_cache
 from auth.jwt_service import jwt_service
+from auth.token_blacklist import token_blacklist_filter
 from database import mongodb
 from models.user import User, UserResponse
 
@@ -34,14 +36,26 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> UserR
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify token
-    payload = await jwt_service.verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # Verify token (decode + blacklist lookup), unless this token was verified moments ago
+    payload = user_cache.get_cached_payload(token)
+    if payload is not None and payload.get("jti"):
+        # A logout on another worker reaches this worker's blacklist filter, not its token cache
+        if await token_blacklist_filter.is_blacklisted(payload["jti"]):
+            user_cache.invalidate_token(token)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    if payload is None:
+        payload = await jwt_service.verify_token(token)
+        if not payload:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user_cache.cache_payload(token, payload)
     
     user_id = payload.get("sub")
     if not user_id:
@@ -50,6 +64,10 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> UserR
             detail="Invalid token payload",
         )
     
+    cached_user = user_cache.get_cached_user(user_id)
+    if cached_user is not None:
+        return cached_user
+    
     # Fetch user from database
     user_doc = await mongodb.users.find_one({"user_id": user_id})
     if not user_doc:
@@ -58,13 +76,15 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> UserR
             detail="User not found",
         )
     
-    return UserResponse(
+    user = UserResponse(
         user_id=user_doc["user_id"],
         email=user_doc["email"],
         role=user_doc["role"],
         is_verified=user_doc["is_verified"],
         created_at=user_doc["created_at"]
     )
+    user_cache.cache_user(user)
+    return user
 
 
 def require_role(required_role: Literal["user", "admin"]):
@@ -8,6 +8,7 @@ import jwt
 import logging
 from uuid import uuid4
 
+from auth.token_blacklist import token_blacklist_filter
 from config import settings
 from database import redis_client
 
@@ -65,10 +66,10 @@ class JWTService:
                 algorithms=[settings.JWT_ALGORITHM]
             )
             
-            # Check if token is blacklisted
+            # Check if token is blacklisted (Redis is only asked on a local filter hit)
             token_id = payload.get("jti")
             if token_id:
-                is_blacklisted = await redis_client.is_token_blacklisted(token_id)
+                is_blacklisted = await token_blacklist_filter.is_blacklisted(token_id)
                 if is_blacklisted:
                     logger.warning(f"Attempted use of blacklisted token: {token_id}")
                     return None
@@ -109,6 +110,7 @@ class JWTService:
                     exp_datetime = datetime.fromtimestamp(exp)
                     remaining = int((exp_datetime - datetime.utcnow()).total_seconds())
                     if remaining > 0:
+                        token_blacklist_filter.add(token_id)
                         await redis_client.blacklist_token(token_id, remaining)
                         logger.info(f"Token {token_id} blacklisted")
                     else:
@@ -0,0 +1,196 @@
+"""
+Local JWT blacklist filter
+A bloom filter of blacklisted jtis kept in each worker, so verify_token only asks
+Redis about tokens the filter reports as possibly blacklisted (almost none).
+
+- Fed by the JWT_BLACKLIST_CHANNEL pub/sub channel (RedisClient.blacklist_token
+  publishes; InMemoryRedis provides the same API in-process)
+- Rebuilt from the jwt_blacklist:* keys at startup, after the listener reconnects,
+  and with double the capacity when it fills up; rebuilding also drops expired jtis
+- Until it is built, and while the listener is down, every token goes to Redis
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from database import redis_client
+
+logger = logging.getLogger(__name__)
+
+LISTENER_RETRY_SECONDS = 1.0
+MAX_LISTENER_RETRY_SECONDS = 30.0
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing on one blake2b digest)"""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = max(1, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.size = max(64, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenBlacklistFilter:
+    """Bloom filter of blacklisted jtis, kept current through Redis pub/sub"""
+
+    def __init__(self):
+        self._filter: Optional[BloomFilter] = None
+        self._ready = False
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # jtis that arrive while a rebuild is scanning Redis
+        self._arrived_during_rebuild: Optional[List[str]] = None
+
+        self.checks = 0
+        self.redis_lookups = 0
+        self.rebuilds = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready and self._filter is not None
+
+    async def start(self):
+        """Subscribe first, then build from Redis, so no jti published meanwhile is missed"""
+        if not settings.JWT_BLACKLIST_FILTER_ENABLED or self._listener is not None:
+            return
+        try:
+            await self._subscribe()
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"JWT blacklist filter not built ({e}); checking Redis for every token until it is")
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        for task in (self._listener, self._rebuild_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener = None
+        self._rebuild_task = None
+        await self._close_pubsub()
+        self._ready = False
+
+    async def _subscribe(self):
+        self._pubsub = redis_client.client.pubsub()
+        await self._pubsub.subscribe(settings.JWT_BLACKLIST_CHANNEL)
+
+    async def _close_pubsub(self):
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception as e:
+                logger.debug(f"Closing blacklist subscription failed: {e}")
+            self._pubsub = None
+
+    async def rebuild(self, capacity: Optional[int] = None):
+        """Load every jwt_blacklist:* key into a fresh filter and swap it in"""
+        self._arrived_during_rebuild = []
+        try:
+            token_ids = [token_id async for token_id in redis_client.iter_blacklisted_token_ids()]
+            capacity = max(capacity or 0, settings.JWT_BLACKLIST_FILTER_CAPACITY, 2 * len(token_ids))
+            bloom = BloomFilter(capacity, settings.JWT_BLACKLIST_FILTER_FALSE_POSITIVE_RATE)
+            for token_id in token_ids + self._arrived_during_rebuild:
+                bloom.add(token_id)
+        finally:
+            self._arrived_during_rebuild = None
+
+        self._filter = bloom
+        self._ready = True
+        self.rebuilds += 1
+        logger.info(
+            f"JWT blacklist filter built: {bloom.count} tokens, {bloom.size // 8 // 1024} KiB, "
+            f"{bloom.hash_count} hashes"
+        )
+
+    def add(self, token_id: str):
+        """Record a blacklisted jti (from pub/sub, or directly by the worker that revoked it)"""
+        if self._arrived_during_rebuild is not None:
+            self._arrived_during_rebuild.append(token_id)
+        if self._filter is None:
+            return
+        self._filter.add(token_id)
+        if self._filter.count > self._filter.capacity and self._rebuild_task is None:
+            self._rebuild_task = asyncio.create_task(self._grow(self._filter.capacity * 2))
+
+    async def _grow(self, capacity: int):
+        try:
+            await self.rebuild(capacity)
+        except Exception as e:
+            logger.error(f"JWT blacklist filter rebuild failed: {e}")
+        finally:
+            self._rebuild_task = None
+
+    async def _listen(self):
+        retry = LISTENER_RETRY_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                if not self.ready:
+                    await self.rebuild()
+                retry = LISTENER_RETRY_SECONDS
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        self.add(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"JWT blacklist subscription failed ({e}); checking Redis for every token until it recovers")
+
+            # Messages may have been missed: use Redis until resubscribed and rebuilt
+            self._ready = False
+            await self._close_pubsub()
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, MAX_LISTENER_RETRY_SECONDS)
+
+    async def is_blacklisted(self, token_id: str) -> bool:
+        """Redis is only asked when the filter says maybe (or the filter is unavailable)"""
+        self.checks += 1
+        if self.ready and token_id not in self._filter:
+            return False
+        self.redis_lookups += 1
+        return await redis_client.is_token_blacklisted(token_id)
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._filter
+        return {
+            "ready": self.ready,
+            "tokens": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "size_bytes": len(bloom._bits) if bloom else 0,
+            "hash_count": bloom.hash_count if bloom else 0,
+            "checks": self.checks,
+            "redis_lookups": self.redis_lookups,
+            "rebuilds": self.rebuilds,
+        }
+
+
+# Global instance
+token_blacklist_filter = TokenBlacklistFilter()
@@ -0,0 +1,61 @@
+"""
+Authenticated-user caches used by get_current_user
+
+- user_cache: UserResponse by user_id (JWT sub), so a request skips users.find_one
+- token_cache: decoded JWT payloads by SHA-256 of the token, never past the token's
+  exp, so a request skips the decode. get_current_user still checks a cached
+  payload's jti against the blacklist filter, so a logout on any worker applies at once
+
+Both are per process. Invalidation (verification changes) is local; other
+workers pick the change up within their TTL, which bounds how long a changed
+role can still be honoured elsewhere.
+"""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from config import settings
+from models.user import UserResponse
+from services.ttl_cache import TTLCache
+
+user_cache = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_payload(token: str) -> Optional[Dict[str, Any]]:
+    return token_cache.get(token_key(token))
+
+
+def cache_payload(token: str, payload: Dict[str, Any]):
+    """Cache a verified payload until its exp (or the cache TTL, whichever is sooner)"""
+    exp = payload.get("exp")
+    if exp is None:
+        return
+    token_cache.set(token_key(token), payload, exp - time.time())
+
+
+def invalidate_token(token: str):
+    token_cache.pop(token_key(token))
+
+
+def get_cached_user(user_id: str) -> Optional[UserResponse]:
+    user = user_cache.get(user_id)
+    return user.model_copy() if user is not None else None
+
+
+def cache_user(user: UserResponse):
+    user_cache.set(user.user_id, user.model_copy())
+
+
+def invalidate_user(user_id: str):
+    """Call after changing a user's role, verification or email"""
+    user_cache.pop(user_id)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
@@ -25,6 +25,8 @@ class Settings(BaseSettings):
     
     # Groq LLM Configuration
     GROQ_API_KEY: str = ""
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 20.0
     
     # Encryption Configuration
     ENCRYPTION_KEY: str = ""
@@ -60,12 +62,90 @@ class Settings(BaseSettings):
     RESEND_FROM_EMAIL: str = ""
     RESEND_API_BASE_URL: str = "https://api.resend.com"
 
+    # Email dispatch: mail is queued and sent by worker tasks, OTP ahead of decision and
+    # report mail. Transient failures retry with exponential backoff; SMTP connections
+    # are pooled and NOOP-checked when they have been idle. An OTP request waits up to
+    # EMAIL_OTP_WAIT_SECONDS for its mail before falling back to the console.
+    EMAIL_DISPATCH_WORKERS: int = 4
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_MAX_ATTEMPTS: int = 4
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 1.0
+    EMAIL_RETRY_BACKOFF_MAX_SECONDS: float = 60.0
+    EMAIL_OTP_WAIT_SECONDS: float = 10.0
+    EMAIL_SHUTDOWN_TIMEOUT_SECONDS: float = 15.0
+    SMTP_POOL_SIZE: int = 4
+    SMTP_HEALTHCHECK_IDLE_SECONDS: float = 30.0
+    SMTP_CONNECTION_MAX_MESSAGES: int = 100
+
+    # Shared outbound HTTP clients (Resend, Telegram): one keep-alive pool per API host,
+    # opened at startup and closed at shutdown. HTTP/2 needs the h2 package (httpx[http2]).
+    HTTP_CLIENT_HTTP2: bool = True
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 5.0
+
     # Telegram Bot Configuration
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org"
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_WEBHOOK_SECRET: str = ""
     TELEGRAM_BOT_USERNAME: str = ""
     TELEGRAM_LINK_CODE_TTL_SECONDS: int = 900
+    TELEGRAM_SESSION_TTL_SECONDS: int = 604800
     TELEGRAM_DASHBOARD_URL: str = "http://localhost:3000/dashboard"
+
+    # Policy Registry Configuration
+    POLICY_RELOAD_INTERVAL_SECONDS: float = 5.0
+    POLICY_VERSION_HISTORY: int = 5
+
+    # MongoDB Index Configuration (plan guard only runs in development)
+    MONGODB_ENSURE_INDEXES: bool = True
+    MONGODB_QUERY_PLAN_GUARD: bool = True
+
+    # Auth Cache Configuration (per process; 0 seconds disables a cache). Cached tokens are
+    # still checked against the blacklist filter, so logout applies on every worker at once;
+    # the TTLs only bound how long stale role or verification data can be served.
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+
+    # JWT Blacklist Filter Configuration (bloom filter in front of the Redis blacklist)
+    JWT_BLACKLIST_FILTER_ENABLED: bool = True
+    JWT_BLACKLIST_FILTER_CAPACITY: int = 100000
+    JWT_BLACKLIST_FILTER_FALSE_POSITIVE_RATE: float = 0.001
+    JWT_BLACKLIST_CHANNEL: str = "jwt_blacklist_events"
+
+    # Audit Log Sink Configuration (spill path is relative to backend/)
+    AUDIT_SINK_BATCH_SIZE: int = 200
+    AUDIT_SINK_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_SINK_QUEUE_SIZE: int = 10000
+    AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS: float = 2.0
+    AUDIT_SINK_SPILL_PATH: str = "logs/audit_spill.jsonl"
+    AUDIT_SINK_SPILL_REPLAY_SECONDS: float = 30.0
+
+    # Bureau Dataset Configuration (relative to backend/; built by scripts/compile_bureau_dataset.py,
+    # used instead of the JSON seed file when present)
+    BUREAU_COMPILED_DATASET_PATH: str = "mock_data/compiled/credit_bureau.bin"
+
+    # Bureau Cache Configuration (in-process LRU in front of Redis; 0 disables a tier)
+    BUREAU_CACHE_TTL_SECONDS: int = 86400
+    BUREAU_CACHE_LOCAL_TTL_SECONDS: float = 300.0
+    BUREAU_CACHE_LOCAL_SIZE: int = 10000
+
+    # Sanction Letter Rendering Configuration (process pool; 0 workers = min(2, CPUs)). A chat
+    # turn waits PDF_RENDER_WAIT_SECONDS, then the letter finishes in the background.
+    PDF_RENDER_WORKERS: int = 0
+    PDF_RENDER_QUEUE_SIZE: int = 100
+    PDF_RENDER_WAIT_SECONDS: float = 20.0
+
+    # Sanction Letter Store Configuration (scripts/compact_sanction_letters.py deletes letters
+    # no application references once they are this old)
+    SANCTION_STORE_RETENTION_DAYS: int = 30
+
+    # Batch Underwriting Configuration (0 workers = one per CPU)
+    BATCH_UNDERWRITING_WORKERS: int = 0
+    BATCH_UNDERWRITING_CHUNK_SIZE: int = 500
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -6,20 +6,76 @@ Handles MongoDB and Redis connections
 import motor.motor_asyncio
 import redis.asyncio as aioredis
 from typing import Optional, Any
+import asyncio
+import fnmatch
+import json
 import logging
 import time
 
 from config import settings
 
+try:
+    import orjson
+except ImportError:  # Same wire format, just slower
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def dump_json(value: Any) -> str:
+    """Serialize a cache value (non-JSON types such as datetimes become strings)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str).decode("utf-8")
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def load_json(raw: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class InMemoryPubSub:
+    """Subscriber side of InMemoryRedis publish/subscribe (single process only)."""
+
+    def __init__(self, broker: "InMemoryRedis"):
+        self._broker = broker
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.channels = set()
+
+    async def subscribe(self, *channels: str):
+        self.channels.update(channels)
+        self._broker._subscribers.add(self)
+
+    async def unsubscribe(self, *channels: str):
+        self.channels.difference_update(channels or set(self.channels))
+        if not self.channels:
+            self._broker._subscribers.discard(self)
+
+    def deliver(self, channel: str, message: str):
+        self._queue.put_nowait({"type": "message", "channel": channel, "data": message})
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout) if timeout else self._queue.get_nowait()
+        except (asyncio.TimeoutError, asyncio.QueueEmpty):
+            return None
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self):
+        await self.unsubscribe()
+
+
 class InMemoryRedis:
     """Minimal async Redis-compatible fallback used when Redis is unavailable."""
 
     def __init__(self):
         self._store = {}
         self._expiry = {}
+        self._subscribers = set()
 
     def _purge_if_expired(self, key: str):
         expiry = self._expiry.get(key)
@@ -90,6 +146,21 @@ class InMemoryRedis:
         self._purge_if_expired(key)
         return 1 if key in self._store else 0
 
+    async def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None):
+        for key in list(self._store):
+            self._purge_if_expired(key)
+            if key in self._store and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
+
+    async def publish(self, channel: str, message: str):
+        receivers = [subscriber for subscriber in self._subscribers if channel in subscriber.channels]
+        for subscriber in receivers:
+            subscriber.deliver(channel, message)
+        return len(receivers)
+
+    def pubsub(self):
+        return InMemoryPubSub(self)
+
 
 class MongoDB:
     """MongoDB connection manager"""
@@ -168,6 +239,11 @@ class MongoDB:
         """Telegram chat session state collection"""
         return self.db.telegram_sessions if self.db is not None else None
 
+    @property
+    def analytics_rollups(self):
+        """Pre-aggregated admin analytics counters"""
+        return self.db.analytics_rollups if self.db is not None else None
+
 
 class RedisClient:
     """Redis connection manager"""
@@ -255,6 +331,8 @@ class RedisClient:
         
         key = f"jwt_blacklist:{token_id}"
         await self.client.set(key, "1", ex=expiry_seconds)
+        # Every worker's local blacklist filter subscribes to this channel
+        await self.client.publish(settings.JWT_BLACKLIST_CHANNEL, token_id)
         logger.info(f"Token {token_id} blacklisted")
     
     async def is_token_blacklisted(self, token_id: str) -> bool:
@@ -266,23 +344,45 @@ class RedisClient:
         result = await self.client.exists(key)
         return result > 0
     
+    async def iter_blacklisted_token_ids(self):
+        """All currently blacklisted token ids (SCAN, so Redis is never blocked)"""
+        if not self.client:
+            raise Exception("Redis client not connected")
+        
+        prefix = "jwt_blacklist:"
+        async for key in self.client.scan_iter(match=f"{prefix}*", count=1000):
+            yield key[len(prefix):]
+    
     # Cache operations
     async def cache_bureau_data(self, pan: str, data: dict, ttl_seconds: int = 86400):
-        """Cache credit bureau data"""
+        """Cache credit bureau data (JSON)"""
         if not self.client:
             raise Exception("Redis client not connected")
         
         key = f"bureau_cache:{pan}"
-        await self.client.setex(key, ttl_seconds, str(data))
+        await self.client.setex(key, ttl_seconds, dump_json(data))
         logger.info(f"Bureau data cached for PAN ending {pan[-4:]}")
     
-    async def get_cached_bureau_data(self, pan: str) -> Optional[str]:
-        """Retrieve cached bureau data"""
+    async def get_cached_bureau_data(self, pan: str) -> Optional[dict]:
+        """Retrieve cached bureau data (None on a miss)"""
         if not self.client:
             raise Exception("Redis client not connected")
         
         key = f"bureau_cache:{pan}"
-        return await self.client.get(key)
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        try:
+            return load_json(raw)
+        except ValueError:
+            # Entries written before the JSON format (Python reprs) read as misses
+            return None
+    
+    async def delete_cached_bureau_data(self, pan: str):
+        if not self.client:
+            raise Exception("Redis client not connected")
+        
+        await self.client.delete(f"bureau_cache:{pan}")
 
 
 # Global instances
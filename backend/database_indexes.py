@@ -0,0 +1,189 @@
+"""
+MongoDB Index Registry
+Declares the indexes every route query relies on, applies them at startup and,
+in development, explains the known query shapes and fails on collection scans
+"""
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel(
+            [("email", ASCENDING)],
+            name="email_unique",
+            unique=True,
+            partialFilterExpression={"email": {"$exists": True}}
+        ),
+    ],
+    "loan_applications": [
+        # Every user-scoped read filters application_id + user_id; application_id alone is unique
+        IndexModel([("application_id", ASCENDING)], name="application_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING)],
+            name="user_status_updated"
+        ),
+        IndexModel([("loan_id", ASCENDING), ("user_id", ASCENDING)], name="loan_user"),
+        # Admin list pages by (created_at, application_id); the tie-breaker keeps the sort on the index
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("application_id", DESCENDING)],
+            name="status_created_application"
+        ),
+        IndexModel(
+            [("loan_type", ASCENDING), ("created_at", DESCENDING), ("application_id", DESCENDING)],
+            name="loan_type_created_application"
+        ),
+        IndexModel([("created_at", DESCENDING), ("application_id", DESCENDING)], name="created_application"),
+    ],
+    "loans": [
+        IndexModel([("loan_id", ASCENDING)], name="loan_id_unique", unique=True),
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+            name="user_status_created"
+        ),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "audit_logs": [
+        IndexModel([("log_id", ASCENDING)], name="log_id_unique", unique=True),
+        # Keyset pages and exports sort by (timestamp, log_id)
+        IndexModel([("timestamp", DESCENDING), ("log_id", DESCENDING)], name="timestamp_log"),
+        IndexModel(
+            [("user_id", ASCENDING), ("timestamp", DESCENDING), ("log_id", DESCENDING)],
+            name="user_timestamp_log"
+        ),
+        IndexModel(
+            [("application_id", ASCENDING), ("timestamp", DESCENDING), ("log_id", DESCENDING)],
+            name="application_timestamp_log"
+        ),
+        IndexModel(
+            [("action", ASCENDING), ("timestamp", DESCENDING), ("log_id", DESCENDING)],
+            name="action_timestamp_log"
+        ),
+    ],
+    "consent_records": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "telegram_links": [
+        IndexModel([("telegram_chat_id", ASCENDING), ("is_active", ASCENDING)], name="chat_active"),
+        IndexModel(
+            [("user_id", ASCENDING), ("is_active", ASCENDING), ("updated_at", DESCENDING)],
+            name="user_active_updated"
+        ),
+    ],
+    "telegram_link_codes": [
+        IndexModel([("code", ASCENDING)], name="code_unique", unique=True),
+        # Documents expire at their own expires_at
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "telegram_sessions": [
+        IndexModel([("telegram_chat_id", ASCENDING)], name="telegram_chat_id_unique", unique=True),
+        IndexModel(
+            [("updated_at", ASCENDING)],
+            name="updated_at_ttl",
+            expireAfterSeconds=settings.TELEGRAM_SESSION_TTL_SECONDS
+        ),
+    ],
+}
+
+
+# (collection, filter, sort) shapes issued by the routes; values are placeholders
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("users", {"user_id": "u"}, []),
+    ("users", {"email": "e"}, []),
+    ("loan_applications", {"application_id": "a", "user_id": "u"}, []),
+    ("loan_applications", {"application_id": "a"}, []),
+    ("loan_applications", {"user_id": "u"}, [("created_at", DESCENDING)]),
+    ("loan_applications", {"user_id": "u"}, [("updated_at", DESCENDING)]),
+    ("loan_applications", {"user_id": "u", "status": "IN_PROGRESS"}, [("updated_at", DESCENDING)]),
+    ("loan_applications", {"user_id": "u", "status": {"$in": ["DECLINED", "REJECTED"]}}, [("updated_at", DESCENDING)]),
+    ("loan_applications", {"user_id": "u", "application_id": {"$in": ["a"]}}, []),
+    ("loan_applications", {"loan_id": "l", "user_id": "u"}, []),
+    ("loan_applications", {"status": "APPROVED"}, [("created_at", DESCENDING), ("application_id", DESCENDING)]),
+    ("loan_applications", {"loan_type": "home_loan"}, [("created_at", DESCENDING), ("application_id", DESCENDING)]),
+    ("loan_applications", {}, [("created_at", DESCENDING), ("application_id", DESCENDING)]),
+    ("loans", {"loan_id": "l", "user_id": "u"}, []),
+    ("loans", {"user_id": "u", "status": "ACTIVE"}, [("created_at", DESCENDING)]),
+    ("loans", {"status": "ACTIVE"}, []),
+    ("audit_logs", {}, [("timestamp", DESCENDING), ("log_id", DESCENDING)]),
+    ("audit_logs", {"user_id": "u"}, [("timestamp", DESCENDING), ("log_id", DESCENDING)]),
+    ("audit_logs", {"application_id": "a"}, [("timestamp", DESCENDING), ("log_id", DESCENDING)]),
+    ("audit_logs", {"action": "x"}, [("timestamp", DESCENDING), ("log_id", DESCENDING)]),
+    (
+        "audit_logs",
+        {"$or": [{"timestamp": {"$lt": "t"}}, {"timestamp": "t", "log_id": {"$lt": "l"}}]},
+        [("timestamp", DESCENDING), ("log_id", DESCENDING)]
+    ),
+    ("telegram_links", {"telegram_chat_id": "c", "is_active": True}, []),
+    ("telegram_links", {"user_id": "u", "is_active": True}, [("updated_at", DESCENDING)]),
+    ("telegram_link_codes", {"code": "c", "is_consumed": False}, []),
+    ("telegram_sessions", {"telegram_chat_id": "c"}, []),
+    # Day buckets are read by _id range, which the default _id index serves
+    ("analytics_rollups", {"_id": {"$gte": "applications:day:2026-01-01", "$lt": "applications:day:~"}}, []),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Create every registered index (no-op for ones that already exist)
+    A conflicting or unbuildable index (e.g. duplicate keys under a unique index) is
+    logged and skipped so the rest still apply
+    """
+    applied: Dict[str, List[str]] = {}
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        applied[collection_name] = []
+        for index in indexes:
+            try:
+                applied[collection_name].extend(await collection.create_indexes([index]))
+            except OperationFailure as e:
+                logger.error(f"Index {collection_name}.{index.document['name']} not applied: {e}")
+    return applied
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """All stage names in an explain plan tree (classic and SBE layouts)"""
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    if not isinstance(plan, dict):
+        return []
+
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "inputStages", "queryPlan", "outerStage", "innerStage", "thenStage", "elseStage"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    return stages
+
+
+async def find_collection_scans(db) -> List[str]:
+    """Explain each known query shape; returns descriptions of those planned as COLLSCAN"""
+    violations = []
+    for collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            violations.append(f"{collection_name}.find({query}).sort({sort})")
+    return violations
+
+
+async def check_query_plans(db) -> None:
+    """Raise if any known query shape would scan a whole collection"""
+    violations = await find_collection_scans(db)
+    if violations:
+        raise RuntimeError(
+            "Query plan guard: collection scans planned for " + "; ".join(violations)
+            + ". Add an index to database_indexes.INDEX_REGISTRY."
+        )
+    logger.info(f"Query plan guard: {len(QUERY_SHAPES)} query shapes use indexes")
@@ -5,6 +5,8 @@ Affordability Engine - FOIR calculation and eligible amount determination
 import logging
 from typing import Dict, Any
 
+from engines import annuity
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,27 +61,10 @@ class AffordabilityEngine:
         tenure_months: int
     ) -> float:
         """
-        Calculate EMI using standard formula
+        Calculate EMI using standard formula (memoized, see engines.annuity)
         EMI = P × r × (1 + r)^n / ((1 + r)^n - 1)
-        where:
-            P = principal
-            r = monthly interest rate (annual/12/100)
-            n = tenure in months
         """
-        if principal <= 0 or tenure_months <= 0:
-            return 0.0
-        
-        if annual_interest_rate == 0:
-            # Interest-free loan
-            return round(principal / tenure_months, 2)
-        
-        monthly_rate = annual_interest_rate / (12 * 100)
-        
-        emi = principal * monthly_rate * (1 + monthly_rate) ** tenure_months / (
-            (1 + monthly_rate) ** tenure_months - 1
-        )
-        
-        return round(emi, 2)
+        return annuity.calculate_emi(principal, annual_interest_rate, tenure_months)
     
     @staticmethod
     def calculate_max_principal(
@@ -88,21 +73,10 @@ class AffordabilityEngine:
         tenure_months: int
     ) -> float:
         """
-        Back-calculate maximum principal from EMI
+        Back-calculate maximum principal from EMI (memoized, see engines.annuity)
         P = EMI × [(1 - (1 + r)^-n) / r]
         """
-        if max_emi <= 0 or tenure_months <= 0:
-            return 0.0
-        
-        if annual_interest_rate == 0:
-            # Interest-free
-            return round(max_emi * tenure_months, 2)
-        
-        monthly_rate = annual_interest_rate / (12 * 100)
-        
-        principal = max_emi * ((1 - (1 + monthly_rate) ** -tenure_months) / monthly_rate)
-        
-        return round(principal, 2)
+        return annuity.calculate_max_principal(max_emi, annual_interest_rate, tenure_months)
     
     @staticmethod
     def determine_affordable_amount(
@@ -158,21 +132,21 @@ class AffordabilityEngine:
             message = "Income insufficient for any loan amount given existing obligations"
             eligible_amount = 0
         
+        eligible_emi = AffordabilityEngine.calculate_emi(
+            eligible_amount, interest_rate, tenure_months
+        )
+        
         return {
             "status": status,
             "eligible_amount": eligible_amount,
             "requested_amount": requested_amount,
             "max_emi_affordable": max_emi,
             "requested_emi": requested_emi,
-            "eligible_emi": AffordabilityEngine.calculate_emi(
-                eligible_amount, interest_rate, tenure_months
-            ),
+            "eligible_emi": eligible_emi,
             "foir_requested": foir_requested,
             "foir_limit": foir_limit,
             "foir_eligible": AffordabilityEngine.calculate_foir(
-                income,
-                existing_emi,
-                AffordabilityEngine.calculate_emi(eligible_amount, interest_rate, tenure_months)
+                income, existing_emi, eligible_emi
             ),
             "message": message,
             "income": income,
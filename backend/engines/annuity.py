@@ -0,0 +1,103 @@
+"""
+Annuity Math - EMI and principal formulas shared by the EMI, affordability and pricing engines
+"""
+
+from functools import lru_cache
+from typing import Dict, Any
+
+# Bounded per function; a (principal, rate, tenure) key is ~200 bytes
+ANNUITY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def calculate_emi(
+    principal: float,
+    annual_interest_rate: float,
+    tenure_months: int
+) -> float:
+    """
+    Calculate EMI using standard formula
+    EMI = P × r × (1 + r)^n / ((1 + r)^n - 1)
+    where:
+        P = principal
+        r = monthly interest rate (annual/12/100)
+        n = tenure in months
+    """
+    if principal <= 0 or tenure_months <= 0:
+        return 0.0
+
+    if annual_interest_rate == 0:
+        # Interest-free loan
+        return round(principal / tenure_months, 2)
+
+    monthly_rate = annual_interest_rate / (12 * 100)
+
+    emi = principal * monthly_rate * (1 + monthly_rate) ** tenure_months / (
+        (1 + monthly_rate) ** tenure_months - 1
+    )
+
+    return round(emi, 2)
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def calculate_max_principal(
+    max_emi: float,
+    annual_interest_rate: float,
+    tenure_months: int
+) -> float:
+    """
+    Back-calculate maximum principal from EMI
+    P = EMI × [(1 - (1 + r)^-n) / r]
+    """
+    if max_emi <= 0 or tenure_months <= 0:
+        return 0.0
+
+    if annual_interest_rate == 0:
+        # Interest-free
+        return round(max_emi * tenure_months, 2)
+
+    monthly_rate = annual_interest_rate / (12 * 100)
+
+    principal = max_emi * ((1 - (1 + monthly_rate) ** -tenure_months) / monthly_rate)
+
+    return round(principal, 2)
+
+
+def calculate_total_interest(
+    principal: float,
+    monthly_emi: float,
+    tenure_months: int
+) -> float:
+    """
+    Calculate total interest payable over loan tenure
+    Total Interest = (EMI × Tenure) - Principal
+    """
+    total_repayment = monthly_emi * tenure_months
+    total_interest = total_repayment - principal
+
+    return round(total_interest, 2)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the memoized annuity functions"""
+    stats = {}
+    for name, func in (
+        ("calculate_emi", calculate_emi),
+        ("calculate_max_principal", calculate_max_principal)
+    ):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        }
+    return stats
+
+
+def clear_cache():
+    """Drop cached results and reset the counters"""
+    calculate_emi.cache_clear()
+    calculate_max_principal.cache_clear()
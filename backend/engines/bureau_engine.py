@@ -5,12 +5,33 @@ Credit Bureau Engine - Fixed mock CIBIL report fetching
 import json
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Mapping, Optional
 
-from config import BASE_DIR
+from config import BASE_DIR, settings
+from engines.bureau_store import CompiledBureauDataset
 
 logger = logging.getLogger(__name__)
 
+SOURCE_FILES = [
+    os.path.join(BASE_DIR, "mock_data", "seeds", "credit_bureau_sample.json"),
+]
+
+
+def compiled_dataset_path() -> str:
+    return os.path.join(BASE_DIR, settings.BUREAU_COMPILED_DATASET_PATH)
+
+
+def read_source_records(file_path: str) -> List[Dict[str, Any]]:
+    """Bureau records from a JSON extract (a list, or a dict with records/data)"""
+    with open(file_path, "r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        return payload.get("records") or payload.get("data") or []
+    return []
+
 
 class BureauEngine:
     """
@@ -18,34 +39,28 @@ class BureauEngine:
     Uses fixed mock CIBIL dataset only (no random generation)
     """
     
-    _mock_data = {}
+    _mock_data: Mapping[str, Any] = {}
 
     @classmethod
-    def load_mock_dataset(cls) -> Dict[str, Any]:
+    def load_mock_dataset(cls) -> Mapping[str, Any]:
         """
-        Load mock bureau dataset from JSON files and index by PAN.
+        Load mock bureau dataset indexed by PAN.
+        Memory-maps the compiled dataset when it exists (shared by all worker
+        processes, nothing parsed up front); otherwise reads the JSON files.
         """
-        candidate_files = [
-            os.path.join(BASE_DIR, "mock_data", "seeds", "credit_bureau_sample.json"),
-        ]
+        compiled = cls._open_compiled_dataset()
+        if compiled is not None:
+            cls._mock_data = compiled
+            logger.info(f"Mock bureau dataset ready with {len(compiled)} PAN profiles (memory-mapped)")
+            return cls._mock_data
 
         loaded_records = {}
-        for file_path in candidate_files:
+        for file_path in SOURCE_FILES:
             if not os.path.exists(file_path):
                 continue
 
             try:
-                with open(file_path, "r", encoding="utf-8") as handle:
-                    payload = json.load(handle)
-
-                if isinstance(payload, list):
-                    records = payload
-                elif isinstance(payload, dict):
-                    records = payload.get("records") or payload.get("data") or []
-                else:
-                    records = []
-
-                for record in records:
+                for record in read_source_records(file_path):
                     pan = (record.get("pan") or "").upper().strip()
                     if pan:
                         loaded_records[pan] = record
@@ -59,6 +74,26 @@ class BureauEngine:
         cls._mock_data = loaded_records
         logger.info(f"Mock bureau dataset ready with {len(cls._mock_data)} PAN profiles")
         return cls._mock_data
+
+    @classmethod
+    def _open_compiled_dataset(cls) -> Optional[CompiledBureauDataset]:
+        path = compiled_dataset_path()
+        if not os.path.exists(path):
+            return None
+
+        try:
+            dataset = CompiledBureauDataset(path)
+        except Exception as exc:
+            logger.warning(f"Ignoring compiled bureau dataset {path} ({exc}); reading JSON instead")
+            return None
+
+        compiled_at = os.path.getmtime(path)
+        stale = [file_path for file_path in SOURCE_FILES
+                 if os.path.exists(file_path) and os.path.getmtime(file_path) > compiled_at]
+        if stale:
+            logger.warning(f"Compiled bureau dataset is older than {', '.join(stale)}; "
+                           f"rerun scripts/compile_bureau_dataset.py")
+        return dataset
     
     @classmethod
     def load_mock_data(cls, data: Dict[str, Any]):
@@ -78,10 +113,10 @@ class BureauEngine:
         if not cls._mock_data:
             cls.load_mock_dataset()
 
-        if pan_upper not in cls._mock_data:
+        report = cls._mock_data.get(pan_upper)
+        if report is None:
             raise ValueError("PAN not found in mock CIBIL registry")
 
-        report = cls._mock_data[pan_upper]
         logger.info(f"Bureau data fetched from mock dataset for PAN ending {pan_upper[-4:]}")
 
         return report
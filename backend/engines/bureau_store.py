@@ -0,0 +1,244 @@
+"""
+Compiled Bureau Dataset
+Binary form of the bureau extract: a fixed-width record table plus a sorted PAN
+index, memory-mapped read-only so every worker process shares the same pages and
+startup does no parsing. A record is decoded into a dict only when it is looked up.
+
+File layout:
+    8 bytes     magic b"BUREAU01"
+    8 bytes     header length (little-endian uint64)
+    header      JSON: record count, field kinds and widths, value tables, source info
+    padding     to a 64-byte boundary
+    PAN index   count x S{pan_width}, sorted ascending (binary searched)
+    records     count x packed record struct, in PAN index order
+
+Field kinds are inferred from the extract when compiling: bool, int (int64),
+float (float64), str (fixed-width UTF-8) and table (list/dict values such as
+bureau_flags, stored as a uint32 index into a table of the distinct values).
+Two bitmasks per record keep absent fields and None values apart.
+"""
+
+import json
+import math
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"BUREAU01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+MAX_FIELDS = 64
+
+
+def _field_kind(values: List[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return "bool"
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return "int"
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if present and all(isinstance(value, str) for value in present):
+        return "str"
+    return "table"
+
+
+def _numpy_type(kind: str, width: int) -> str:
+    return {"bool": "u1", "int": "<i8", "float": "<f8", "table": "<u4"}.get(kind, f"S{max(1, width)}")
+
+
+def _record_dtype(fields: List[Dict[str, Any]]) -> np.dtype:
+    return np.dtype(
+        [("present", "<u8"), ("null", "<u8")]
+        + [(f"f{position}", _numpy_type(field["kind"], field["width"])) for position, field in enumerate(fields)]
+    )
+
+
+def compile_dataset(records: Iterable[Dict[str, Any]], output_path: str, source: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write records (dicts with a "pan") in the compiled format
+    Later duplicates of a PAN replace earlier ones, as in the JSON loader.
+    Returns the header written.
+    """
+    by_pan: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        pan = (record.get("pan") or "").upper().strip()
+        if pan:
+            by_pan[pan] = record
+    pans = sorted(by_pan)
+    rows = [by_pan[pan] for pan in pans]
+
+    names: List[str] = []
+    for record in rows:
+        for name in record:
+            if name not in names:
+                names.append(name)
+    if len(names) > MAX_FIELDS:
+        raise ValueError(f"Bureau records have {len(names)} fields; the compiled format supports {MAX_FIELDS}")
+
+    fields: List[Dict[str, Any]] = []
+    tables: Dict[str, List[Any]] = {}
+    for name in names:
+        values = [record.get(name) for record in rows]
+        kind = _field_kind(values)
+        width = 0
+        if kind == "str":
+            width = max((len(value.encode("utf-8")) for value in values if value is not None), default=1)
+        fields.append({"name": name, "kind": kind, "width": width})
+
+    dtype = _record_dtype(fields)
+    table = np.zeros(len(rows), dtype=dtype)
+    for position, field in enumerate(fields):
+        name, kind, bit = field["name"], field["kind"], np.uint64(1 << position)
+        present = np.array([name in record for record in rows], dtype=bool)
+        null = np.array([name in record and record[name] is None for record in rows], dtype=bool)
+        table["present"][present] |= bit
+        table["null"][null] |= bit
+
+        values = [record.get(name) for record in rows]
+        if kind == "str":
+            column = [value.encode("utf-8") if value is not None else b"" for value in values]
+        elif kind == "table":
+            distinct: Dict[str, int] = {}
+            column = []
+            for value in values:
+                encoded = json.dumps(value, sort_keys=True, default=str)
+                column.append(distinct.setdefault(encoded, len(distinct)))
+            tables[name] = [json.loads(encoded) for encoded in distinct]
+        else:
+            column = [value if value is not None else 0 for value in values]
+        table[f"f{position}"] = column
+
+    pan_width = max((len(pan.encode("utf-8")) for pan in pans), default=1)
+    index = np.array([pan.encode("utf-8") for pan in pans], dtype=f"S{pan_width}")
+
+    header = {
+        "version": FORMAT_VERSION,
+        "count": len(rows),
+        "pan_width": pan_width,
+        "record_size": dtype.itemsize,
+        "fields": fields,
+        "tables": tables,
+        "source": source or {},
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    index_offset, records_offset = _section_offsets(len(header_bytes), len(rows), pan_width)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    partial_path = f"{output_path}.partial"
+    with open(partial_path, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(len(header_bytes).to_bytes(8, "little"))
+        handle.write(header_bytes)
+        handle.write(b"\0" * (index_offset - handle.tell()))
+        handle.write(index.tobytes())
+        handle.write(b"\0" * (records_offset - handle.tell()))
+        handle.write(table.tobytes())
+    # Readers mapping the old file keep their pages; new opens see the complete new file
+    os.replace(partial_path, output_path)
+    return header
+
+
+def _section_offsets(header_length: int, count: int, pan_width: int) -> Tuple[int, int]:
+    index_offset = math.ceil((len(MAGIC) + 8 + header_length) / ALIGNMENT) * ALIGNMENT
+    records_offset = math.ceil((index_offset + count * pan_width) / ALIGNMENT) * ALIGNMENT
+    return index_offset, records_offset
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    return value
+
+
+def _read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    with open(path, "rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compiled bureau dataset")
+        length = int.from_bytes(handle.read(8), "little")
+        header = json.loads(handle.read(length))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {header.get('version')}; expected {FORMAT_VERSION}. Recompile it.")
+    return header, length
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    return _read_header(path)[0]
+
+
+class CompiledBureauDataset(Mapping):
+    """Read-only PAN -> report mapping over a memory-mapped compiled dataset"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header, header_length = _read_header(path)
+        self._fields = self.header["fields"]
+        self._tables = self.header["tables"]
+        self._count = self.header["count"]
+        pan_width = self.header["pan_width"]
+        index_offset, records_offset = _section_offsets(header_length, self._count, pan_width)
+
+        self._index = np.memmap(path, dtype=f"S{pan_width}", mode="r", offset=index_offset, shape=(self._count,)) if self._count else np.empty(0, dtype=f"S{pan_width}")
+        dtype = _record_dtype(self._fields)
+        if dtype.itemsize != self.header["record_size"]:
+            raise ValueError(f"{path} record size {self.header['record_size']} does not match its field list")
+        self._records = np.memmap(path, dtype=dtype, mode="r", offset=records_offset, shape=(self._count,)) if self._count else np.empty(0, dtype=dtype)
+
+    def _row(self, pan: Any) -> Optional[int]:
+        if not isinstance(pan, str):
+            return None
+        key = pan.upper().strip().encode("utf-8")
+        if not key or len(key) > self.header["pan_width"]:
+            return None
+        position = int(np.searchsorted(self._index, key))
+        if position < self._count and self._index[position] == key:
+            return position
+        return None
+
+    def _decode(self, row: int) -> Dict[str, Any]:
+        # One call turns the whole record into Python scalars (bytes/int/float)
+        present, null, *values = self._records[row].item()
+        report: Dict[str, Any] = {}
+        for position, (field, value) in enumerate(zip(self._fields, values)):
+            bit = 1 << position
+            if not present & bit:
+                continue
+            name = field["name"]
+            if null & bit:
+                report[name] = None
+                continue
+            kind = field["kind"]
+            if kind == "str":
+                report[name] = value.decode("utf-8")
+            elif kind == "bool":
+                report[name] = bool(value)
+            elif kind == "table":
+                # Copy, so callers can never mutate the shared table
+                report[name] = _copy_value(self._tables[name][value])
+            else:
+                report[name] = value
+        return report
+
+    def __getitem__(self, pan: str) -> Dict[str, Any]:
+        row = self._row(pan)
+        if row is None:
+            raise KeyError(pan)
+        return self._decode(row)
+
+    def get(self, pan: str, default: Any = None) -> Any:
+        row = self._row(pan)
+        return default if row is None else self._decode(row)
+
+    def __contains__(self, pan: object) -> bool:
+        return self._row(pan) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        for pan in self._index:
+            yield bytes(pan).decode("utf-8")
@@ -4,11 +4,75 @@ EMI Engine - Amortization schedule generation
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, Union
 from dateutil.relativedelta import relativedelta
+import numpy as np
+
+from engines import annuity
 
 logger = logging.getLogger(__name__)
 
+# Stored schedules in this format keep annuity parameters plus non-formula rows only
+COMPACT_SCHEDULE_FORMAT = "annuity_v1"
+
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's round(value, 2)
+    np.rint(x * 100) can disagree with round() when x sits within float noise of a
+    half-paisa boundary, so those few elements fall back to the scalar round()
+    """
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-5
+    for index in np.flatnonzero(near_tie):
+        rounded[index] = round(float(values[index]), 2)
+    return rounded
+
+
+def _rounded_installments(
+    principal: float,
+    annual_interest_rate: float,
+    tenure_months: int
+) -> Iterator[Tuple[float, float, float, float]]:
+    """
+    Core amortization recurrence with per-installment rounding
+    Yields (emi, principal_component, interest_component, remaining_balance) per month
+    """
+    # Calculate EMI
+    emi = EMIEngine.calculate_emi(principal, annual_interest_rate, tenure_months)
+    
+    monthly_rate = annual_interest_rate / (12 * 100)
+    remaining_balance = principal
+    
+    for month in range(1, tenure_months + 1):
+        # Calculate interest for this month
+        interest_component = round(remaining_balance * monthly_rate, 2)
+        
+        # Principal component
+        principal_component = round(emi - interest_component, 2)
+        
+        # Handle last installment rounding
+        if month == tenure_months:
+            principal_component = remaining_balance
+            emi = principal_component + interest_component
+        
+        # Update remaining balance
+        remaining_balance -= principal_component
+        remaining_balance = max(0, round(remaining_balance, 2))  # Avoid negative due to rounding
+        
+        yield emi, principal_component, interest_component, remaining_balance
+
+
+def _due_date(disbursement_date: datetime, month: int) -> datetime:
+    """Due date of an installment: first day of the month, starting from the month after disbursement"""
+    month_index = disbursement_date.month - 1 + month
+    return disbursement_date.replace(
+        year=disbursement_date.year + month_index // 12,
+        month=month_index % 12 + 1,
+        day=1
+    )
+
 
 class EMIEngine:
     """
@@ -28,16 +92,7 @@ class EMIEngine:
         Calculate monthly EMI
         EMI = P × r × (1 + r)^n / ((1 + r)^n - 1)
         """
-        if annual_interest_rate == 0:
-            return round(principal / tenure_months, 2)
-        
-        monthly_rate = annual_interest_rate / (12 * 100)
-        
-        emi = principal * monthly_rate * (1 + monthly_rate) ** tenure_months / (
-            (1 + monthly_rate) ** tenure_months - 1
-        )
-        
-        return round(emi, 2)
+        return annuity.calculate_emi(principal, annual_interest_rate, tenure_months)
     
     @staticmethod
     def generate_amortization_schedule(
@@ -50,39 +105,39 @@ class EMIEngine:
         Generate complete amortization schedule
         Returns list of installments with principal/interest breakdown
         """
+        schedule = list(EMIEngine.iter_amortization_schedule(
+            principal, annual_interest_rate, tenure_months, disbursement_date
+        ))
+        emi = schedule[-1]["emi_amount"] if schedule else 0
+        
+        logger.info(f"Generated amortization schedule: {tenure_months} installments, EMI: ₹{emi}")
+        
+        return schedule
+
+    @staticmethod
+    def iter_amortization_schedule(
+        principal: float,
+        annual_interest_rate: float,
+        tenure_months: int,
+        disbursement_date: Union[datetime, str, None] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield amortization installments one at a time
+        Accepts the disbursement date as a datetime or an ISO-8601 string
+        """
         if disbursement_date is None:
             disbursement_date = datetime.utcnow()
+        elif isinstance(disbursement_date, str):
+            disbursement_date = datetime.fromisoformat(disbursement_date)
         
-        # Calculate EMI
-        emi = EMIEngine.calculate_emi(principal, annual_interest_rate, tenure_months)
-        
-        monthly_rate = annual_interest_rate / (12 * 100)
-        remaining_balance = principal
-        schedule = []
+        installments = _rounded_installments(principal, annual_interest_rate, tenure_months)
         
-        for month in range(1, tenure_months + 1):
-            # Calculate interest for this month
-            interest_component = round(remaining_balance * monthly_rate, 2)
-            
-            # Principal component
-            principal_component = round(emi - interest_component, 2)
-            
-            # Handle last installment rounding
-            if month == tenure_months:
-                principal_component = remaining_balance
-                emi = principal_component + interest_component
-            
-            # Update remaining balance
-            remaining_balance -= principal_component
-            remaining_balance = max(0, round(remaining_balance, 2))  # Avoid negative due to rounding
-            
-            # Calculate due date (first day of month, starting from next month)
-            due_date = disbursement_date + relativedelta(months=month)
-            due_date = due_date.replace(day=1)  # Set to 1st of month
-            
-            installment = {
+        for month, (emi, principal_component, interest_component, remaining_balance) in enumerate(
+            installments, start=1
+        ):
+            yield {
                 "month": month,
-                "due_date": due_date,
+                "due_date": _due_date(disbursement_date, month),
                 "emi_amount": emi,
                 "principal_component": principal_component,
                 "interest_component": interest_component,
@@ -91,18 +146,267 @@ class EMIEngine:
                 "paid_date": None,
                 "payment_transaction_id": None
             }
-            
-            schedule.append(installment)
-        
-        logger.info(f"Generated amortization schedule: {tenure_months} installments, EMI: ₹{emi}")
-        
-        return schedule
-    
+
     @staticmethod
-    def get_schedule_summary(schedule: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_emi_batch(
+        principals: np.ndarray,
+        annual_interest_rates: np.ndarray,
+        tenures_months: np.ndarray
+    ) -> np.ndarray:
+        """
+        Vectorized calculate_emi over arrays of loans
+        Loans whose EMI lands near a rounding boundary are recomputed with the
+        scalar formula so the result matches calculate_emi exactly
+        """
+        principals = np.asarray(principals, dtype=np.float64)
+        annual_interest_rates = np.asarray(annual_interest_rates, dtype=np.float64)
+        tenures_months = np.asarray(tenures_months, dtype=np.int64)
+
+        monthly_rates = annual_interest_rates / (12 * 100)
+        interest_free = annual_interest_rates == 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = (1 + monthly_rates) ** tenures_months
+            raw_emi = np.where(
+                interest_free,
+                principals / tenures_months,
+                principals * monthly_rates * growth / (growth - 1)
+            )
+
+        scaled = raw_emi * 100.0
+        emi = np.rint(scaled) / 100.0
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-5
+        for index in np.flatnonzero(near_tie):
+            emi[index] = EMIEngine.calculate_emi(
+                float(principals[index]),
+                float(annual_interest_rates[index]),
+                int(tenures_months[index])
+            )
+
+        return emi
+
+    @staticmethod
+    def generate_amortization_schedules_batch(
+        principals: Sequence[float],
+        annual_interest_rates: Sequence[float],
+        tenures_months: Sequence[int],
+        disbursement_dates: Union[datetime, Sequence[Any], np.ndarray, None] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Generate amortization schedules for many loans at once
+
+        Produces the same figures as generate_amortization_schedule (per-row rounding
+        and last-installment adjustment included), vectorized across loans and
+        stepping month by month. Rows of every loan are laid out back to back:
+        loan i owns rows offsets[i]:offsets[i + 1].
+
+        Returns column arrays:
+            loan_index, month, due_date (datetime64[us]), emi_amount,
+            principal_component, interest_component, remaining_balance,
+            plus per-loan offsets and monthly_emi
+        """
+        principals = np.asarray(principals, dtype=np.float64)
+        annual_interest_rates = np.asarray(annual_interest_rates, dtype=np.float64)
+        tenures_months = np.asarray(tenures_months, dtype=np.int64)
+        loan_count = len(principals)
+
+        if disbursement_dates is None:
+            disbursement_dates = datetime.utcnow()
+        if isinstance(disbursement_dates, datetime):
+            disbursement_dates = np.full(loan_count, np.datetime64(disbursement_dates, "us"))
+        disbursement_dates = np.asarray(disbursement_dates, dtype="datetime64[us]")
+
+        offsets = np.zeros(loan_count + 1, dtype=np.int64)
+        np.cumsum(tenures_months, out=offsets[1:])
+        total_rows = int(offsets[-1])
+
+        loan_index = np.repeat(np.arange(loan_count, dtype=np.int64), tenures_months)
+        month = np.arange(total_rows, dtype=np.int64) - offsets[loan_index] + 1
+
+        # Due date: 1st of the month `month` months after disbursement, keeping time of day
+        time_of_day = disbursement_dates - disbursement_dates.astype("datetime64[D]")
+        due_months = disbursement_dates.astype("datetime64[M]")[loan_index] + month
+        due_date = due_months.astype("datetime64[D]").astype("datetime64[us]") + time_of_day[loan_index]
+
+        monthly_emi = EMIEngine.calculate_emi_batch(
+            principals, annual_interest_rates, tenures_months
+        )
+        monthly_rates = annual_interest_rates / (12 * 100)
+
+        emi_amount = np.empty(total_rows, dtype=np.float64)
+        principal_component = np.empty(total_rows, dtype=np.float64)
+        interest_component = np.empty(total_rows, dtype=np.float64)
+        remaining_balance = np.empty(total_rows, dtype=np.float64)
+
+        balance = principals.copy()
+        max_tenure = int(tenures_months.max()) if loan_count else 0
+
+        for current_month in range(1, max_tenure + 1):
+            active = np.flatnonzero(tenures_months >= current_month)
+            rows = offsets[active] + current_month - 1
+            active_balance = balance[active]
+
+            interest = _round2(active_balance * monthly_rates[active])
+            principal_part = _round2(monthly_emi[active] - interest)
+            emi = monthly_emi[active].copy()
+
+            # Handle last installment rounding
+            is_last = tenures_months[active] == current_month
+            principal_part[is_last] = active_balance[is_last]
+            emi[is_last] = principal_part[is_last] + interest[is_last]
+
+            new_balance = np.maximum(0, _round2(active_balance - principal_part))
+            balance[active] = new_balance
+
+            emi_amount[rows] = emi
+            principal_component[rows] = principal_part
+            interest_component[rows] = interest
+            remaining_balance[rows] = new_balance
+
+        logger.info(f"Generated {loan_count} amortization schedules in batch: {total_rows} installments")
+
+        return {
+            "loan_index": loan_index,
+            "month": month,
+            "due_date": due_date,
+            "emi_amount": emi_amount,
+            "principal_component": principal_component,
+            "interest_component": interest_component,
+            "remaining_balance": remaining_balance,
+            "offsets": offsets,
+            "monthly_emi": monthly_emi
+        }
+
+    @staticmethod
+    def batch_schedule_rows(
+        batch: Dict[str, np.ndarray],
+        loan_index: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Rebuild one loan's schedule from a batch result
+        in the same row format as generate_amortization_schedule
+        """
+        start, end = batch["offsets"][loan_index], batch["offsets"][loan_index + 1]
+        due_dates = batch["due_date"][start:end].astype(datetime)
+
+        return [
+            {
+                "month": int(batch["month"][row]),
+                "due_date": due_dates[row - start],
+                "emi_amount": float(batch["emi_amount"][row]),
+                "principal_component": float(batch["principal_component"][row]),
+                "interest_component": float(batch["interest_component"][row]),
+                "remaining_balance": float(batch["remaining_balance"][row]),
+                "status": "PENDING",
+                "paid_date": None,
+                "payment_transaction_id": None
+            }
+            for row in range(start, end)
+        ]
+
+    @staticmethod
+    def compact_schedule(
+        schedule: List[Dict[str, Any]],
+        principal: float,
+        annual_interest_rate: float,
+        tenure_months: int
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Compact a schedule for storage as its annuity parameters plus
+        only the rows that differ from the formula (payments, status changes)
+        Returns the schedule unchanged when it cannot be reproduced from the parameters
+        """
+        if not schedule or len(schedule) != tenure_months:
+            return schedule
+
+        first_due_date = schedule[0].get("due_date")
+        if isinstance(first_due_date, str):
+            first_due_date = datetime.fromisoformat(first_due_date)
+        if not isinstance(first_due_date, datetime):
+            return schedule
+
+        # Due dates only depend on the anchor's month and time of day
+        anchor_date = first_due_date - relativedelta(months=1)
+        expected_rows = EMIEngine.iter_amortization_schedule(
+            principal, annual_interest_rate, tenure_months, anchor_date
+        )
+        overrides = [
+            installment
+            for installment, expected in zip(schedule, expected_rows)
+            if installment != expected
+        ]
+
+        if len(overrides) > tenure_months // 2:
+            return schedule
+
+        return {
+            "format": COMPACT_SCHEDULE_FORMAT,
+            "principal": principal,
+            "annual_interest_rate": annual_interest_rate,
+            "tenure_months": tenure_months,
+            "first_due_date": first_due_date,
+            "overrides": overrides
+        }
+
+    @staticmethod
+    def iter_stored_schedule(
+        stored_schedule: Union[Dict[str, Any], List[Dict[str, Any]], None]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield installments from a stored schedule
+        Handles both the compact format and legacy list-of-rows documents
+        """
+        if not stored_schedule:
+            return
+
+        if isinstance(stored_schedule, list):
+            yield from stored_schedule
+            return
+
+        if stored_schedule.get("format") != COMPACT_SCHEDULE_FORMAT:
+            raise ValueError(f"Unknown EMI schedule format: {stored_schedule.get('format')}")
+
+        first_due_date = stored_schedule["first_due_date"]
+        if isinstance(first_due_date, str):
+            first_due_date = datetime.fromisoformat(first_due_date)
+
+        overrides = {row["month"]: row for row in stored_schedule.get("overrides", [])}
+        for installment in EMIEngine.iter_amortization_schedule(
+            stored_schedule["principal"],
+            stored_schedule["annual_interest_rate"],
+            stored_schedule["tenure_months"],
+            first_due_date - relativedelta(months=1)
+        ):
+            yield overrides.get(installment["month"], installment)
+
+    @staticmethod
+    def expand_schedule(
+        stored_schedule: Union[Dict[str, Any], List[Dict[str, Any]], None]
+    ) -> List[Dict[str, Any]]:
+        """Materialize a stored schedule (compact or legacy) as a list of installments"""
+        return list(EMIEngine.iter_stored_schedule(stored_schedule))
+
+    @staticmethod
+    def query_schedule(
+        principal: float,
+        annual_interest_rate: float,
+        tenure_months: int,
+        disbursement_date: Union[datetime, str, None] = None
+    ) -> "ScheduleQuery":
+        """Point queries on a schedule without building its rows"""
+        return ScheduleQuery(principal, annual_interest_rate, tenure_months, disbursement_date)
+
+    @staticmethod
+    def get_schedule_summary(
+        schedule: Union[List[Dict[str, Any]], "ScheduleQuery"]
+    ) -> Dict[str, Any]:
         """
         Get summary statistics from amortization schedule
+        Accepts a materialized schedule or a ScheduleQuery
         """
+        if isinstance(schedule, ScheduleQuery):
+            return schedule.summary()
+
         if not schedule:
             return {}
         
@@ -122,19 +426,23 @@ class EMIEngine:
     
     @staticmethod
     def calculate_prepayment_details(
-        schedule: List[Dict[str, Any]],
+        schedule: Union[List[Dict[str, Any]], "ScheduleQuery"],
         current_month: int,
         prepayment_amount: float,
         prepayment_charge_percent: float = 2.0
     ) -> Dict[str, Any]:
         """
         Calculate prepayment impact and charges
+        Accepts a materialized schedule or a ScheduleQuery
         """
-        if current_month < 1 or current_month > len(schedule):
+        if not isinstance(schedule, ScheduleQuery):
+            schedule = ScheduleQuery.from_rows(schedule)
+
+        if current_month < 1 or current_month > schedule.tenure_months:
             return {"error": "Invalid month"}
         
         # Get current outstanding
-        outstanding_principal = schedule[current_month - 1]["remaining_balance"]
+        outstanding_principal = schedule.outstanding_principal(current_month)
         
         if prepayment_amount > outstanding_principal:
             prepayment_amount = outstanding_principal
@@ -146,12 +454,12 @@ class EMIEngine:
         new_outstanding = outstanding_principal - prepayment_amount
         
         # Interest savings (rough estimate)
-        remaining_months = len(schedule) - current_month
-        avg_monthly_interest = schedule[current_month]["interest_component"]
+        remaining_months = schedule.tenure_months - current_month
+        avg_monthly_interest = schedule.interest_component(current_month + 1)
         estimated_interest_savings = round(
             avg_monthly_interest * remaining_months * (prepayment_amount / outstanding_principal),
             2
-        )
+        ) if outstanding_principal else 0
         
         return {
             "current_outstanding": outstanding_principal,
@@ -164,5 +472,138 @@ class EMIEngine:
         }
 
 
+class ScheduleQuery:
+    """
+    Schedule queries without materializing installment rows
+    - Closed-form annuity values in O(1) (exact=False)
+    - Figures identical to the materialized schedule (exact=True, default)
+
+    Per-installment paise rounding makes the materialized balances path dependent,
+    so exact queries run the rounded recurrence once on plain floats (no dicts,
+    no dates) and answer every later query from that cache in O(1).
+    """
+
+    def __init__(
+        self,
+        principal: float,
+        annual_interest_rate: float,
+        tenure_months: int,
+        disbursement_date: Union[datetime, str, None] = None
+    ):
+        if isinstance(disbursement_date, str):
+            disbursement_date = datetime.fromisoformat(disbursement_date)
+
+        self.principal = principal
+        self.annual_interest_rate = annual_interest_rate
+        self.tenure_months = tenure_months
+        self.disbursement_date = disbursement_date
+        self.monthly_rate = annual_interest_rate / (12 * 100)
+        self.emi = EMIEngine.calculate_emi(principal, annual_interest_rate, tenure_months)
+
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._balances: Optional[List[float]] = None
+        self._interest: Optional[List[float]] = None
+        self._cumulative_interest: Optional[List[float]] = None
+        self._totals: Optional[Tuple[float, float, float]] = None
+        self._last_emi: Optional[float] = None
+
+    @classmethod
+    def from_rows(cls, schedule: List[Dict[str, Any]]) -> "ScheduleQuery":
+        """Wrap an already materialized schedule so queries read its rows"""
+        query = cls.__new__(cls)
+        query.tenure_months = len(schedule)
+        query._rows = schedule
+        return query
+
+    def _ensure_rounded_path(self):
+        if self._balances is not None:
+            return
+
+        balances = [self.principal]
+        interest = [0.0]
+        cumulative_interest = [0.0]
+        total_principal = total_interest = total_payment = 0
+        emi = self.emi
+
+        for emi, principal_component, interest_component, remaining_balance in _rounded_installments(
+            self.principal, self.annual_interest_rate, self.tenure_months
+        ):
+            balances.append(remaining_balance)
+            interest.append(interest_component)
+            total_principal += principal_component
+            total_interest += interest_component
+            total_payment += emi
+            cumulative_interest.append(total_interest)
+
+        self._balances = balances
+        self._interest = interest
+        self._cumulative_interest = cumulative_interest
+        self._totals = (total_principal, total_interest, total_payment)
+        self._last_emi = emi
+
+    def _closed_form_balance(self, month: int) -> float:
+        if self.monthly_rate == 0:
+            return max(0.0, self.principal - self.emi * month)
+        growth = (1 + self.monthly_rate) ** month
+        return self.principal * growth - self.emi * (growth - 1) / self.monthly_rate
+
+    def outstanding_principal(self, month: int, exact: bool = True) -> float:
+        """Outstanding principal after installment `month` is paid"""
+        if self._rows is not None:
+            if month == 0:
+                return round(self._rows[0]["remaining_balance"] + self._rows[0]["principal_component"], 2)
+            return self._rows[month - 1]["remaining_balance"]
+        if not exact:
+            return round(self._closed_form_balance(month), 2)
+        self._ensure_rounded_path()
+        return self._balances[month]
+
+    def interest_component(self, month: int) -> float:
+        """Interest charged in installment `month` (0 beyond the tenure)"""
+        if month < 1 or month > self.tenure_months:
+            return 0
+        if self._rows is not None:
+            return self._rows[month - 1]["interest_component"]
+        self._ensure_rounded_path()
+        return self._interest[month]
+
+    def cumulative_interest(self, month: int, exact: bool = True) -> float:
+        """Interest paid over installments 1..month"""
+        month = min(max(month, 0), self.tenure_months)
+        if self._rows is not None:
+            return round(sum(inst["interest_component"] for inst in self._rows[:month]), 2)
+        if not exact:
+            return round(self.emi * month - (self.principal - self._closed_form_balance(month)), 2)
+        self._ensure_rounded_path()
+        return round(self._cumulative_interest[month], 2)
+
+    def total_interest(self, exact: bool = True) -> float:
+        """Interest paid over the whole tenure"""
+        if not exact and self._rows is None:
+            return round(self.emi * self.tenure_months - self.principal, 2)
+        return self.cumulative_interest(self.tenure_months)
+
+    def summary(self) -> Dict[str, Any]:
+        """Same figures as EMIEngine.get_schedule_summary on the materialized schedule"""
+        if self._rows is not None:
+            return EMIEngine.get_schedule_summary(self._rows)
+        if self.tenure_months < 1:
+            return {}
+
+        self._ensure_rounded_path()
+        total_principal, total_interest, total_payment = self._totals
+        disbursement_date = self.disbursement_date or datetime.utcnow()
+
+        return {
+            "total_installments": self.tenure_months,
+            "total_principal": round(total_principal, 2),
+            "total_interest": round(total_interest, 2),
+            "total_payment": round(total_payment, 2),
+            "first_due_date": _due_date(disbursement_date, 1),
+            "last_due_date": _due_date(disbursement_date, self.tenure_months),
+            "monthly_emi": self.emi if self.tenure_months > 1 else self._last_emi
+        }
+
+
 # Global instance
 emi_engine = EMIEngine()
@@ -4,68 +4,57 @@ PDF Engine - Sanction letter generation
 
 import os
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab.pdfbase import pdfmetrics
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 )
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_JUSTIFY, TA_LEFT
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 
 from config import SANCTION_LETTERS_DIR
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the letter layout or wording changes: it is part of the sanction store key
+SANCTION_TEMPLATE_VERSION = "2"
 
-class PDFEngine:
+# Standard Type 1 fonts the letter uses (their metrics load on first use per process)
+LETTER_FONTS = ["Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"]
+
+BORROWER_TERMS = [
+    "Disbursement will be initiated only after digital acceptance of this sanction letter and successful completion of final internal checks.",
+    "The sanctioned facility remains valid for 15 calendar days from the issue date unless withdrawn earlier for regulatory, fraud-control, or document-validation reasons.",
+    "EMIs are due on the agreed debit date each month. Delayed or failed repayment attracts penal charges of 2% per month on overdue dues, in addition to applicable taxes.",
+    "A bounce or failed auto-debit instruction will attract a service charge of Rs. 500 per instance plus applicable taxes.",
+    "Prepayment or foreclosure is permitted after 6 months from disbursement, subject to a charge of 2% on the principal outstanding and any statutory levies in force.",
+    "The borrower must ensure that all declarations, financial details, and KYC information submitted during the application journey remain true, accurate, and complete.",
+    "Any material adverse change in employment, income, banking access, or repayment capacity should be disclosed promptly to the lender.",
+    "The borrower authorises the lender and its service providers to use validated application data for underwriting, servicing, collections, fraud prevention, and regulatory reporting.",
+    "The loan may be recalled, cancelled, or frozen before disbursement if any discrepancy, adverse bureau event, sanctions hit, fraud concern, or policy breach is identified.",
+    "A cooling-off period of 24 hours from disbursement is available for eligible cancellations in line with the lender's digital lending policy and applicable RBI directions.",
+]
+
+
+class SanctionLetterTemplate:
     """
-    PDF generation engine for loan sanction letters
-    - Generates professional sanction letter PDFs
-    - Includes all loan terms and conditions
-    - RBI compliance clauses
-    - Digital signature simulation
+    Everything in a sanction letter that does not depend on the applicant or offer:
+    paragraph and table styles, and the parsed markup of every static paragraph.
+    Built once per process (sanction_letter_template()); flowables themselves are
+    created per letter, since ReportLab keeps layout state on them.
     """
-    
-    @staticmethod
-    def generate_sanction_letter(
-        loan_id: str,
-        application_data: Dict[str, Any],
-        offer_data: Dict[str, Any],
-        user_data: Dict[str, Any],
-        emi_schedule_summary: Dict[str, Any]
-    ) -> str:
-        """
-        Generate loan sanction letter PDF
-        Returns: File path of generated PDF
-        """
-        # Create filename
-        filename = f"sanction_letter_{loan_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = os.path.join(SANCTION_LETTERS_DIR, filename)
-        issue_date = datetime.now()
-        format_money = lambda value: f"Rs. {float(value or 0):,.2f}"
-        loan_label = offer_data.get('loan_type', 'loan').replace('_', ' ').title()
-        applicant_name = user_data.get('full_name') or user_data.get('email', 'Customer')
-        first_emi_amount = emi_schedule_summary.get('monthly_emi', offer_data.get('monthly_emi', 0))
-        
-        # Create PDF
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=A4,
-            rightMargin=inch,
-            leftMargin=inch,
-            topMargin=inch,
-            bottomMargin=inch
-        )
-        
-        # Container for PDF elements
-        elements = []
-        
-        # Styles
+
+    def __init__(self):
+        for font_name in LETTER_FONTS:
+            pdfmetrics.getFont(font_name)
+
         styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
+        self.title_style = ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=18,
@@ -75,7 +64,7 @@ class PDFEngine:
             fontName='Helvetica-Bold'
         )
         
-        heading_style = ParagraphStyle(
+        self.heading_style = ParagraphStyle(
             'CustomHeading',
             parent=styles['Heading2'],
             fontSize=14,
@@ -84,11 +73,8 @@ class PDFEngine:
             spaceBefore=12,
             fontName='Helvetica-Bold'
         )
-        
-        normal_style = styles['Normal']
-        normal_style.alignment = TA_JUSTIFY
 
-        body_style = ParagraphStyle(
+        self.body_style = ParagraphStyle(
             'BodyStyle',
             parent=styles['Normal'],
             fontSize=10,
@@ -96,7 +82,7 @@ class PDFEngine:
             alignment=TA_LEFT,
         )
 
-        section_note_style = ParagraphStyle(
+        self.section_note_style = ParagraphStyle(
             'SectionNote',
             parent=styles['Normal'],
             fontSize=9,
@@ -105,7 +91,7 @@ class PDFEngine:
             alignment=TA_LEFT,
         )
 
-        small_heading_style = ParagraphStyle(
+        self.small_heading_style = ParagraphStyle(
             'SmallHeading',
             parent=styles['Heading3'],
             fontSize=11,
@@ -114,12 +100,124 @@ class PDFEngine:
             spaceAfter=8,
             fontName='Helvetica-Bold'
         )
+
+        self.footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        )
+
+        self.reference_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#cbd5e1')),
+            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cbd5e1')),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.commercial_terms_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#bfdbfe')),
+            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bfdbfe')),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.repayment_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#d1d5db')),
+            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+
+        # Static paragraphs, parsed once: name -> (text, style, fragments)
+        self._static: Dict[str, tuple] = {}
+        self._parse("letterhead", "NBFC DIGITAL LENDING PLATFORM", self.title_style)
+        self._parse("registered_office", "Registered Office: Digital Lending Operations Centre, India", self.section_note_style)
+        self._parse("letter_title", "LOAN SANCTION LETTER", self.heading_style)
+        self._parse("commercial_terms_heading", "1. Commercial Terms", self.heading_style)
+        self._parse("repayment_heading", "2. Repayment Snapshot", self.heading_style)
+        self._parse(
+            "repayment_note",
+            "This section summarises the scheduled repayment obligations derived from the amortisation plan generated at sanction time.",
+            self.section_note_style,
+        )
+        self._parse("terms_heading", "3. Borrower Terms and Conditions", self.heading_style)
+        for index, term in enumerate(BORROWER_TERMS, start=1):
+            self._parse(f"term_{index}", f"{index}. {term}", self.body_style)
+        self._parse("regulatory_heading", "4. Regulatory and Customer Communication", self.heading_style)
+        self._parse(
+            "regulatory",
+            (
+                "This sanction has been prepared in line with applicable RBI digital lending directions. "
+                "All key charges, repayment obligations, and borrower rights have been disclosed above. "
+                "For service requests or grievances, please write to <b>complaints@nbfc-loan-platform.com</b>."
+            ),
+            self.body_style,
+        )
+        self._parse("acceptance_heading", "5. Acceptance and Execution", self.heading_style)
+        self._parse(
+            "acceptance",
+            (
+                "By accepting this sanction on the digital platform, you confirm that you have read, understood, "
+                "and agreed to the commercial terms, repayment obligations, and borrower declarations contained in this document."
+            ),
+            self.body_style,
+        )
+        self._parse("signatory_heading", "For NBFC Digital Lending Platform", self.small_heading_style)
+        self._parse("signatory", "Authorised Signatory<br/>Digitally generated and system approved", self.body_style)
+        self._parse(
+            "footer",
+            (
+                "<i>This is a system-generated sanction letter and does not require a physical signature. "
+                "Please retain a copy for your records and refer to the loan details page for the latest EMI schedule and servicing updates.</i>"
+            ),
+            self.footer_style,
+        )
+
+    def _parse(self, name: str, text: str, style: ParagraphStyle):
+        paragraph = Paragraph(text, style)
+        self._static[name] = (paragraph.text, paragraph.style, paragraph.frags)
+
+    def static(self, name: str) -> Paragraph:
+        """A new Paragraph for a static block, reusing its parsed fragments"""
+        text, style, frags = self._static[name]
+        return Paragraph(text, style, frags=frags)
+
+    def flowables(
+        self,
+        loan_id: str,
+        application_data: Dict[str, Any],
+        offer_data: Dict[str, Any],
+        user_data: Dict[str, Any],
+        emi_schedule_summary: Dict[str, Any],
+        issue_date: datetime
+    ) -> List[Any]:
+        """The letter's flowables: static blocks from the template, applicant and offer fields filled in"""
+        format_money = lambda value: f"Rs. {float(value or 0):,.2f}"
+        loan_label = offer_data.get('loan_type', 'loan').replace('_', ' ').title()
+        applicant_name = user_data.get('full_name') or user_data.get('email', 'Customer')
+        first_emi_amount = emi_schedule_summary.get('monthly_emi', offer_data.get('monthly_emi', 0))
+
+        elements = []
         
         # Header
-        elements.append(Paragraph("NBFC DIGITAL LENDING PLATFORM", title_style))
-        elements.append(Paragraph("Registered Office: Digital Lending Operations Centre, India", section_note_style))
+        elements.append(self.static("letterhead"))
+        elements.append(self.static("registered_office"))
         elements.append(Spacer(1, 0.15 * inch))
-        elements.append(Paragraph("LOAN SANCTION LETTER", heading_style))
+        elements.append(self.static("letter_title"))
         elements.append(Spacer(1, 0.2 * inch))
 
         reference_table = Table([
@@ -130,21 +228,11 @@ class PDFEngine:
             ['Issue Date', issue_date.strftime('%B %d, %Y')],
             ['Offer Valid Until', offer_data.get('offer_valid_until', '15 calendar days from issue date')],
         ], colWidths=[2.0 * inch, 4.2 * inch])
-        reference_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#cbd5e1')),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cbd5e1')),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        reference_table.setStyle(self.reference_table_style)
         elements.append(reference_table)
         elements.append(Spacer(1, 0.25 * inch))
 
-        elements.append(Paragraph(f"Dear {applicant_name},", body_style))
+        elements.append(Paragraph(f"Dear {applicant_name},", self.body_style))
         elements.append(Spacer(1, 0.08 * inch))
         elements.append(Paragraph(
             (
@@ -152,11 +240,11 @@ class PDFEngine:
                 "terms, borrower undertakings, and regulatory disclosures listed in this document. "
                 "Please review the details carefully before proceeding."
             ),
-            body_style,
+            self.body_style,
         ))
         elements.append(Spacer(1, 0.22 * inch))
 
-        elements.append(Paragraph("1. Commercial Terms", heading_style))
+        elements.append(self.static("commercial_terms_heading"))
         commercial_terms_table = Table([
             ['Facility Amount', format_money(offer_data.get('principal'))],
             ['Tenure', f"{offer_data.get('tenure_months', 0)} months"],
@@ -169,26 +257,12 @@ class PDFEngine:
             ['Total Interest Over Tenure', format_money(offer_data.get('total_interest'))],
             ['Total Repayment Obligation', format_money(offer_data.get('total_repayment'))],
         ], colWidths=[3.5 * inch, 2.7 * inch])
-        commercial_terms_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#bfdbfe')),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bfdbfe')),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        commercial_terms_table.setStyle(self.commercial_terms_table_style)
         elements.append(commercial_terms_table)
         elements.append(Spacer(1, 0.22 * inch))
 
-        elements.append(Paragraph("2. Repayment Snapshot", heading_style))
-        elements.append(Paragraph(
-            "This section summarises the scheduled repayment obligations derived from the amortisation plan generated at sanction time.",
-            section_note_style,
-        ))
+        elements.append(self.static("repayment_heading"))
+        elements.append(self.static("repayment_note"))
         elements.append(Spacer(1, 0.08 * inch))
         repayment_table = Table([
             ['Total Installments', str(emi_schedule_summary.get('total_installments', offer_data.get('tenure_months', 0)))],
@@ -196,79 +270,90 @@ class PDFEngine:
             ['Principal Repaid Over Term', format_money(emi_schedule_summary.get('total_principal', offer_data.get('principal')))],
             ['Interest Repaid Over Term', format_money(emi_schedule_summary.get('total_interest', offer_data.get('total_interest')))],
         ], colWidths=[3.5 * inch, 2.7 * inch])
-        repayment_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8fafc')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#d1d5db')),
-            ('INNERGRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        repayment_table.setStyle(self.repayment_table_style)
         elements.append(repayment_table)
         elements.append(Spacer(1, 0.22 * inch))
 
-        elements.append(Paragraph("3. Borrower Terms and Conditions", heading_style))
-        terms = [
-            "Disbursement will be initiated only after digital acceptance of this sanction letter and successful completion of final internal checks.",
-            "The sanctioned facility remains valid for 15 calendar days from the issue date unless withdrawn earlier for regulatory, fraud-control, or document-validation reasons.",
-            "EMIs are due on the agreed debit date each month. Delayed or failed repayment attracts penal charges of 2% per month on overdue dues, in addition to applicable taxes.",
-            "A bounce or failed auto-debit instruction will attract a service charge of Rs. 500 per instance plus applicable taxes.",
-            "Prepayment or foreclosure is permitted after 6 months from disbursement, subject to a charge of 2% on the principal outstanding and any statutory levies in force.",
-            "The borrower must ensure that all declarations, financial details, and KYC information submitted during the application journey remain true, accurate, and complete.",
-            "Any material adverse change in employment, income, banking access, or repayment capacity should be disclosed promptly to the lender.",
-            "The borrower authorises the lender and its service providers to use validated application data for underwriting, servicing, collections, fraud prevention, and regulatory reporting.",
-            "The loan may be recalled, cancelled, or frozen before disbursement if any discrepancy, adverse bureau event, sanctions hit, fraud concern, or policy breach is identified.",
-            "A cooling-off period of 24 hours from disbursement is available for eligible cancellations in line with the lender's digital lending policy and applicable RBI directions.",
-        ]
-
-        for index, term in enumerate(terms, start=1):
-            elements.append(Paragraph(f"{index}. {term}", body_style))
+        elements.append(self.static("terms_heading"))
+        for index in range(1, len(BORROWER_TERMS) + 1):
+            elements.append(self.static(f"term_{index}"))
             elements.append(Spacer(1, 0.05 * inch))
 
         elements.append(Spacer(1, 0.15 * inch))
-        elements.append(Paragraph("4. Regulatory and Customer Communication", heading_style))
-        elements.append(Paragraph(
-            (
-                "This sanction has been prepared in line with applicable RBI digital lending directions. "
-                "All key charges, repayment obligations, and borrower rights have been disclosed above. "
-                "For service requests or grievances, please write to <b>complaints@nbfc-loan-platform.com</b>."
-            ),
-            body_style,
-        ))
+        elements.append(self.static("regulatory_heading"))
+        elements.append(self.static("regulatory"))
         elements.append(Spacer(1, 0.18 * inch))
-        elements.append(Paragraph("5. Acceptance and Execution", heading_style))
-        elements.append(Paragraph(
-            (
-                "By accepting this sanction on the digital platform, you confirm that you have read, understood, "
-                "and agreed to the commercial terms, repayment obligations, and borrower declarations contained in this document."
-            ),
-            body_style,
-        ))
+        elements.append(self.static("acceptance_heading"))
+        elements.append(self.static("acceptance"))
         elements.append(Spacer(1, 0.35 * inch))
-        elements.append(Paragraph("For NBFC Digital Lending Platform", small_heading_style))
-        elements.append(Paragraph(
-            "Authorised Signatory<br/>Digitally generated and system approved",
-            body_style,
-        ))
+        elements.append(self.static("signatory_heading"))
+        elements.append(self.static("signatory"))
         elements.append(Spacer(1, 0.2 * inch))
         
         # Footer
-        footer_text = (
-            "<i>This is a system-generated sanction letter and does not require a physical signature. "
-            "Please retain a copy for your records and refer to the loan details page for the latest EMI schedule and servicing updates.</i>"
-        )
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_CENTER
+        elements.append(self.static("footer"))
+        return elements
+
+
+_template: Optional[SanctionLetterTemplate] = None
+_template_lock = threading.Lock()
+
+
+def sanction_letter_template() -> SanctionLetterTemplate:
+    """This process's template (built on first use; workflow threads may race for it)"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = SanctionLetterTemplate()
+    return _template
+
+
+class PDFEngine:
+    """
+    PDF generation engine for loan sanction letters
+    - Generates professional sanction letter PDFs
+    - Includes all loan terms and conditions
+    - RBI compliance clauses
+    - Digital signature simulation
+    """
+    
+    @staticmethod
+    def generate_sanction_letter(
+        loan_id: str,
+        application_data: Dict[str, Any],
+        offer_data: Dict[str, Any],
+        user_data: Dict[str, Any],
+        emi_schedule_summary: Dict[str, Any],
+        template: Optional[SanctionLetterTemplate] = None,
+        filepath: Optional[str] = None
+    ) -> str:
+        """
+        Generate loan sanction letter PDF
+        Writes to filepath (default: a timestamped file in SANCTION_LETTERS_DIR).
+        Returns: File path of generated PDF
+        """
+        if filepath is None:
+            filename = f"sanction_letter_{loan_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            filepath = os.path.join(SANCTION_LETTERS_DIR, filename)
+        filename = os.path.basename(filepath)
+        issue_date = datetime.now()
+        template = template or sanction_letter_template()
+        
+        # Create PDF
+        doc = SimpleDocTemplate(
+            filepath,
+            pagesize=A4,
+            rightMargin=inch,
+            leftMargin=inch,
+            topMargin=inch,
+            bottomMargin=inch
         )
-        elements.append(Paragraph(footer_text, footer_style))
         
         # Build PDF
-        doc.build(elements)
+        doc.build(template.flowables(
+            loan_id, application_data, offer_data, user_data, emi_schedule_summary, issue_date
+        ))
         
         logger.info(f"Sanction letter generated: {filename}")
         
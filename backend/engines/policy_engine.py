@@ -4,137 +4,443 @@ Policy Engine - Loads and validates loan applications against policy rules
 
 import json
 import os
-from typing import Dict, Any, List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import logging
 
-from config import POLICIES_DIR
+import numpy as np
+
+from config import settings, POLICIES_DIR
+from engines import annuity
 
 logger = logging.getLogger(__name__)
 
 
-class PolicyEngine:
+class CompiledPolicy:
     """
-    Policy engine for rule-based loan validation
-    Loads JSON policy files and validates applications
+    Flat, pre-resolved view of one policy JSON for hot-path screening
+    Thresholds are plain attributes (defaults applied once at load time)
     """
     
-    def __init__(self):
-        self.policies: Dict[str, Dict] = {}
-        self.load_all_policies()
+    __slots__ = (
+        "loan_type", "version", "policy",
+        "min_age", "max_age", "min_credit_score", "min_income",
+        "employment_types_allowed", "employment_types_display",
+        "min_amount", "max_amount", "min_tenure_months", "max_tenure_months", "foir_limit",
+        "max_active_loans", "max_dpd_30_days"
+    )
     
-    def load_all_policies(self):
-        """Load all policy files from policies directory"""
-        try:
-            for filename in os.listdir(POLICIES_DIR):
-                if filename.endswith(".json"):
-                    loan_type = filename.replace(".json", "")
-                    policy_path = os.path.join(POLICIES_DIR, filename)
-                    
-                    with open(policy_path, 'r') as f:
-                        policy = json.load(f)
-                        self.policies[loan_type] = policy
-                        logger.info(f"Loaded policy: {loan_type} (version {policy.get('version')})")
-        except Exception as e:
-            logger.error(f"Error loading policies: {e}")
-            raise
+    def __init__(self, loan_type: str, policy: Dict[str, Any]):
+        eligibility = policy.get("eligibility_rules", {})
+        loan_params = policy.get("loan_parameters", {})
+        bureau_criteria = policy.get("bureau_criteria", {})
+        
+        self.loan_type = loan_type
+        self.version = policy.get("version")
+        self.policy = policy
+        
+        self.min_age = eligibility.get("min_age", 0)
+        self.max_age = eligibility.get("max_age", 999)
+        self.min_credit_score = eligibility.get("min_credit_score", 0)
+        self.min_income = eligibility.get("min_income", 0)
+        self.employment_types_display = eligibility.get("employment_types_allowed", [])
+        self.employment_types_allowed = frozenset(self.employment_types_display)
+        
+        self.min_amount = loan_params.get("min_amount", 0)
+        self.max_amount = loan_params.get("max_amount", float('inf'))
+        self.min_tenure_months = loan_params.get("min_tenure_months", 0)
+        self.max_tenure_months = loan_params.get("max_tenure_months", 999)
+        self.foir_limit = loan_params.get("foir_limit", 0.5)
+        
+        self.max_active_loans = bureau_criteria.get("max_active_loans", 999)
+        self.max_dpd_30_days = bureau_criteria.get("max_dpd_30_days", 999)
     
-    def get_policy(self, loan_type: str) -> Dict[str, Any]:
-        """Get policy for a specific loan type"""
-        policy = self.policies.get(loan_type)
-        if not policy:
-            raise ValueError(f"Policy not found for loan type: {loan_type}")
-        return policy
+    def is_eligible(
+        self,
+        application_data: Dict[str, Any],
+        credit_score: int = None,
+        bureau_data: Dict[str, Any] = None
+    ) -> bool:
+        """Pass/fail only - returns at the first failing rule, builds no messages"""
+        age = application_data.get("age")
+        if age and (age < self.min_age or age > self.max_age):
+            return False
+        
+        if credit_score is not None and credit_score < self.min_credit_score:
+            return False
+        
+        income = application_data.get("income")
+        if income and income < self.min_income:
+            return False
+        
+        employment_type = application_data.get("employment_type")
+        if employment_type and employment_type not in self.employment_types_allowed:
+            return False
+        
+        requested_amount = application_data.get("requested_amount")
+        if requested_amount and (requested_amount < self.min_amount or requested_amount > self.max_amount):
+            return False
+        
+        tenure_months = application_data.get("tenure_months")
+        if tenure_months and (tenure_months < self.min_tenure_months or tenure_months > self.max_tenure_months):
+            return False
+        
+        if bureau_data:
+            if bureau_data.get("active_loans", 0) > self.max_active_loans:
+                return False
+            if bureau_data.get("dpd_30_days", 0) > self.max_dpd_30_days:
+                return False
+            if bureau_data.get("bureau_flags"):
+                return False
+        
+        return True
     
-    def validate_application(
+    def violations(
         self,
-        loan_type: str,
         application_data: Dict[str, Any],
         credit_score: int = None,
         bureau_data: Dict[str, Any] = None
-    ) -> Tuple[bool, List[str]]:
-        """
-        Validate loan application against policy rules
-        Returns: (is_valid: bool, violations: List[str])
-        """
-        policy = self.get_policy(loan_type)
+    ) -> List[str]:
+        """Every failing rule with its human-readable message"""
         violations = []
         
-        # Eligibility rules validation
-        eligibility = policy.get("eligibility_rules", {})
-        
         # Age validation
         age = application_data.get("age")
         if age:
-            if age < eligibility.get("min_age", 0):
-                violations.append(f"Age {age} is below minimum required age {eligibility['min_age']}")
-            if age > eligibility.get("max_age", 999):
-                violations.append(f"Age {age} exceeds maximum allowed age {eligibility['max_age']}")
+            if age < self.min_age:
+                violations.append(f"Age {age} is below minimum required age {self.min_age}")
+            if age > self.max_age:
+                violations.append(f"Age {age} exceeds maximum allowed age {self.max_age}")
         
         # Credit score validation
         if credit_score is not None:
-            min_score = eligibility.get("min_credit_score", 0)
-            if credit_score < min_score:
-                violations.append(f"Credit score {credit_score} is below minimum required {min_score}")
+            if credit_score < self.min_credit_score:
+                violations.append(f"Credit score {credit_score} is below minimum required {self.min_credit_score}")
         
         # Income validation
         income = application_data.get("income")
         if income:
-            min_income = eligibility.get("min_income", 0)
-            if income < min_income:
-                violations.append(f"Monthly income ₹{income} is below minimum required ₹{min_income}")
+            if income < self.min_income:
+                violations.append(f"Monthly income ₹{income} is below minimum required ₹{self.min_income}")
         
         # Employment type validation
         employment_type = application_data.get("employment_type")
         if employment_type:
-            allowed_types = eligibility.get("employment_types_allowed", [])
-            if employment_type not in allowed_types:
-                violations.append(f"Employment type '{employment_type}' not allowed. Allowed: {allowed_types}")
+            if employment_type not in self.employment_types_allowed:
+                violations.append(
+                    f"Employment type '{employment_type}' not allowed. Allowed: {self.employment_types_display}"
+                )
         
         # Loan amount validation
         requested_amount = application_data.get("requested_amount")
         if requested_amount:
-            loan_params = policy.get("loan_parameters", {})
-            min_amount = loan_params.get("min_amount", 0)
-            max_amount = loan_params.get("max_amount", float('inf'))
-            
-            if requested_amount < min_amount:
-                violations.append(f"Requested amount ₹{requested_amount} is below minimum ₹{min_amount}")
-            if requested_amount > max_amount:
-                violations.append(f"Requested amount ₹{requested_amount} exceeds maximum ₹{max_amount}")
+            if requested_amount < self.min_amount:
+                violations.append(f"Requested amount ₹{requested_amount} is below minimum ₹{self.min_amount}")
+            if requested_amount > self.max_amount:
+                violations.append(f"Requested amount ₹{requested_amount} exceeds maximum ₹{self.max_amount}")
         
         # Tenure validation
         tenure_months = application_data.get("tenure_months")
         if tenure_months:
-            loan_params = policy.get("loan_parameters", {})
-            min_tenure = loan_params.get("min_tenure_months", 0)
-            max_tenure = loan_params.get("max_tenure_months", 999)
-            
-            if tenure_months < min_tenure:
-                violations.append(f"Tenure {tenure_months} months is below minimum {min_tenure} months")
-            if tenure_months > max_tenure:
-                violations.append(f"Tenure {tenure_months} months exceeds maximum {max_tenure} months")
+            if tenure_months < self.min_tenure_months:
+                violations.append(f"Tenure {tenure_months} months is below minimum {self.min_tenure_months} months")
+            if tenure_months > self.max_tenure_months:
+                violations.append(f"Tenure {tenure_months} months exceeds maximum {self.max_tenure_months} months")
         
         # Bureau criteria validation
         if bureau_data:
-            bureau_criteria = policy.get("bureau_criteria", {})
-            
             active_loans = bureau_data.get("active_loans", 0)
-            max_active = bureau_criteria.get("max_active_loans", 999)
-            if active_loans > max_active:
-                violations.append(f"Active loans {active_loans} exceeds maximum allowed {max_active}")
+            if active_loans > self.max_active_loans:
+                violations.append(f"Active loans {active_loans} exceeds maximum allowed {self.max_active_loans}")
             
             dpd_30 = bureau_data.get("dpd_30_days", 0)
-            max_dpd = bureau_criteria.get("max_dpd_30_days", 999)
-            if dpd_30 > max_dpd:
-                violations.append(f"Days past due {dpd_30} exceeds maximum allowed {max_dpd}")
+            if dpd_30 > self.max_dpd_30_days:
+                violations.append(f"Days past due {dpd_30} exceeds maximum allowed {self.max_dpd_30_days}")
             
             bureau_flags = bureau_data.get("bureau_flags", [])
             if bureau_flags:
                 violations.append(f"Bureau warning flags present: {', '.join(bureau_flags)}")
         
+        return violations
+    
+    def screen_cohort(
+        self,
+        ages: Optional[Sequence[float]] = None,
+        credit_scores: Optional[Sequence[float]] = None,
+        incomes: Optional[Sequence[float]] = None,
+        employment_types: Optional[Sequence[str]] = None,
+        requested_amounts: Optional[Sequence[float]] = None,
+        tenures_months: Optional[Sequence[float]] = None,
+        active_loans: Optional[Sequence[int]] = None,
+        dpd_30_days: Optional[Sequence[int]] = None,
+        bureau_flag_counts: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """
+        Vectorized is_eligible over column arrays (one element per applicant)
+        Omitted columns are not checked; zero / empty values skip their rule,
+        matching the per-applicant path. Bureau columns are checked when given.
+        """
+        columns = [column for column in (
+            ages, credit_scores, incomes, employment_types, requested_amounts,
+            tenures_months, active_loans, dpd_30_days, bureau_flag_counts
+        ) if column is not None]
+        if not columns:
+            raise ValueError("screen_cohort needs at least one column")
+        
+        eligible = np.ones(len(columns[0]), dtype=bool)
+        
+        def within(values, low, high):
+            values = np.asarray(values, dtype=float)
+            return (values == 0) | ((values >= low) & (values <= high)) | np.isnan(values)
+        
+        if ages is not None:
+            eligible &= within(ages, self.min_age, self.max_age)
+        if credit_scores is not None:
+            eligible &= ~(np.asarray(credit_scores, dtype=float) < self.min_credit_score)
+        if incomes is not None:
+            eligible &= within(incomes, self.min_income, float('inf'))
+        if employment_types is not None:
+            types = np.asarray(employment_types, dtype=str)
+            eligible &= (types == "") | np.isin(types, list(self.employment_types_allowed))
+        if requested_amounts is not None:
+            eligible &= within(requested_amounts, self.min_amount, self.max_amount)
+        if tenures_months is not None:
+            eligible &= within(tenures_months, self.min_tenure_months, self.max_tenure_months)
+        if active_loans is not None:
+            eligible &= np.asarray(active_loans) <= self.max_active_loans
+        if dpd_30_days is not None:
+            eligible &= np.asarray(dpd_30_days) <= self.max_dpd_30_days
+        if bureau_flag_counts is not None:
+            eligible &= np.asarray(bureau_flag_counts) == 0
+        
+        return eligible
+
+
+class PolicySnapshot:
+    """
+    One immutable generation of loaded policies
+    The engine swaps the whole snapshot on reload, so readers never see a mix
+    """
+    
+    __slots__ = ("generation", "loaded_at", "policies", "compiled")
+    
+    def __init__(self, generation: int, policies: Dict[str, Dict], compiled: Dict[str, CompiledPolicy]):
+        self.generation = generation
+        self.loaded_at = datetime.now().isoformat()
+        self.policies = policies
+        self.compiled = compiled
+
+
+# Snapshot pinned for the current request / workflow run (see PolicyEngine.pinned)
+_pinned_snapshot: ContextVar[Optional[PolicySnapshot]] = ContextVar("pinned_policy_snapshot", default=None)
+
+
+class PolicyEngine:
+    """
+    Policy engine for rule-based loan validation
+    Loads JSON policy files and validates applications
+    - Polls the policies directory (mtime) and hot-swaps a new snapshot on change
+    - Keeps the last POLICY_VERSION_HISTORY versions per loan type for re-evaluation
+    """
+    
+    def __init__(self):
+        self._snapshot: Optional[PolicySnapshot] = None
+        self._history: Dict[str, "OrderedDict[str, CompiledPolicy]"] = {}
+        self._directory_signature = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.load_all_policies()
+    
+    @property
+    def policies(self) -> Dict[str, Dict]:
+        return self._active().policies
+    
+    @property
+    def compiled(self) -> Dict[str, CompiledPolicy]:
+        return self._active().compiled
+    
+    @staticmethod
+    def _scan_directory():
+        """(filename, mtime, size) for every policy file - changes when any file does"""
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in os.scandir(POLICIES_DIR)
+            if entry.name.endswith(".json")
+        ))
+    
+    def load_all_policies(self):
+        """Load all policy files from policies directory and swap them in atomically"""
+        try:
+            signature = self._scan_directory()
+            policies: Dict[str, Dict] = {}
+            compiled: Dict[str, CompiledPolicy] = {}
+            
+            for filename, _, _ in signature:
+                loan_type = filename.replace(".json", "")
+                policy_path = os.path.join(POLICIES_DIR, filename)
+                
+                with open(policy_path, 'r') as f:
+                    policy = json.load(f)
+                    policies[loan_type] = policy
+                    compiled[loan_type] = CompiledPolicy(loan_type, policy)
+                    logger.info(f"Loaded policy: {loan_type} (version {policy.get('version')})")
+        except Exception as e:
+            logger.error(f"Error loading policies: {e}")
+            raise
+        
+        for rules in compiled.values():
+            self._remember_version(rules)
+        
+        generation = self._snapshot.generation + 1 if self._snapshot else 1
+        self._snapshot = PolicySnapshot(generation, policies, compiled)
+        self._directory_signature = signature
+    
+    def _remember_version(self, rules: CompiledPolicy):
+        versions = self._history.setdefault(rules.loan_type, OrderedDict())
+        previous = versions.get(rules.version)
+        if previous is not None and previous.policy != rules.policy:
+            logger.warning(f"Policy {rules.loan_type} changed without a version bump ({rules.version})")
+        versions[rules.version] = rules
+        versions.move_to_end(rules.version)
+        while len(versions) > settings.POLICY_VERSION_HISTORY:
+            versions.popitem(last=False)
+    
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload policies if the directory changed since the last load
+        Checks at most once per POLICY_RELOAD_INTERVAL_SECONDS unless forced
+        A broken policy file keeps the current snapshot in service
+        Returns True when a new snapshot was swapped in
+        """
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        
+        with self._reload_lock:
+            if not force and now < self._next_check:
+                return False
+            self._next_check = now + settings.POLICY_RELOAD_INTERVAL_SECONDS
+            
+            try:
+                signature = self._scan_directory()
+            except OSError as e:
+                logger.error(f"Cannot scan policies directory, keeping generation {self._snapshot.generation}: {e}")
+                return False
+            if not force and signature == self._directory_signature:
+                return False
+            
+            previous = self._snapshot.compiled
+            try:
+                self.load_all_policies()
+            except Exception as e:
+                # Do not retry the same broken files every interval; the next edit changes the signature
+                self._directory_signature = signature
+                logger.error(f"Policy reload failed, keeping generation {self._snapshot.generation}: {e}")
+                return False
+            
+            changes = {
+                loan_type: f"{previous[loan_type].version if loan_type in previous else None} -> {rules.version}"
+                for loan_type, rules in self._snapshot.compiled.items()
+            }
+            logger.info(f"Policies reloaded (generation {self._snapshot.generation}): {changes}")
+            return True
+    
+    def _active(self) -> PolicySnapshot:
+        pinned = _pinned_snapshot.get()
+        if pinned is not None:
+            return pinned
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        return self._snapshot
+    
+    @contextmanager
+    def pinned(self):
+        """
+        Pin the current policy snapshot for the duration of a request
+        Reloads during the block are not visible to it; nested pins keep the outer snapshot
+        """
+        token = _pinned_snapshot.set(self._active())
+        try:
+            yield _pinned_snapshot.get()
+        finally:
+            _pinned_snapshot.reset(token)
+    
+    def current_versions(self) -> Dict[str, Any]:
+        """Active policy version per loan type"""
+        return {loan_type: rules.version for loan_type, rules in self._active().compiled.items()}
+    
+    def available_versions(self, loan_type: str) -> List[str]:
+        """Versions retained in memory for a loan type, oldest first"""
+        return list(self._history.get(loan_type, {}))
+    
+    def get_policy(self, loan_type: str) -> Dict[str, Any]:
+        """Get policy for a specific loan type"""
+        policy = self.policies.get(loan_type)
+        if not policy:
+            raise ValueError(f"Policy not found for loan type: {loan_type}")
+        return policy
+    
+    def get_compiled_policy(self, loan_type: str, version: str = None) -> CompiledPolicy:
+        """
+        Get the compiled rule object for a specific loan type
+        version selects a retained earlier version instead of the active one
+        """
+        if version is not None:
+            compiled = self._history.get(loan_type, {}).get(version)
+            if not compiled:
+                raise ValueError(f"Policy version {version} not retained for loan type: {loan_type}")
+            return compiled
+        
+        compiled = self.compiled.get(loan_type)
+        if not compiled:
+            raise ValueError(f"Policy not found for loan type: {loan_type}")
+        return compiled
+    
+    def validate_application(
+        self,
+        loan_type: str,
+        application_data: Dict[str, Any],
+        credit_score: int = None,
+        bureau_data: Dict[str, Any] = None,
+        policy_version: str = None
+    ) -> Tuple[bool, List[str]]:
+        """
+        Validate loan application against policy rules
+        policy_version re-evaluates against a retained earlier version (e.g. from an audit record)
+        Returns: (is_valid: bool, violations: List[str])
+        """
+        violations = self.get_compiled_policy(loan_type, policy_version).violations(
+            application_data, credit_score=credit_score, bureau_data=bureau_data
+        )
+        
         is_valid = len(violations) == 0
         return is_valid, violations
     
+    def is_eligible(
+        self,
+        loan_type: str,
+        application_data: Dict[str, Any],
+        credit_score: int = None,
+        bureau_data: Dict[str, Any] = None,
+        policy_version: str = None
+    ) -> bool:
+        """
+        Pass/fail policy screen - same rules as validate_application,
+        stops at the first failure and builds no violation messages
+        """
+        return self.get_compiled_policy(loan_type, policy_version).is_eligible(
+            application_data, credit_score=credit_score, bureau_data=bureau_data
+        )
+    
+    def screen_cohort(self, loan_type: str, **columns) -> np.ndarray:
+        """Vectorized is_eligible over column arrays (see CompiledPolicy.screen_cohort)"""
+        return self.get_compiled_policy(loan_type).screen_cohort(**columns)
+    
     def get_interest_rate(
         self,
         loan_type: str,
@@ -181,8 +487,8 @@ class PolicyEngine:
         """
         Calculate maximum eligible loan amount based on FOIR
         """
-        policy = self.get_policy(loan_type)
-        foir_limit = policy.get("loan_parameters", {}).get("foir_limit", 0.5)
+        compiled = self.get_compiled_policy(loan_type)
+        foir_limit = compiled.foir_limit
         
         # Maximum EMI based on FOIR
         max_emi = (income * foir_limit) - existing_emi
@@ -191,16 +497,10 @@ class PolicyEngine:
             return 0.0
         
         # Calculate principal using EMI formula: P = EMI * [(1 - (1 + r)^-n) / r]
-        monthly_rate = interest_rate / (12 * 100)
-        if monthly_rate == 0:
-            principal = max_emi * tenure_months
-        else:
-            principal = max_emi * ((1 - (1 + monthly_rate) ** -tenure_months) / monthly_rate)
+        principal = annuity.calculate_max_principal(max_emi, interest_rate, tenure_months)
         
         # Cap at policy maximum
-        max_amount = policy.get("loan_parameters", {}).get("max_amount", float('inf'))
-        
-        return min(round(principal, 2), max_amount)
+        return min(principal, compiled.max_amount)
     
     def get_processing_fee(self, loan_type: str, loan_amount: float) -> float:
         """Calculate processing fee based on policy"""
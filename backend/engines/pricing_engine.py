@@ -5,6 +5,7 @@ Pricing Engine - Interest rate determination and fee calculation
 import logging
 from typing import Dict, Any
 
+from engines import annuity
 from engines.policy_engine import policy_engine
 
 logger = logging.getLogger(__name__)
@@ -57,10 +58,7 @@ class PricingEngine:
         Calculate total interest payable over loan tenure
         Total Interest = (EMI × Tenure) - Principal
         """
-        total_repayment = monthly_emi * tenure_months
-        total_interest = total_repayment - principal
-        
-        return round(total_interest, 2)
+        return annuity.calculate_total_interest(principal, monthly_emi, tenure_months)
     
     @staticmethod
     def calculate_processing_fee(
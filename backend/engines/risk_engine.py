@@ -3,11 +3,26 @@ Risk Engine - Weighted risk scoring and segmentation
 """
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+def _round4(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's round(value, 4)
+    Elements within float noise of a rounding tie fall back to the scalar round()
+    """
+    scaled = values * 10000.0
+    rounded = np.rint(scaled) / 10000.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-5
+    for index in np.flatnonzero(near_tie):
+        rounded[index] = round(float(values[index]), 4)
+    return rounded
+
+
 class RiskEngine:
     """
     Risk assessment engine using weighted factor model
@@ -32,6 +47,31 @@ class RiskEngine:
         "bureau_flags": 0.05
     }
     
+    EMPLOYMENT_BASE_RISK = {
+        "salaried": 0.2,
+        "self_employed": 0.5,
+        "business": 0.6,
+        "other": 0.8
+    }
+    
+    CITY_TIER_RISK = {
+        1: 0.0,
+        2: 0.5,
+        3: 1.0
+    }
+    
+    BUREAU_FLAG_WEIGHTS = {
+        "HIGH_UTILIZATION": 0.3,
+        "RECENT_DEFAULT": 0.8,
+        "MULTIPLE_INQUIRIES": 0.4,
+        "SETTLED_ACCOUNTS": 0.6,
+        "WRITE_OFF": 1.0
+    }
+    
+    # Bit positions for cohort flag bitmasks; any unlisted flag sets OTHER_FLAG_BIT
+    BUREAU_FLAG_BITS = {flag: 1 << index for index, flag in enumerate(BUREAU_FLAG_WEIGHTS)}
+    OTHER_FLAG_BIT = 1 << len(BUREAU_FLAG_WEIGHTS)
+    
     @staticmethod
     def normalize_credit_score(credit_score: int) -> float:
         """
@@ -70,12 +110,7 @@ class RiskEngine:
         Normalize employment stability to 0-1 scale
         Salaried with high experience = low risk
         """
-        base_risk = {
-            "salaried": 0.2,
-            "self_employed": 0.5,
-            "business": 0.6,
-            "other": 0.8
-        }.get(employment_type, 0.8)
+        base_risk = RiskEngine.EMPLOYMENT_BASE_RISK.get(employment_type, 0.8)
         
         # Reduce risk with experience
         if years_experience >= 10:
@@ -96,11 +131,7 @@ class RiskEngine:
         Normalize city tier to 0-1 scale
         Tier 1 = lowest risk, Tier 3 = highest risk
         """
-        tier_risk = {
-            1: 0.0,
-            2: 0.5,
-            3: 1.0
-        }.get(city_tier, 0.5)
+        tier_risk = RiskEngine.CITY_TIER_RISK.get(city_tier, 0.5)
         
         return tier_risk
     
@@ -114,15 +145,7 @@ class RiskEngine:
             return 0.0
         
         # Each flag contributes to risk
-        flag_weights = {
-            "HIGH_UTILIZATION": 0.3,
-            "RECENT_DEFAULT": 0.8,
-            "MULTIPLE_INQUIRIES": 0.4,
-            "SETTLED_ACCOUNTS": 0.6,
-            "WRITE_OFF": 1.0
-        }
-        
-        total_risk = sum(flag_weights.get(flag, 0.5) for flag in bureau_flags)
+        total_risk = sum(RiskEngine.BUREAU_FLAG_WEIGHTS.get(flag, 0.5) for flag in bureau_flags)
         
         # Cap at 1.0
         return min(round(total_risk, 4), 1.0)
@@ -217,6 +240,119 @@ class RiskEngine:
             "recommendation": "APPROVE" if risk_score <= 0.6 else "MANUAL_REVIEW"
         }
     
+    @classmethod
+    def encode_bureau_flags(cls, bureau_flags: Optional[List[str]]) -> int:
+        """
+        Encode a bureau flag list as a cohort bitmask
+        Unlisted flags share OTHER_FLAG_BIT, so a repeated or second unknown flag
+        counts once (the scalar path would add 0.5 per occurrence)
+        """
+        mask = 0
+        for flag in bureau_flags or []:
+            mask |= cls.BUREAU_FLAG_BITS.get(flag, cls.OTHER_FLAG_BIT)
+        return mask
+    
+    @classmethod
+    def _bureau_mask_risk_table(cls) -> np.ndarray:
+        """normalize_bureau_flags result for every possible bitmask"""
+        flags = list(cls.BUREAU_FLAG_WEIGHTS) + [None]
+        table = np.empty(1 << len(flags))
+        for mask in range(len(table)):
+            table[mask] = cls.normalize_bureau_flags(
+                [flag for index, flag in enumerate(flags) if mask & (1 << index)]
+            )
+        return table
+    
+    @classmethod
+    def calculate_risk_scores_cohort(
+        cls,
+        credit_scores: Sequence[float],
+        foirs: Sequence[float],
+        employment_types: Sequence[str],
+        years_experience: Sequence[float],
+        city_tiers: Sequence[int],
+        bureau_flag_masks: Sequence[int],
+        foir_limit: float = 0.6,
+        weights: Optional[Dict[str, float]] = None,
+        include_factors: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_risk_score over column arrays (one element per applicant)
+        Returns risk_score, risk_segment and recommendation arrays with the same
+        values as the per-applicant path; include_factors adds the normalized
+        factor arrays (the per-applicant factors_breakdown payload is never built)
+        
+        weights overrides WEIGHTS for back-testing alternative models
+        """
+        weights = {**cls.WEIGHTS, **(weights or {})}
+        
+        credit_scores = np.asarray(credit_scores, dtype=float)
+        foirs = np.asarray(foirs, dtype=float)
+        years_experience = np.asarray(years_experience, dtype=float)
+        city_tiers = np.asarray(city_tiers)
+        bureau_flag_masks = np.asarray(bureau_flag_masks, dtype=np.int64)
+        
+        # Credit score: inverted linear scale between 300 and 900
+        credit_factor = np.where(
+            credit_scores >= 900, 0.0,
+            np.where(credit_scores <= 300, 1.0, _round4((900 - credit_scores) / (900 - 300)))
+        )
+        
+        # FOIR: linear up to the limit
+        foir_factor = np.where(
+            foirs <= 0, 0.0,
+            np.where(foirs >= foir_limit, 1.0, _round4(foirs / foir_limit))
+        )
+        
+        # Employment stability: per-type lookup across the four experience buckets
+        unique_types, type_index = np.unique(np.asarray(employment_types, dtype=str), return_inverse=True)
+        bucket_years = (10, 5, 2, 0)
+        stability_table = np.array([
+            [cls.normalize_employment_stability(employment_type, years) for years in bucket_years]
+            for employment_type in unique_types.tolist()
+        ]).reshape(len(unique_types), len(bucket_years))
+        bucket_index = np.select(
+            [years_experience >= 10, years_experience >= 5, years_experience >= 2],
+            [0, 1, 2],
+            default=3
+        )
+        employment_factor = stability_table[type_index.reshape(-1), bucket_index]
+        
+        # City tier: unknown tiers default to 0.5
+        city_factor = np.full(city_tiers.shape, 0.5)
+        for tier, risk in cls.CITY_TIER_RISK.items():
+            city_factor[city_tiers == tier] = risk
+        
+        # Bureau flags: precomputed risk per bitmask
+        bureau_factor = cls._bureau_mask_risk_table()[bureau_flag_masks]
+        
+        risk_score = _round4(
+            credit_factor * weights["credit_score"] +
+            foir_factor * weights["foir"] +
+            employment_factor * weights["employment_stability"] +
+            city_factor * weights["city_tier"] +
+            bureau_factor * weights["bureau_flags"]
+        )
+        
+        result = {
+            "risk_score": risk_score,
+            "risk_segment": np.where(
+                risk_score <= 0.3, "LOW", np.where(risk_score <= 0.6, "MEDIUM", "HIGH")
+            ),
+            "recommendation": np.where(risk_score <= 0.6, "APPROVE", "MANUAL_REVIEW")
+        }
+        
+        if include_factors:
+            result["factors"] = {
+                "credit_score": credit_factor,
+                "foir": foir_factor,
+                "employment_stability": employment_factor,
+                "city_tier": city_factor,
+                "bureau_flags": bureau_factor
+            }
+        
+        return result
+    
     @staticmethod
     def explain_risk_factors(risk_assessment: Dict[str, Any]) -> str:
         """
@@ -59,6 +59,26 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ MongoDB connection failed: {e}")
         raise
     
+    # Apply the index registry; in development, fail fast if a known query would COLLSCAN
+    if settings.MONGODB_ENSURE_INDEXES:
+        from database_indexes import check_query_plans, ensure_indexes
+
+        applied = await ensure_indexes(mongodb.db)
+        logger.info(f"✅ MongoDB indexes ensured: {sum(len(names) for names in applied.values())} indexes")
+
+        if settings.is_development and settings.MONGODB_QUERY_PLAN_GUARD:
+            await check_query_plans(mongodb.db)
+            logger.info("✅ Query plan guard passed")
+
+    # Admin analytics read incremental rollups; a database that never had them gets a one-off build
+    # (a full scan: build large databases first with scripts/rebuild_analytics_rollups.py)
+    from services.analytics_rollups import analytics_rollups
+
+    try:
+        await analytics_rollups.ensure_built()
+    except Exception as e:
+        logger.error(f"❌ Analytics rollup build failed (run scripts/rebuild_analytics_rollups.py): {e}")
+    
     # Connect to Redis
     try:
         await redis_client.connect()
@@ -67,6 +87,11 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Redis connection failed: {e}")
         raise
     
+    # Local JWT blacklist filter (Redis is then only asked about possibly-revoked tokens)
+    from auth.token_blacklist import token_blacklist_filter
+
+    await token_blacklist_filter.start()
+    
     # Load fixed mock registries (identity + bureau)
     try:
         from engines.kyc_engine import kyc_engine
@@ -81,6 +106,33 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Could not load strict mock registries: {str(e)}")
         raise
     
+    # Start the batched audit log writer (replays any spill left by the last run)
+    from services.audit_sink import audit_sink
+
+    await audit_sink.start()
+    logger.info(
+        f"✅ Audit sink started (batch {audit_sink.batch_size}, every {audit_sink.flush_interval}s, "
+        f"queue {audit_sink.queue_size})"
+    )
+    
+    # Keep-alive HTTP clients for Resend and the Telegram Bot API
+    from services.http_clients import http_clients
+
+    http_clients.start()
+    logger.info(f"✅ Shared HTTP clients ready: {', '.join(http_clients.stats()['clients'])} (HTTP/2 {'on' if http_clients.http2 else 'off'})")
+    
+    # Outbound email queue (OTP ahead of decision mail) over pooled SMTP connections
+    from services.email_dispatch import email_dispatcher
+
+    email_dispatcher.start()
+    logger.info(f"✅ Email dispatcher started ({email_dispatcher.stats()['workers']} workers, queue {settings.EMAIL_QUEUE_SIZE})")
+    
+    # Sanction letter PDFs render on their own process pool
+    from services.pdf_rendering import sanction_renderer
+
+    sanction_renderer.start()
+    logger.info(f"✅ Sanction letter renderer started ({sanction_renderer.workers} workers)")
+    
     logger.info("=" * 70)
     logger.info(f"🌍 Environment: {settings.ENVIRONMENT}")
     logger.info(f"🔗 Backend URL: {settings.BACKEND_URL}")
@@ -93,6 +145,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down NBFC Loan Platform Backend...")
+    # Send queued mail, finish queued letters, then drain queued audit events, while MongoDB is still connected
+    await email_dispatcher.stop()
+    await http_clients.close()
+    await sanction_renderer.stop()
+    await audit_sink.stop()
+    await token_blacklist_filter.stop()
     await mongodb.disconnect()
     await redis_client.disconnect()
     logger.info("👋 Shutdown complete")
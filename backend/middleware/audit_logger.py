@@ -9,7 +9,7 @@ import logging
 import uuid
 from typing import Dict, Any
 
-from database import mongodb
+from services.audit_sink import audit_sink
 
 logger = logging.getLogger(__name__)
 
@@ -64,10 +64,10 @@ class AuditLogger:
                 "ip_address": ip_address
             }
             
-            # Insert asynchronously (non-blocking)
-            await mongodb.audit_logs.insert_one(log_entry)
+            # Batched insert_many by the sink; waits only while its queue is full
+            await audit_sink.submit(log_entry)
             
-            logger.info(f"Audit log created: {action} for user {user_id}")
+            logger.info(f"Audit log queued: {action} for user {user_id}")
             
         except Exception as e:
             # Never let audit logging crash the main flow
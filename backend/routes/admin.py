@@ -3,38 +3,91 @@ Admin Routes
 Analytics, monitoring, and administrative functions
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
+import io
 import logging
+import os
 
+from auth import user_cache
+from auth.token_blacklist import token_blacklist_filter
 from auth.dependencies import get_current_user, require_role
 from models.user import User
 from database import mongodb
+from engines import annuity
+from engines.policy_engine import policy_engine
+from services import batch_underwriting, risk_rescoring
+from services.analytics_rollups import analytics_rollups
+from services.audit_sink import audit_sink
+from services.bureau_cache import bureau_cache
+from services.email_dispatch import email_dispatcher
+from services.http_clients import http_clients
+from services.pdf_rendering import sanction_renderer
+from services.keyset_pagination import (
+    EXPORT_FORMATS,
+    fetch_page,
+    iter_documents,
+    keyset_query,
+    stream_export,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+MAX_PAGE_SIZE = 1000
+
+AUDIT_LOG_EXPORT_FIELDS = (
+    "log_id", "timestamp", "action", "user_id", "application_id", "loan_id",
+    "decision", "risk_score", "policy_version", "ip_address", "metadata",
+)
+
+
+def _audit_log_query(
+    user_id: Optional[str],
+    application_id: Optional[str],
+    action: Optional[str],
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if user_id:
+        query["user_id"] = user_id
+    if application_id:
+        query["application_id"] = application_id
+    if action:
+        query["action"] = action
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    return query
+
 
 @router.get("/applications")
 async def list_all_applications(
     status_filter: Optional[str] = None,
     loan_type: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_role("admin"))
 ):
     """
-    List all loan applications (admin only)
+    List all loan applications (admin only), newest first
     
     Args:
         status_filter: Filter by status
         loan_type: Filter by loan type
-        limit: Maximum results
+        limit: Page size
+        cursor: next_cursor from the previous page
         current_user: Admin user
     
     Returns:
-        List of all applications with filters
+        One page of applications and the cursor for the next (null on the last page)
     """
     try:
         query = {}
@@ -43,8 +96,9 @@ async def list_all_applications(
         if loan_type:
             query["loan_type"] = loan_type
         
-        cursor = mongodb.loan_applications.find(query).sort("created_at", -1).limit(limit)
-        applications = await cursor.to_list(length=limit)
+        applications, next_cursor = await fetch_page(
+            mongodb.loan_applications, query, "created_at", "application_id", limit, cursor
+        )
         
         for app in applications:
             app.pop("_id", None)
@@ -57,9 +111,12 @@ async def list_all_applications(
         
         return {
             "total": len(applications),
-            "applications": applications
+            "applications": applications,
+            "next_cursor": next_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing applications: {str(e)}")
         raise HTTPException(
@@ -79,49 +136,13 @@ async def get_analytics_overview(
         Key metrics and statistics
     """
     try:
-        # Total applications
-        total_apps = await mongodb.loan_applications.count_documents({})
-        
-        # Applications by status
-        pipeline = [
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        status_counts = await mongodb.loan_applications.aggregate(pipeline).to_list(None)
-        status_distribution = {item["_id"]: item["count"] for item in status_counts}
-        
-        # Total loans disbursed
-        total_loans = await mongodb.loans.count_documents({"status": "ACTIVE"})
-        
-        # Total disbursed amount
-        pipeline = [
-            {"$match": {"status": "ACTIVE"}},
-            {"$group": {"_id": None, "total": {"$sum": "$disbursement_amount"}}}
-        ]
-        result = await mongodb.loans.aggregate(pipeline).to_list(None)
-        total_disbursed = result[0]["total"] if result else 0
-        
-        # Applications in last 7 days
-        week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        recent_apps = await mongodb.loan_applications.count_documents({
-            "created_at": {"$gte": week_ago}
-        })
-        
-        # Approval rate
-        approved = status_distribution.get("APPROVED", 0)
-        rejected = status_distribution.get("REJECTED", 0)
-        declined = status_distribution.get("DECLINED", 0)
-        total_decided = approved + rejected + declined
-        approval_rate = (approved / total_decided * 100) if total_decided > 0 else 0
+        # Served from the rollup counters; no collection scans per refresh
+        overview = await analytics_rollups.overview()
         
         logger.info(f"Admin {current_user.user_id} accessed analytics overview")
         
         return {
-            "total_applications": total_apps,
-            "status_distribution": status_distribution,
-            "total_active_loans": total_loans,
-            "total_disbursed_amount": total_disbursed,
-            "recent_applications_7d": recent_apps,
-            "approval_rate": round(approval_rate, 2),
+            **overview,
             "generated_at": datetime.now().isoformat()
         }
         
@@ -135,33 +156,36 @@ async def get_analytics_overview(
 
 @router.get("/analytics/risk-distribution")
 async def get_risk_distribution(
+    rescore: bool = False,
     current_user: User = Depends(require_role("admin"))
 ):
     """
     Get distribution of applications by risk segment
     
+    Args:
+        rescore: Re-score every assessed application with the current risk model
+                 (vectorized) instead of aggregating the stored assessments
+        current_user: Admin user
+    
     Returns:
         Risk segment statistics
     """
     try:
-        pipeline = [
-            {"$match": {"risk_assessment": {"$exists": True}}},
-            {"$group": {
-                "_id": "$risk_assessment.risk_segment",
-                "count": {"$sum": 1},
-                "avg_risk_score": {"$avg": "$risk_assessment.risk_score"}
-            }}
-        ]
-        
-        result = await mongodb.loan_applications.aggregate(pipeline).to_list(None)
-        
-        risk_distribution = {
-            item["_id"]: {
-                "count": item["count"],
-                "avg_risk_score": round(item["avg_risk_score"], 3)
+        if rescore:
+            cursor = mongodb.loan_applications.find(
+                risk_rescoring.RISK_INPUT_QUERY, risk_rescoring.RISK_INPUT_PROJECTION
+            )
+            applications = await cursor.to_list(None)
+            result = risk_rescoring.rescore_applications(applications)
+            
+            logger.info(f"Admin {current_user.user_id} re-scored {result['total']} applications")
+            
+            return {
+                **result,
+                "generated_at": datetime.now().isoformat()
             }
-            for item in result
-        }
+        
+        risk_distribution = await analytics_rollups.risk_distribution()
         
         logger.info(f"Admin {current_user.user_id} accessed risk distribution analytics")
         
@@ -189,26 +213,7 @@ async def get_loan_type_analytics(
         Loan type statistics
     """
     try:
-        pipeline = [
-            {"$group": {
-                "_id": "$loan_type",
-                "total_applications": {"$sum": 1},
-                "approved": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "APPROVED"]}, 1, 0]}
-                }
-            }}
-        ]
-        
-        result = await mongodb.loan_applications.aggregate(pipeline).to_list(None)
-        
-        loan_type_stats = {
-            item["_id"]: {
-                "total_applications": item["total_applications"],
-                "approved": item["approved"],
-                "approval_rate": round(item["approved"] / item["total_applications"] * 100, 2)
-            }
-            for item in result
-        }
+        loan_type_stats = await analytics_rollups.loan_type_stats()
         
         logger.info(f"Admin {current_user.user_id} accessed loan type analytics")
         
@@ -230,33 +235,30 @@ async def get_audit_logs(
     user_id: Optional[str] = None,
     application_id: Optional[str] = None,
     action: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_role("admin"))
 ):
     """
-    Fetch audit logs with filters
+    Fetch audit logs with filters, newest first, paged by (timestamp, log_id)
     
     Args:
         user_id: Filter by user ID
         application_id: Filter by application ID
         action: Filter by action type
-        limit: Maximum results
+        limit: Page size
+        cursor: next_cursor from the previous page
         current_user: Admin user
     
     Returns:
-        Filtered audit logs
+        One page of audit logs and the cursor for the next (null on the last page)
     """
     try:
-        query = {}
-        if user_id:
-            query["user_id"] = user_id
-        if application_id:
-            query["application_id"] = application_id
-        if action:
-            query["action"] = action
+        query = _audit_log_query(user_id, application_id, action)
         
-        cursor = mongodb.audit_logs.find(query).sort("timestamp", -1).limit(limit)
-        logs = await cursor.to_list(length=limit)
+        logs, next_cursor = await fetch_page(
+            mongodb.audit_logs, query, "timestamp", "log_id", limit, cursor
+        )
         
         for log in logs:
             log.pop("_id", None)
@@ -265,9 +267,12 @@ async def get_audit_logs(
         
         return {
             "total": len(logs),
-            "logs": logs
+            "logs": logs,
+            "next_cursor": next_cursor
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching audit logs: {str(e)}")
         raise HTTPException(
@@ -276,6 +281,56 @@ async def get_audit_logs(
         )
 
 
+@router.get("/audit-logs/export")
+async def export_audit_logs(
+    user_id: Optional[str] = None,
+    application_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    output_format: str = Query("ndjson", alias="format"),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Stream every matching audit log as NDJSON or CSV (compliance exports)
+    
+    Args:
+        user_id / application_id / action: Filters, as for /audit-logs
+        since / until: ISO timestamp range [since, until)
+        cursor: Resume after a row (e.g. an interrupted export's last page cursor)
+        output_format: ndjson or csv
+        current_user: Admin user
+    
+    Returns:
+        Streamed rows, newest first; the Motor cursor is read in batches and
+        never materialized
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format '{output_format}'. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    try:
+        query = keyset_query(
+            _audit_log_query(user_id, application_id, action, since, until), "timestamp", "log_id", cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"Admin {current_user.user_id} started an audit log export ({output_format})")
+    
+    documents = iter_documents(mongodb.audit_logs, query, "timestamp", "log_id", projection={"_id": 0})
+    media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    extension = "csv" if output_format == "csv" else "ndjson"
+    
+    return StreamingResponse(
+        stream_export(documents, output_format, AUDIT_LOG_EXPORT_FIELDS),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="audit_logs.{extension}"'}
+    )
+
+
 @router.get("/users/{user_id}/applications")
 async def get_user_applications(
     user_id: str,
@@ -318,6 +373,51 @@ async def get_user_applications(
         )
 
 
+@router.post("/underwriting/batch")
+async def batch_underwrite(
+    file: UploadFile = File(...),
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None,
+    workers: Optional[int] = Query(None, ge=1, le=os.cpu_count() or 1),
+    current_user: User = Depends(require_role("admin"))
+):
+    """
+    Bulk pre-approved offer generation (admin only)
+    Runs the deterministic engines without the LLM on a process pool
+    
+    Args:
+        file: Applicant records as JSONL or CSV
+        input_format: jsonl/csv (defaults to the upload file extension)
+        output_format: jsonl/csv (defaults to jsonl)
+        workers: Process pool size (1 to the CPU count)
+        current_user: Admin user
+    
+    Returns:
+        Streamed decisions, one per applicant, in input order
+    """
+    try:
+        input_format = batch_underwriting.detect_format(file.filename, input_format)
+        output_format = batch_underwriting.detect_format(None, output_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"Admin {current_user.user_id} started batch underwriting for {file.filename}")
+    
+    # Upload is spooled to disk by Starlette; read it line by line in the response threadpool
+    source = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    decisions = batch_underwriting.run_batch(
+        batch_underwriting.iter_applicant_records(source, input_format),
+        workers=workers
+    )
+    media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    
+    return StreamingResponse(
+        batch_underwriting.format_decisions(decisions, output_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="offers.{output_format}"'}
+    )
+
+
 @router.get("/health-check")
 async def admin_health_check(
     current_user: User = Depends(require_role("admin"))
@@ -353,6 +453,15 @@ async def admin_health_check(
             "mongodb": "connected" if mongo_ok else "disconnected",
             "redis": "connected" if redis_ok else "disconnected",
             "collections": collections,
+            "annuity_cache": annuity.cache_stats(),
+            "audit_sink": audit_sink.stats(),
+            "auth_cache": user_cache.cache_stats(),
+            "bureau_cache": bureau_cache.stats(),
+            "email_dispatch": email_dispatcher.stats(),
+            "http_clients": http_clients.stats(),
+            "jwt_blacklist_filter": token_blacklist_filter.stats(),
+            "policy_versions": policy_engine.current_versions(),
+            "sanction_renderer": sanction_renderer.stats(),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -2,8 +2,9 @@
 Authentication routes for OTP-based login
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header
 from datetime import datetime
+from typing import Optional
 import logging
 
 from models.user import (
@@ -12,6 +13,7 @@ from models.user import (
 from auth.otp_service import otp_service
 from auth.jwt_service import jwt_service
 from auth.dependencies import get_current_user
+from auth.user_cache import invalidate_token, invalidate_user
 from database import mongodb
 
 logger = logging.getLogger(__name__)
@@ -83,6 +85,7 @@ async def verify_otp(request: OTPVerify):
                     }
                 }
             )
+            invalidate_user(user_id)
             logger.info(f"User {user_id} logged in successfully")
         else:
             # Create new user (auto-registration)
@@ -132,7 +135,7 @@ async def verify_otp(request: OTPVerify):
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
-    authorization: str = Depends(lambda: None),
+    authorization: Optional[str] = Header(None),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
@@ -143,6 +146,7 @@ async def logout(
         if authorization:
             token = jwt_service.extract_token_from_header(authorization)
             if token:
+                invalidate_token(token)
                 await jwt_service.blacklist_token(token)
         
         logger.info(f"User {current_user.user_id} logged out")
@@ -3,9 +3,12 @@ Loan Application Routes
 Integrates LangGraph workflow with HTTP endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Callable, List, Dict, Any
 from datetime import datetime
+import asyncio
+import json
 import logging
 import uuid
 
@@ -14,15 +17,25 @@ from models.user import User
 from models.loan_application import LoanApplication, ApplicationData, ConversationMessage, ChatMessage
 from models.loan import Loan
 from engines.kyc_engine import kyc_engine
+from engines.emi_engine import emi_engine
 from database import mongodb, redis_client
+from services.analytics_rollups import analytics_rollups, rollup_snapshot
+from services.application_store import (
+    APPEND_ONLY_MESSAGE_WINDOW,
+    DEFAULT_MESSAGE_PAGE_SIZE,
+    MAX_MESSAGE_PAGE_SIZE,
+    application_store,
+)
 from services.email_service import email_service
 from workflows.loan_graph import (
     LoanWorkflowState,
     REQUIRED_APPLICATION_FIELDS,
-    generate_follow_up_response,
+    agenerate_follow_up_response,
+    arun_workflow_stepwise,
+    astream_follow_up_response,
     handle_acceptance_node,
-    run_workflow_stepwise,
 )
+from workflows.state_tracking import StateChangeTracker
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +58,12 @@ STEP_CONFIRMATION_STAGES = {
     "simulate_disbursement",
 }
 
+# emit(event, data) callback used by the streaming chat endpoint
+ChatEventEmitter = Callable[[str, Dict[str, Any]], None]
+
+# Streaming chat turns keep running after the client disconnects; hold references until done
+_chat_turn_tasks: set = set()
+
 
 async def _send_loan_report_email(
     to_email: str,
@@ -80,6 +99,7 @@ async def _send_loan_report_email(
         subject=subject,
         body_text=body,
         attachments=attachments,
+        wait=False,
     )
 
 
@@ -112,6 +132,7 @@ async def _send_loan_decision_email(
         to_email=to_email,
         subject=subject,
         body_text=body,
+        wait=False,
     )
 
 
@@ -356,7 +377,7 @@ async def start_loan_application(
         
         # Run first two nodes (init + collect_info greeting)
         # Use recursion_limit to prevent infinite loops
-        result_state = run_workflow_stepwise(initial_state)
+        result_state = await arun_workflow_stepwise(initial_state)
         
         # Save application to database
         application_doc = {
@@ -377,6 +398,7 @@ async def start_loan_application(
         }
         
         await mongodb.loan_applications.insert_one(application_doc)
+        await analytics_rollups.record_application_change(None, application_doc)
         
         logger.info(f"Loan application {application_id} created for user {current_user.user_id}")
         
@@ -397,468 +419,582 @@ async def start_loan_application(
         )
 
 
-@router.post("/applications/{application_id}/chat")
-async def chat_with_workflow(
+async def _load_user_application(
+    application_id: str,
+    current_user: User,
+    message_window: int | None = None
+) -> Dict[str, Any]:
+    app_doc = await application_store.get_for_user(
+        application_id,
+        current_user.user_id,
+        projection="chat_turn",
+        message_window=message_window
+    )
+
+    if not app_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Application not found"
+        )
+
+    return app_doc
+
+
+async def _follow_up_reply(state: LoanWorkflowState, message: str, emit: ChatEventEmitter | None) -> str:
+    """Follow-up answer; when streaming, token deltas are emitted as they arrive"""
+    if emit is None:
+        return await agenerate_follow_up_response(state, message)
+
+    parts = []
+    async for delta in astream_follow_up_response(state, message):
+        parts.append(delta)
+        emit("token", {"delta": delta})
+    return "".join(parts)
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _workflow_state_from_document(application_id: str, user_id: str, app_doc: Dict[str, Any]) -> LoanWorkflowState:
+    """Rebuild LoanWorkflowState from a loan_applications document (shares its nested objects)"""
+    return {
+        "application_id": application_id,
+        "user_id": user_id,
+        "loan_type": app_doc["loan_type"],
+        "stage": app_doc["workflow_stage"],
+        "application_data": app_doc.get("application_data", {}),
+        "kyc_data": app_doc.get("kyc_data"),
+        "credit_data": app_doc.get("credit_data"),
+        "policy_validation": app_doc.get("policy_validation"),
+        "affordability_result": app_doc.get("affordability_result"),
+        "risk_assessment": app_doc.get("risk_assessment"),
+        "loan_offer": app_doc.get("loan_offer"),
+        "emi_schedule": app_doc.get("emi_schedule"),
+        "loan_id": app_doc.get("loan_id"),
+        "sanction_letter_path": app_doc.get("sanction_letter_path"),
+        "messages": app_doc["conversation_messages"],
+        "is_eligible": app_doc["is_eligible"],
+        "is_accepted": app_doc["is_accepted"],
+        "rejection_reason": app_doc.get("rejection_reason"),
+        "created_at": app_doc["created_at"],
+        "updated_at": datetime.now().isoformat()
+    }
+
+
+def _workflow_update_doc(result_state: LoanWorkflowState) -> Dict[str, Any]:
+    """loan_applications fields persisted from the workflow state after a turn"""
+    return {
+        "workflow_stage": result_state["stage"],
+        "application_data": result_state["application_data"],
+        "kyc_data": result_state.get("kyc_data"),
+        "credit_data": result_state.get("credit_data"),
+        "policy_validation": result_state.get("policy_validation"),
+        "affordability_result": result_state.get("affordability_result"),
+        "risk_assessment": result_state.get("risk_assessment"),
+        "loan_offer": result_state.get("loan_offer"),
+        "emi_schedule": result_state.get("emi_schedule"),
+        "loan_id": result_state.get("loan_id"),
+        "sanction_letter_path": result_state.get("sanction_letter_path"),
+        "conversation_messages": result_state["messages"],
+        "is_eligible": result_state["is_eligible"],
+        "is_accepted": result_state["is_accepted"],
+        "rejection_reason": result_state.get("rejection_reason"),
+        "updated_at": result_state["updated_at"]
+    }
+
+
+async def _process_chat_turn(
     application_id: str,
+    app_doc: Dict[str, Any],
     chat_message: ChatMessage,
-    current_user: User = Depends(get_current_user)
-):
+    current_user: User,
+    emit: ChatEventEmitter | None = None
+) -> Dict[str, Any]:
     """
-    Send a message to the loan workflow and get response
-    This is the main interaction endpoint for the conversational interface
+    Run one chat turn: workflow step, Mongo write, loan creation and emails
+    With emit set, progress is reported as events and "result" goes out before email dispatch
+    """
+    message = chat_message.message
+    incoming_channel = (chat_message.metadata or {}).get("channel")
+    # Taken before the state starts mutating the document's nested objects
+    changes = StateChangeTracker(app_doc)
+    rollup_before = rollup_snapshot(app_doc)
+
+    # Reconstruct workflow state
+    state = _workflow_state_from_document(application_id, current_user.user_id, app_doc)
+
+    state["application_data"].setdefault("application_id", application_id)
+    state["application_data"].setdefault("email", app_doc.get("owner_email") or current_user.email)
+    previous_message_count = len(state["messages"])
+
+    if emit:
+        emit("stage", {"stage": state["stage"], "status": app_doc.get("status")})
     
-    Args:
-        application_id: Application ID
-        chat_message: User's message and metadata
-        current_user: Authenticated user
+    # Add user message to state
+    state["messages"].append({
+        "role": "user",
+        "content": message,
+        "timestamp": datetime.now().isoformat(),
+        "metadata": chat_message.metadata or {}
+    })
     
-    Returns:
-        Updated conversation and workflow state
-    """
-    try:
-        message = chat_message.message
-        incoming_channel = (chat_message.metadata or {}).get("channel")
-        
-        # Fetch current application state
-        app_doc = await mongodb.loan_applications.find_one({
-            "application_id": application_id,
-            "user_id": current_user.user_id
+    message_lower = _normalize_message_for_parsing(message)
+    is_acceptance_message = _has_intent(message, ACCEPTANCE_KEYWORDS)
+    is_rejection_message = _has_intent(message, REJECTION_KEYWORDS)
+    is_continue_message = _has_intent(message, CONTINUE_KEYWORDS)
+    is_terminate_message = _has_intent(message, TERMINATE_KEYWORDS)
+    is_reset_message = _has_intent(message, RESET_KEYWORDS)
+
+    if is_terminate_message:
+        state["stage"] = "completed"
+        state["is_eligible"] = False
+        state["is_accepted"] = False
+        state["rejection_reason"] = "Chat terminated by user"
+        state["updated_at"] = datetime.now().isoformat()
+        state["messages"].append({
+            "role": "assistant",
+            "content": "Chat terminated. This application is now closed. Use Reset Chat to start again.",
+            "timestamp": datetime.now().isoformat()
         })
+        result_state = state
+    elif is_reset_message:
+        reset_state = _build_initial_state(
+            application_id=application_id,
+            user_id=current_user.user_id,
+            loan_type=app_doc["loan_type"],
+            user_email=app_doc.get("owner_email") or current_user.email,
+        )
+        result_state = await arun_workflow_stepwise(reset_state)
+        result_state["messages"].append({
+            "role": "assistant",
+            "content": "Chat reset successfully. Let's start fresh.",
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    # Parse application data if in collection stage
+    if not is_terminate_message and not is_reset_message and state["stage"] == "collect_info":
+        # Extract data from message (simple keyword matching)
+        # In production, use better NLP or structured forms
+        app_data = state["application_data"]
+
+        if any(word == message_lower.strip() for word in AUTOFILL_KEYWORDS):
+            app_data.setdefault("aadhaar", "123456789012")
+            app_data.setdefault("pan", "ABCDE1234F")
+            app_data.setdefault("monthly_income", 75000.0)
+            app_data.setdefault("requested_amount", 300000.0)
+            app_data.setdefault("tenure_months", 24)
+            app_data.setdefault("age", 30)
+            app_data.setdefault("employment_type", "salaried")
+            app_data.setdefault("employment_years", 5)
+            app_data.setdefault("city_tier", 1)
+            state["messages"].append({
+                "role": "assistant",
+                "content": (
+                    "Auto-filled sample KYC and financial details for demo flow. "
+                    "Proceeding with mock UIDAI and bureau checks now."
+                ),
+                "timestamp": datetime.now().isoformat()
+            })
         
-        if not app_doc:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Application not found"
+        # Extract Aadhaar
+        import re
+        aadhaar_match = re.search(r'\b\d{12}\b', message)
+        if aadhaar_match:
+            app_data["aadhaar"] = aadhaar_match.group()
+        
+        # Extract PAN
+        pan_match = re.search(r'\b[A-Za-z]{5}[0-9]{4}[A-Za-z]\b', message)
+        if pan_match:
+            app_data["pan"] = pan_match.group().upper()
+        
+        # Extract income (look for numbers with "income" or "salary")
+        if any(word in message_lower for word in ["income", "salary", "earn"]):
+            income_value = _extract_first_value_in_range(message, 5000, 10000000)
+            if income_value is not None:
+                app_data["monthly_income"] = float(income_value)
+        
+        # Extract amount (look for numbers with "amount" or "need")
+        if any(word in message_lower for word in ["amount", "need", "loan", "borrow"]):
+            amount_value = _extract_first_value_in_range(message, 10000, 50000000)
+            if amount_value is not None:
+                app_data["requested_amount"] = float(amount_value)
+
+        # Extract amount in lakh notation (e.g., 1 lakh, 2.5 lakh, 1lakh)
+        lakh_match = re.search(r'\b(\d+(?:\.\d+)?)\s*lakh\b', message_lower)
+        if lakh_match and not app_data.get("requested_amount"):
+            app_data["requested_amount"] = float(lakh_match.group(1)) * 100000
+        
+        # Extract tenure
+        tenure_context = (
+            any(word in message_lower for word in ["month", "months", "moth", "moths", "tenure", "period", "mth", "mo"]) or
+            ("year" in message_lower and any(word in message_lower for word in ["loan", "repay", "duration", "term"]))
+        )
+        if tenure_context:
+            tenure_match = re.search(r'\b(\d{1,3})\b', message)
+            if tenure_match:
+                tenure = int(tenure_match.group())
+                # Convert years to months if needed
+                if "year" in message_lower and tenure <= 10:
+                    tenure *= 12
+                app_data["tenure_months"] = tenure
+        
+        # Extract age
+        if "age" in message_lower or "old" in message_lower:
+            age_match = re.search(r'\b(\d{2})\b', message)
+            if age_match:
+                app_data["age"] = int(age_match.group())
+
+        # Fallback for standalone numeric messages (common chat pattern)
+        standalone_numeric_match = re.fullmatch(
+            r'\s*(?:₹\s*)?\d[\d,]*(?:\.\d+)?\s*(?:k|l|lac|lakh|cr|crore)?\s*',
+            message,
+            re.IGNORECASE,
+        )
+        if standalone_numeric_match:
+            numeric_value = _extract_first_value_in_range(message, 1, 50000000)
+
+            if numeric_value is None:
+                numeric_value = 0
+
+            if not app_data.get("monthly_income") and 5000 <= numeric_value <= 1000000:
+                app_data["monthly_income"] = numeric_value
+            elif (
+                not app_data.get("age")
+                and 18 <= numeric_value <= 80
+                and (
+                    app_data.get("employment_years")
+                    or app_data.get("employment_type")
+                    or app_data.get("tenure_months")
+                )
+            ):
+                app_data["age"] = int(numeric_value)
+            elif not app_data.get("tenure_months") and 6 <= numeric_value <= 360:
+                app_data["tenure_months"] = int(numeric_value)
+            elif not app_data.get("age") and 18 <= numeric_value <= 80:
+                app_data["age"] = int(numeric_value)
+            elif not app_data.get("requested_amount") and 10000 <= numeric_value <= 50000000:
+                app_data["requested_amount"] = numeric_value
+        
+        # Extract employment type
+        if "salaried" in message_lower or "employee" in message_lower:
+            app_data["employment_type"] = "salaried"
+        elif "self" in message_lower or "business" in message_lower:
+            app_data["employment_type"] = "self_employed"
+        
+        employment_context = any(word in message_lower for word in ["experience", "working", "employed", "job"])
+
+        # Extract employment years
+        if employment_context:
+            exp_match = re.search(r'\b(\d{1,2})\b', message)
+            if exp_match:
+                app_data["employment_years"] = int(exp_match.group())
+
+        # Extract tenure from compact year formats (e.g., 5yrs, 7 yr, 10years)
+        tenure_year_match = re.search(r'\b(\d{1,2})\s*(?:yrs?|years?)\b', message_lower)
+        if tenure_year_match:
+            years_value = int(tenure_year_match.group(1))
+            is_tenure_year_message = (
+                any(word in message_lower for word in ["loan", "repay", "tenure", "duration", "term"]) or
+                (app_data.get("requested_amount") is not None and not employment_context)
             )
+            if is_tenure_year_message and not app_data.get("tenure_months"):
+                app_data["tenure_months"] = years_value * 12
+            elif app_data.get("tenure_months") and not app_data.get("employment_years"):
+                app_data["employment_years"] = years_value
+            elif employment_context or (
+                app_data.get("requested_amount") in (None, "") and not app_data.get("employment_years")
+            ):
+                app_data["employment_years"] = years_value
         
-        # Reconstruct workflow state
-        state: LoanWorkflowState = {
-            "application_id": application_id,
-            "user_id": current_user.user_id,
-            "loan_type": app_doc["loan_type"],
-            "stage": app_doc["workflow_stage"],
-            "application_data": app_doc.get("application_data", {}),
-            "kyc_data": app_doc.get("kyc_data"),
-            "credit_data": app_doc.get("credit_data"),
-            "policy_validation": app_doc.get("policy_validation"),
-            "affordability_result": app_doc.get("affordability_result"),
-            "risk_assessment": app_doc.get("risk_assessment"),
-            "loan_offer": app_doc.get("loan_offer"),
-            "emi_schedule": app_doc.get("emi_schedule"),
-            "loan_id": app_doc.get("loan_id"),
-            "sanction_letter_path": app_doc.get("sanction_letter_path"),
-            "messages": app_doc["conversation_messages"],
-            "is_eligible": app_doc["is_eligible"],
-            "is_accepted": app_doc["is_accepted"],
-            "rejection_reason": app_doc.get("rejection_reason"),
-            "created_at": app_doc["created_at"],
-            "updated_at": datetime.now().isoformat()
-        }
-
-        state["application_data"].setdefault("application_id", application_id)
-        state["application_data"].setdefault("email", app_doc.get("owner_email") or current_user.email)
+        # Extract city tier (accept common misspellings like "teir 2")
+        tier_hint_present = any(token in message_lower for token in ["tier", "teir", "tir"])
+        if tier_hint_present:
+            tier_match = re.search(r'(?:tier|teir|tir)\s*[- ]?\s*([123])\b', message_lower)
+            if not tier_match:
+                tier_match = re.search(r'\b([123])\b', message)
+            if tier_match:
+                app_data["city_tier"] = int(tier_match.group(1))
+        else:
+            short_tier_match = re.search(r'\b(?:t|ti|tr)\s*[- ]?\s*([123])\b', message_lower)
+            if short_tier_match:
+                app_data["city_tier"] = int(short_tier_match.group(1))
+        if not app_data.get("city_tier") and any(city in message_lower for city in ["mumbai", "delhi", "bangalore", "chennai", "kolkata", "hyderabad"]):
+            app_data["city_tier"] = 1
+        elif not app_data.get("city_tier") and any(city in message_lower for city in ["pune", "jaipur", "lucknow", "chandigarh", "kochi"]):
+            app_data["city_tier"] = 2
+
+        # Fallback parse for mixed messages (e.g., "tier2 city, 40 moths, 100000")
+        all_numbers = [int(value) for value in re.findall(r'\b\d{1,8}\b', message)]
+        is_composite_input = (
+            len(all_numbers) >= 2
+            or "," in message
+            or any(token in message_lower for token in ["tier", "month", "months", "moth", "moths", "tenure"])
+        )
+        if all_numbers and is_composite_input:
+            if not app_data.get("city_tier") and any(token in message_lower for token in ["tier", "teir", "tir"]):
+                tier_candidates = [n for n in all_numbers if n in (1, 2, 3)]
+                if tier_candidates:
+                    app_data["city_tier"] = tier_candidates[0]
+
+            if not app_data.get("tenure_months") and any(word in message_lower for word in ["month", "months", "moth", "moths", "tenure", "period"]):
+                tenure_candidates = [n for n in all_numbers if 6 <= n <= 360]
+                if tenure_candidates:
+                    app_data["tenure_months"] = tenure_candidates[0]
+
+            if not app_data.get("requested_amount"):
+                amount_candidates = [n for n in all_numbers if 10000 <= n <= 50000000]
+                if amount_candidates:
+                    app_data["requested_amount"] = float(max(amount_candidates))
         
-        # Add user message to state
+        state["application_data"] = app_data
+    
+    if is_terminate_message or is_reset_message:
+        pass
+    elif state["stage"] in ["completed", "rejected"]:
+        follow_up_reply = await _follow_up_reply(state, message, emit)
         state["messages"].append({
-            "role": "user",
-            "content": message,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": chat_message.metadata or {}
+            "role": "assistant",
+            "content": follow_up_reply,
+            "timestamp": datetime.now().isoformat()
         })
-        
-        message_lower = _normalize_message_for_parsing(message)
-        is_acceptance_message = _has_intent(message, ACCEPTANCE_KEYWORDS)
-        is_rejection_message = _has_intent(message, REJECTION_KEYWORDS)
-        is_continue_message = _has_intent(message, CONTINUE_KEYWORDS)
-        is_terminate_message = _has_intent(message, TERMINATE_KEYWORDS)
-        is_reset_message = _has_intent(message, RESET_KEYWORDS)
-
-        if is_terminate_message:
-            state["stage"] = "completed"
-            state["is_eligible"] = False
+        result_state = state
+    elif state["stage"] == "await_acceptance":
+        if is_acceptance_message and not is_rejection_message:
+            state["is_accepted"] = True
+            state = handle_acceptance_node(state)
+            result_state = await arun_workflow_stepwise(state)
+        elif is_rejection_message:
             state["is_accepted"] = False
-            state["rejection_reason"] = "Chat terminated by user"
-            state["updated_at"] = datetime.now().isoformat()
+            result_state = handle_acceptance_node(state)
+        else:
+            follow_up_reply = await _follow_up_reply(state, message, emit)
             state["messages"].append({
                 "role": "assistant",
-                "content": "Chat terminated. This application is now closed. Use Reset Chat to start again.",
+                "content": follow_up_reply,
                 "timestamp": datetime.now().isoformat()
             })
             result_state = state
-        elif is_reset_message:
-            reset_state = _build_initial_state(
-                application_id=application_id,
-                user_id=current_user.user_id,
-                loan_type=app_doc["loan_type"],
-                user_email=app_doc.get("owner_email") or current_user.email,
-            )
-            result_state = run_workflow_stepwise(reset_state)
-            result_state["messages"].append({
+    elif state["stage"] == "collect_info":
+        has_all_required = all(
+            state["application_data"].get(field) not in (None, "")
+            for field in REQUIRED_APPLICATION_FIELDS
+        )
+
+        if has_all_required and is_acceptance_message:
+            state["stage"] = "verify_kyc"
+            result_state = await arun_workflow_stepwise(state)
+        else:
+            result_state = await arun_workflow_stepwise(state)
+    elif state["stage"] in STEP_CONFIRMATION_STAGES:
+        if is_continue_message or is_acceptance_message:
+            result_state = await arun_workflow_stepwise(state)
+        else:
+            state["messages"].append({
                 "role": "assistant",
-                "content": "Chat reset successfully. Let's start fresh.",
+                "content": "Reply 'ok' to continue to the next stage.",
                 "timestamp": datetime.now().isoformat()
             })
+            result_state = state
+    else:
+        result_state = await arun_workflow_stepwise(state)
+    
+    # Update database
+    update_doc = _workflow_update_doc(result_state)
+
+    if incoming_channel:
+        update_doc["source_channel"] = str(incoming_channel).lower()
+        update_doc["channel_metadata"] = chat_message.metadata or {}
+    
+    old_status = app_doc.get("status")
+
+    # Update status
+    if result_state["stage"] == "completed":
+        if result_state["loan_id"]:
+            update_doc["status"] = "APPROVED"
+        else:
+            update_doc["status"] = "DECLINED"
+    elif result_state["stage"] == "rejected":
+        update_doc["status"] = "REJECTED"
+    else:
+        update_doc["status"] = "IN_PROGRESS"
+
+    update_doc["progress"] = _build_pipeline_progress(result_state, update_doc["status"])
+    
+    # Only new messages and changed fields; a turn no longer rewrites the whole conversation
+    document_update = changes.update_for(update_doc)
+    await mongodb.loan_applications.update_one(
+        {"application_id": application_id},
+        document_update
+    )
+    await analytics_rollups.record_application_change(rollup_before, {**rollup_before, **update_doc})
+
+    # If loan was created, save to loans collection
+    if result_state.get("loan_id") and not app_doc.get("loan_id"):
+        customer_identity = _extract_customer_identity({
+            "application_data": result_state.get("application_data", {}),
+            "kyc_data": result_state.get("kyc_data") or {},
+        })
+        loan_doc = {
+            "loan_id": result_state["loan_id"],
+            "application_id": application_id,
+            "user_id": current_user.user_id,
+            "loan_type": result_state["loan_type"],
+            "principal": result_state["loan_offer"]["principal"],
+            "tenure_months": result_state["loan_offer"]["tenure_months"],
+            "interest_rate": result_state["loan_offer"]["interest_rate"],
+            "monthly_emi": result_state["loan_offer"]["monthly_emi"],
+            "total_interest": result_state["loan_offer"]["total_interest"],
+            "total_repayment": result_state["loan_offer"]["total_repayment"],
+            "status": "ACTIVE",
+            "disbursement_date": datetime.now().isoformat(),
+            "disbursement_amount": result_state["loan_offer"]["net_disbursement"],
+            "sanction_letter_url": f"/api/loans/{result_state['loan_id']}/sanction-letter",
+            "emi_schedule": emi_engine.compact_schedule(
+                result_state["emi_schedule"]["schedule"],
+                principal=result_state["loan_offer"]["principal"],
+                annual_interest_rate=result_state["loan_offer"]["interest_rate"],
+                tenure_months=result_state["loan_offer"]["tenure_months"],
+            ),
+            "customer_identity": customer_identity,
+            "created_at": datetime.now().isoformat(),
+            "updated_at": datetime.now().isoformat()
+        }
         
-        # Parse application data if in collection stage
-        if not is_terminate_message and not is_reset_message and state["stage"] == "collect_info":
-            # Extract data from message (simple keyword matching)
-            # In production, use better NLP or structured forms
-            app_data = state["application_data"]
-
-            if any(word == message_lower.strip() for word in AUTOFILL_KEYWORDS):
-                app_data.setdefault("aadhaar", "123456789012")
-                app_data.setdefault("pan", "ABCDE1234F")
-                app_data.setdefault("monthly_income", 75000.0)
-                app_data.setdefault("requested_amount", 300000.0)
-                app_data.setdefault("tenure_months", 24)
-                app_data.setdefault("age", 30)
-                app_data.setdefault("employment_type", "salaried")
-                app_data.setdefault("employment_years", 5)
-                app_data.setdefault("city_tier", 1)
-                state["messages"].append({
-                    "role": "assistant",
-                    "content": (
-                        "Auto-filled sample KYC and financial details for demo flow. "
-                        "Proceeding with mock UIDAI and bureau checks now."
-                    ),
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            # Extract Aadhaar
-            import re
-            aadhaar_match = re.search(r'\b\d{12}\b', message)
-            if aadhaar_match:
-                app_data["aadhaar"] = aadhaar_match.group()
-            
-            # Extract PAN
-            pan_match = re.search(r'\b[A-Za-z]{5}[0-9]{4}[A-Za-z]\b', message)
-            if pan_match:
-                app_data["pan"] = pan_match.group().upper()
-            
-            # Extract income (look for numbers with "income" or "salary")
-            if any(word in message_lower for word in ["income", "salary", "earn"]):
-                income_value = _extract_first_value_in_range(message, 5000, 10000000)
-                if income_value is not None:
-                    app_data["monthly_income"] = float(income_value)
-            
-            # Extract amount (look for numbers with "amount" or "need")
-            if any(word in message_lower for word in ["amount", "need", "loan", "borrow"]):
-                amount_value = _extract_first_value_in_range(message, 10000, 50000000)
-                if amount_value is not None:
-                    app_data["requested_amount"] = float(amount_value)
-
-            # Extract amount in lakh notation (e.g., 1 lakh, 2.5 lakh, 1lakh)
-            lakh_match = re.search(r'\b(\d+(?:\.\d+)?)\s*lakh\b', message_lower)
-            if lakh_match and not app_data.get("requested_amount"):
-                app_data["requested_amount"] = float(lakh_match.group(1)) * 100000
-            
-            # Extract tenure
-            tenure_context = (
-                any(word in message_lower for word in ["month", "months", "moth", "moths", "tenure", "period", "mth", "mo"]) or
-                ("year" in message_lower and any(word in message_lower for word in ["loan", "repay", "duration", "term"]))
+        await mongodb.loans.insert_one(loan_doc)
+        await analytics_rollups.record_loan_created(loan_doc)
+        logger.info(f"Loan {result_state['loan_id']} created and disbursed")
+
+    response = {
+        "application_id": application_id,
+        "stage": result_state["stage"],
+        "status": update_doc["status"],
+        "messages": result_state["messages"],
+        "loan_offer": result_state.get("loan_offer"),
+        "emi_schedule": result_state.get("emi_schedule"),
+        "loan_id": result_state.get("loan_id"),
+        "progress": update_doc["progress"],
+        "completed": result_state["stage"] in ["completed", "rejected"]
+    }
+
+    if emit:
+        # Deltas only: the client already holds the earlier conversation and offer
+        new_messages = result_state["messages"] if is_reset_message else result_state["messages"][previous_message_count + 1:]
+        emit("result", {
+            **{key: response[key] for key in ("application_id", "stage", "status", "loan_id", "progress", "completed")},
+            **{
+                key: value
+                for key, value in document_update.get("$set", {}).items()
+                if key in ("loan_offer", "emi_schedule")
+            },
+            "messages": new_messages,
+            "replace_messages": is_reset_message,
+        })
+
+    if (
+        update_doc["status"] in {"DECLINED", "REJECTED"}
+        and old_status != update_doc["status"]
+    ):
+        try:
+            applicant_email = (
+                result_state.get("application_data", {}).get("email")
+                or app_doc.get("owner_email")
+                or current_user.email
             )
-            if tenure_context:
-                tenure_match = re.search(r'\b(\d{1,3})\b', message)
-                if tenure_match:
-                    tenure = int(tenure_match.group())
-                    # Convert years to months if needed
-                    if "year" in message_lower and tenure <= 10:
-                        tenure *= 12
-                    app_data["tenure_months"] = tenure
-            
-            # Extract age
-            if "age" in message_lower or "old" in message_lower:
-                age_match = re.search(r'\b(\d{2})\b', message)
-                if age_match:
-                    app_data["age"] = int(age_match.group())
-
-            # Fallback for standalone numeric messages (common chat pattern)
-            standalone_numeric_match = re.fullmatch(
-                r'\s*(?:₹\s*)?\d[\d,]*(?:\.\d+)?\s*(?:k|l|lac|lakh|cr|crore)?\s*',
-                message,
-                re.IGNORECASE,
+            decision_mail_sent = await _send_loan_decision_email(
+                to_email=applicant_email,
+                application_id=application_id,
+                loan_type=result_state.get("loan_type") or app_doc.get("loan_type"),
+                status_value=update_doc["status"],
+                rejection_reason=result_state.get("rejection_reason"),
             )
-            if standalone_numeric_match:
-                numeric_value = _extract_first_value_in_range(message, 1, 50000000)
-
-                if numeric_value is None:
-                    numeric_value = 0
-
-                if not app_data.get("monthly_income") and 5000 <= numeric_value <= 1000000:
-                    app_data["monthly_income"] = numeric_value
-                elif (
-                    not app_data.get("age")
-                    and 18 <= numeric_value <= 80
-                    and (
-                        app_data.get("employment_years")
-                        or app_data.get("employment_type")
-                        or app_data.get("tenure_months")
-                    )
-                ):
-                    app_data["age"] = int(numeric_value)
-                elif not app_data.get("tenure_months") and 6 <= numeric_value <= 360:
-                    app_data["tenure_months"] = int(numeric_value)
-                elif not app_data.get("age") and 18 <= numeric_value <= 80:
-                    app_data["age"] = int(numeric_value)
-                elif not app_data.get("requested_amount") and 10000 <= numeric_value <= 50000000:
-                    app_data["requested_amount"] = numeric_value
-            
-            # Extract employment type
-            if "salaried" in message_lower or "employee" in message_lower:
-                app_data["employment_type"] = "salaried"
-            elif "self" in message_lower or "business" in message_lower:
-                app_data["employment_type"] = "self_employed"
-            
-            employment_context = any(word in message_lower for word in ["experience", "working", "employed", "job"])
-
-            # Extract employment years
-            if employment_context:
-                exp_match = re.search(r'\b(\d{1,2})\b', message)
-                if exp_match:
-                    app_data["employment_years"] = int(exp_match.group())
-
-            # Extract tenure from compact year formats (e.g., 5yrs, 7 yr, 10years)
-            tenure_year_match = re.search(r'\b(\d{1,2})\s*(?:yrs?|years?)\b', message_lower)
-            if tenure_year_match:
-                years_value = int(tenure_year_match.group(1))
-                is_tenure_year_message = (
-                    any(word in message_lower for word in ["loan", "repay", "tenure", "duration", "term"]) or
-                    (app_data.get("requested_amount") is not None and not employment_context)
+            if not decision_mail_sent:
+                logger.warning(
+                    "Decision email not queued for application %s (%s)",
+                    application_id,
+                    update_doc["status"],
                 )
-                if is_tenure_year_message and not app_data.get("tenure_months"):
-                    app_data["tenure_months"] = years_value * 12
-                elif app_data.get("tenure_months") and not app_data.get("employment_years"):
-                    app_data["employment_years"] = years_value
-                elif employment_context or (
-                    app_data.get("requested_amount") in (None, "") and not app_data.get("employment_years")
-                ):
-                    app_data["employment_years"] = years_value
-            
-            # Extract city tier (accept common misspellings like "teir 2")
-            tier_hint_present = any(token in message_lower for token in ["tier", "teir", "tir"])
-            if tier_hint_present:
-                tier_match = re.search(r'(?:tier|teir|tir)\s*[- ]?\s*([123])\b', message_lower)
-                if not tier_match:
-                    tier_match = re.search(r'\b([123])\b', message)
-                if tier_match:
-                    app_data["city_tier"] = int(tier_match.group(1))
-            else:
-                short_tier_match = re.search(r'\b(?:t|ti|tr)\s*[- ]?\s*([123])\b', message_lower)
-                if short_tier_match:
-                    app_data["city_tier"] = int(short_tier_match.group(1))
-            if not app_data.get("city_tier") and any(city in message_lower for city in ["mumbai", "delhi", "bangalore", "chennai", "kolkata", "hyderabad"]):
-                app_data["city_tier"] = 1
-            elif not app_data.get("city_tier") and any(city in message_lower for city in ["pune", "jaipur", "lucknow", "chandigarh", "kochi"]):
-                app_data["city_tier"] = 2
-
-            # Fallback parse for mixed messages (e.g., "tier2 city, 40 moths, 100000")
-            all_numbers = [int(value) for value in re.findall(r'\b\d{1,8}\b', message)]
-            is_composite_input = (
-                len(all_numbers) >= 2
-                or "," in message
-                or any(token in message_lower for token in ["tier", "month", "months", "moth", "moths", "tenure"])
+        except Exception as mail_error:
+            logger.error("Decision email dispatch failed: %s", mail_error, exc_info=True)
+    
+    if result_state.get("loan_id") and not app_doc.get("loan_id"):
+        try:
+            applicant_email = (
+                result_state.get("application_data", {}).get("email")
+                or app_doc.get("owner_email")
+                or current_user.email
             )
-            if all_numbers and is_composite_input:
-                if not app_data.get("city_tier") and any(token in message_lower for token in ["tier", "teir", "tir"]):
-                    tier_candidates = [n for n in all_numbers if n in (1, 2, 3)]
-                    if tier_candidates:
-                        app_data["city_tier"] = tier_candidates[0]
-
-                if not app_data.get("tenure_months") and any(word in message_lower for word in ["month", "months", "moth", "moths", "tenure", "period"]):
-                    tenure_candidates = [n for n in all_numbers if 6 <= n <= 360]
-                    if tenure_candidates:
-                        app_data["tenure_months"] = tenure_candidates[0]
-
-                if not app_data.get("requested_amount"):
-                    amount_candidates = [n for n in all_numbers if 10000 <= n <= 50000000]
-                    if amount_candidates:
-                        app_data["requested_amount"] = float(max(amount_candidates))
-            
-            state["application_data"] = app_data
-        
-        if is_terminate_message or is_reset_message:
-            pass
-        elif state["stage"] in ["completed", "rejected"]:
-            follow_up_reply = generate_follow_up_response(state, message)
-            state["messages"].append({
-                "role": "assistant",
-                "content": follow_up_reply,
-                "timestamp": datetime.now().isoformat()
-            })
-            result_state = state
-        elif state["stage"] == "await_acceptance":
-            if is_acceptance_message and not is_rejection_message:
-                state["is_accepted"] = True
-                state = handle_acceptance_node(state)
-                result_state = run_workflow_stepwise(state)
-            elif is_rejection_message:
-                state["is_accepted"] = False
-                result_state = handle_acceptance_node(state)
-            else:
-                follow_up_reply = generate_follow_up_response(state, message)
-                state["messages"].append({
-                    "role": "assistant",
-                    "content": follow_up_reply,
-                    "timestamp": datetime.now().isoformat()
-                })
-                result_state = state
-        elif state["stage"] == "collect_info":
-            has_all_required = all(
-                state["application_data"].get(field) not in (None, "")
-                for field in REQUIRED_APPLICATION_FIELDS
+            mail_sent = await _send_loan_report_email(
+                to_email=applicant_email,
+                application_id=application_id,
+                loan_id=result_state["loan_id"],
+                loan_type=result_state["loan_type"],
+                loan_offer=result_state.get("loan_offer") or {},
+                sanction_letter_path=result_state.get("sanction_letter_path"),
             )
+            if not mail_sent:
+                logger.warning("Loan report email not queued for loan %s", result_state["loan_id"])
+        except Exception as mail_error:
+            logger.error("Loan report email dispatch failed: %s", mail_error, exc_info=True)
+    
+    logger.info(f"Chat processed for application {application_id}, stage: {result_state['stage']}")
+    
+    return response
 
-            if has_all_required and is_acceptance_message:
-                state["stage"] = "verify_kyc"
-                result_state = run_workflow_stepwise(state)
-            else:
-                result_state = run_workflow_stepwise(state)
-        elif state["stage"] in STEP_CONFIRMATION_STAGES:
-            if is_continue_message or is_acceptance_message:
-                result_state = run_workflow_stepwise(state)
-            else:
-                state["messages"].append({
-                    "role": "assistant",
-                    "content": "Reply 'ok' to continue to the next stage.",
-                    "timestamp": datetime.now().isoformat()
-                })
-                result_state = state
-        else:
-            result_state = run_workflow_stepwise(state)
-        
-        # Update database
-        update_doc = {
-            "workflow_stage": result_state["stage"],
-            "application_data": result_state["application_data"],
-            "kyc_data": result_state.get("kyc_data"),
-            "credit_data": result_state.get("credit_data"),
-            "policy_validation": result_state.get("policy_validation"),
-            "affordability_result": result_state.get("affordability_result"),
-            "risk_assessment": result_state.get("risk_assessment"),
-            "loan_offer": result_state.get("loan_offer"),
-            "emi_schedule": result_state.get("emi_schedule"),
-            "loan_id": result_state.get("loan_id"),
-            "sanction_letter_path": result_state.get("sanction_letter_path"),
-            "conversation_messages": result_state["messages"],
-            "is_eligible": result_state["is_eligible"],
-            "is_accepted": result_state["is_accepted"],
-            "rejection_reason": result_state.get("rejection_reason"),
-            "updated_at": result_state["updated_at"]
-        }
-
-        if incoming_channel:
-            update_doc["source_channel"] = str(incoming_channel).lower()
-            update_doc["channel_metadata"] = chat_message.metadata or {}
-        
-        old_status = app_doc.get("status")
-
-        # Update status
-        if result_state["stage"] == "completed":
-            if result_state["loan_id"]:
-                update_doc["status"] = "APPROVED"
-            else:
-                update_doc["status"] = "DECLINED"
-        elif result_state["stage"] == "rejected":
-            update_doc["status"] = "REJECTED"
-        else:
-            update_doc["status"] = "IN_PROGRESS"
 
-        update_doc["progress"] = _build_pipeline_progress(result_state, update_doc["status"])
+@router.post("/applications/{application_id}/chat")
+async def chat_with_workflow(
+    application_id: str,
+    chat_message: ChatMessage,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Send a message to the loan workflow and get response
+    This is the main interaction endpoint for the conversational interface
+    
+    Args:
+        application_id: Application ID
+        chat_message: User's message and metadata
+        current_user: Authenticated user
+    
+    Returns:
+        Updated conversation and workflow state
+    """
+    try:
+        app_doc = await _load_user_application(application_id, current_user)
+        return await _process_chat_turn(application_id, app_doc, chat_message, current_user)
         
-        await mongodb.loan_applications.update_one(
-            {"application_id": application_id},
-            {"$set": update_doc}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in chat workflow: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process message: {str(e)}"
         )
 
-        if (
-            update_doc["status"] in {"DECLINED", "REJECTED"}
-            and old_status != update_doc["status"]
-        ):
-            try:
-                applicant_email = (
-                    result_state.get("application_data", {}).get("email")
-                    or app_doc.get("owner_email")
-                    or current_user.email
-                )
-                decision_mail_sent = await _send_loan_decision_email(
-                    to_email=applicant_email,
-                    application_id=application_id,
-                    loan_type=result_state.get("loan_type") or app_doc.get("loan_type"),
-                    status_value=update_doc["status"],
-                    rejection_reason=result_state.get("rejection_reason"),
-                )
-                if not decision_mail_sent:
-                    logger.warning(
-                        "Decision email not sent for application %s (%s)",
-                        application_id,
-                        update_doc["status"],
-                    )
-            except Exception as mail_error:
-                logger.error("Decision email dispatch failed: %s", mail_error, exc_info=True)
-        
-        # If loan was created, save to loans collection
-        if result_state.get("loan_id") and not app_doc.get("loan_id"):
-            customer_identity = _extract_customer_identity({
-                "application_data": result_state.get("application_data", {}),
-                "kyc_data": result_state.get("kyc_data") or {},
-            })
-            loan_doc = {
-                "loan_id": result_state["loan_id"],
-                "application_id": application_id,
-                "user_id": current_user.user_id,
-                "loan_type": result_state["loan_type"],
-                "principal": result_state["loan_offer"]["principal"],
-                "tenure_months": result_state["loan_offer"]["tenure_months"],
-                "interest_rate": result_state["loan_offer"]["interest_rate"],
-                "monthly_emi": result_state["loan_offer"]["monthly_emi"],
-                "total_interest": result_state["loan_offer"]["total_interest"],
-                "total_repayment": result_state["loan_offer"]["total_repayment"],
-                "status": "ACTIVE",
-                "disbursement_date": datetime.now().isoformat(),
-                "disbursement_amount": result_state["loan_offer"]["net_disbursement"],
-                "sanction_letter_url": f"/api/loans/{result_state['loan_id']}/sanction-letter",
-                "emi_schedule": result_state["emi_schedule"]["schedule"],
-                "customer_identity": customer_identity,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
-            
-            await mongodb.loans.insert_one(loan_doc)
-            logger.info(f"Loan {result_state['loan_id']} created and disbursed")
 
-            try:
-                applicant_email = (
-                    result_state.get("application_data", {}).get("email")
-                    or app_doc.get("owner_email")
-                    or current_user.email
-                )
-                mail_sent = await _send_loan_report_email(
-                    to_email=applicant_email,
-                    application_id=application_id,
-                    loan_id=result_state["loan_id"],
-                    loan_type=result_state["loan_type"],
-                    loan_offer=result_state.get("loan_offer") or {},
-                    sanction_letter_path=result_state.get("sanction_letter_path"),
-                )
-                if not mail_sent:
-                    logger.warning("Loan report email not sent for loan %s", result_state["loan_id"])
-            except Exception as mail_error:
-                logger.error("Loan report email dispatch failed: %s", mail_error, exc_info=True)
-        
-        logger.info(f"Chat processed for application {application_id}, stage: {result_state['stage']}")
-        
-        return {
-            "application_id": application_id,
-            "stage": result_state["stage"],
-            "status": update_doc["status"],
-            "messages": result_state["messages"],
-            "loan_offer": result_state.get("loan_offer"),
-            "emi_schedule": result_state.get("emi_schedule"),
-            "loan_id": result_state.get("loan_id"),
-            "progress": _build_pipeline_progress(result_state, update_doc["status"]),
-            "completed": result_state["stage"] in ["completed", "rejected"]
-        }
-        
+@router.post("/applications/{application_id}/chat/stream")
+async def chat_with_workflow_stream(
+    application_id: str,
+    chat_message: ChatMessage,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events variant of chat_with_workflow
+    
+    Events:
+        stage: turn accepted, with the current stage and status (sent immediately)
+        token: follow-up reply deltas as the LLM produces them
+        result: new messages plus stage/status/progress, and loan_offer/emi_schedule only if changed
+        error: the turn failed
+    
+    The turn runs in its own task, so it is saved even if the client disconnects mid-stream.
+    """
+    try:
+        app_doc = await _load_user_application(application_id, current_user, APPEND_ONLY_MESSAGE_WINDOW)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat workflow: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -866,6 +1002,35 @@ async def chat_with_workflow(
             detail=f"Failed to process message: {str(e)}"
         )
 
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        events.put_nowait((event, data))
+
+    async def run_turn():
+        try:
+            await _process_chat_turn(application_id, app_doc, chat_message, current_user, emit=emit)
+        except Exception as e:
+            logger.error(f"Error in chat workflow: {str(e)}", exc_info=True)
+            emit("error", {"detail": f"Failed to process message: {str(e)}"})
+
+    turn = asyncio.create_task(run_turn())
+    _chat_turn_tasks.add(turn)
+    turn.add_done_callback(_chat_turn_tasks.discard)
+
+    async def event_stream():
+        while True:
+            event, data = await events.get()
+            yield _sse_event(event, data)
+            if event in ("result", "error"):
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.post("/applications/{application_id}/terminate")
 async def terminate_chat(
@@ -873,20 +1038,23 @@ async def terminate_chat(
     current_user: User = Depends(get_current_user)
 ):
     """Terminate and close current chat/application session."""
-    app_doc = await mongodb.loan_applications.find_one({
-        "application_id": application_id,
-        "user_id": current_user.user_id
-    })
+    app_doc = await application_store.get_for_user(
+        application_id,
+        current_user.user_id,
+        projection="chat_turn",
+        message_window=APPEND_ONLY_MESSAGE_WINDOW
+    )
 
     if not app_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Application not found")
 
-    messages = app_doc.get("conversation_messages", [])
-    messages.append({
+    terminated_message = {
         "role": "assistant",
         "content": "Chat terminated. This application is now closed. Use Reset Chat to start again.",
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    messages = app_doc.get("conversation_messages", [])
+    messages.append(terminated_message)
 
     state_for_progress: LoanWorkflowState = {
         "application_id": application_id,
@@ -920,12 +1088,13 @@ async def terminate_chat(
                 "is_eligible": False,
                 "is_accepted": False,
                 "rejection_reason": "Chat terminated by user",
-                "conversation_messages": messages,
                 "progress": _build_pipeline_progress(state_for_progress, "DECLINED"),
                 "updated_at": datetime.now().isoformat(),
-            }
+            },
+            "$push": {"conversation_messages": terminated_message}
         }
     )
+    await analytics_rollups.record_application_change(app_doc, {**app_doc, "status": "DECLINED"})
 
     return {"application_id": application_id, "status": "DECLINED", "stage": "completed", "message": "Chat terminated"}
 
@@ -936,10 +1105,7 @@ async def reset_chat(
     current_user: User = Depends(get_current_user)
 ):
     """Reset current chat/application session and start collection from scratch."""
-    app_doc = await mongodb.loan_applications.find_one({
-        "application_id": application_id,
-        "user_id": current_user.user_id
-    })
+    app_doc = await application_store.get_for_user(application_id, current_user.user_id, projection="status")
 
     if not app_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Application not found")
@@ -950,7 +1116,7 @@ async def reset_chat(
         loan_type=app_doc["loan_type"],
         user_email=app_doc.get("owner_email") or current_user.email,
     )
-    result_state = run_workflow_stepwise(reset_state)
+    result_state = await arun_workflow_stepwise(reset_state)
     result_state["messages"].append({
         "role": "assistant",
         "content": "Chat reset successfully. Let's start fresh.",
@@ -982,6 +1148,7 @@ async def reset_chat(
         {"application_id": application_id, "user_id": current_user.user_id},
         {"$set": update_doc}
     )
+    await analytics_rollups.record_application_change(app_doc, {**app_doc, **update_doc})
 
     return {
         "application_id": application_id,
@@ -1008,16 +1175,11 @@ async def list_applications(
         List of applications
     """
     try:
-        query = {"user_id": current_user.user_id}
-        if status:
-            query["status"] = status.upper()
-        
-        cursor = mongodb.loan_applications.find(query).sort("created_at", -1)
-        applications = await cursor.to_list(length=100)
-        
-        # Remove MongoDB _id
-        for app in applications:
-            app.pop("_id", None)
+        # Summary projection: no conversation or EMI schedule in list views
+        applications = await application_store.list_for_user(
+            current_user.user_id,
+            status=status.upper() if status else None
+        )
         
         logger.info(f"Retrieved {len(applications)} applications for user {current_user.user_id}")
         
@@ -1034,6 +1196,8 @@ async def list_applications(
 @router.get("/applications/{application_id}")
 async def get_application(
     application_id: str,
+    message_limit: int | None = Query(None, ge=0, description="Only the latest N conversation messages"),
+    include_schedule: bool = Query(False, description="Include the EMI schedule rows"),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1041,16 +1205,20 @@ async def get_application(
     
     Args:
         application_id: Application ID
+        message_limit: Return only the latest N messages (page older ones via /messages)
+        include_schedule: Include emi_schedule.schedule rows (the summary is always returned)
         current_user: Authenticated user
     
     Returns:
-        Complete application details
+        Application details
     """
     try:
-        app_doc = await mongodb.loan_applications.find_one({
-            "application_id": application_id,
-            "user_id": current_user.user_id
-        })
+        app_doc = await application_store.get_for_user(
+            application_id,
+            current_user.user_id,
+            projection="full" if include_schedule else "detail",
+            message_window=message_limit
+        )
         
         if not app_doc:
             raise HTTPException(
@@ -1058,8 +1226,6 @@ async def get_application(
                 detail="Application not found"
             )
         
-        app_doc.pop("_id", None)
-        
         return app_doc
         
     except HTTPException:
@@ -1072,6 +1238,45 @@ async def get_application(
         )
 
 
+@router.get("/applications/{application_id}/messages")
+async def get_application_messages(
+    application_id: str,
+    before: int | None = Query(None, ge=0, description="Return messages before this index (previous page's start)"),
+    limit: int = Query(DEFAULT_MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Page through conversation history, newest page first
+    
+    Returns:
+        messages, start index, total count and has_more
+    """
+    try:
+        page = await application_store.message_page(
+            application_id,
+            current_user.user_id,
+            before=before,
+            limit=limit
+        )
+        
+        if page is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Application not found"
+            )
+        
+        return page
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching application messages: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch messages: {str(e)}"
+        )
+
+
 @router.get("/active")
 async def get_active_loans(
     current_user: User = Depends(get_current_user)
@@ -1177,6 +1382,7 @@ async def get_loan_details(
             )
             loan_doc["customer_identity"] = _extract_customer_identity(app_doc)
 
+        loan_doc["emi_schedule"] = emi_engine.expand_schedule(loan_doc.get("emi_schedule"))
         loan_doc.pop("_id", None)
         
         return loan_doc
@@ -1207,10 +1413,13 @@ async def get_emi_schedule(
         Complete EMI schedule
     """
     try:
-        loan_doc = await mongodb.loans.find_one({
-            "loan_id": loan_id,
-            "user_id": current_user.user_id
-        })
+        loan_doc = await mongodb.loans.find_one(
+            {
+                "loan_id": loan_id,
+                "user_id": current_user.user_id
+            },
+            {"_id": 0, "emi_schedule": 1},
+        )
         
         if not loan_doc:
             raise HTTPException(
@@ -1218,25 +1427,28 @@ async def get_emi_schedule(
                 detail="Loan not found"
             )
         
-        emi_schedule = loan_doc.get("emi_schedule", [])
-        
-        # Calculate summary
-        total_paid = sum(
-            inst["emi_amount"] for inst in emi_schedule 
-            if inst.get("status") == "PAID"
-        )
-        total_pending = sum(
-            inst["emi_amount"] for inst in emi_schedule 
-            if inst.get("status") == "PENDING"
-        )
+        # Rebuild rows lazily (compact or legacy storage) and summarise in one pass
+        emi_schedule = []
+        total_paid = 0
+        total_pending = 0
+        paid_installments = 0
+        pending_installments = 0
+        for inst in emi_engine.iter_stored_schedule(loan_doc.get("emi_schedule")):
+            emi_schedule.append(inst)
+            if inst.get("status") == "PAID":
+                total_paid += inst["emi_amount"]
+                paid_installments += 1
+            elif inst.get("status") == "PENDING":
+                total_pending += inst["emi_amount"]
+                pending_installments += 1
         
         return {
             "loan_id": loan_id,
             "schedule": emi_schedule,
             "summary": {
                 "total_installments": len(emi_schedule),
-                "paid_installments": sum(1 for inst in emi_schedule if inst.get("status") == "PAID"),
-                "pending_installments": sum(1 for inst in emi_schedule if inst.get("status") == "PENDING"),
+                "paid_installments": paid_installments,
+                "pending_installments": pending_installments,
                 "total_paid": total_paid,
                 "total_pending": total_pending
             }
@@ -1252,62 +1464,142 @@ async def get_emi_schedule(
         )
 
 
-@router.get("/{loan_id}/sanction-letter")
-async def download_sanction_letter(
+@router.get("/{loan_id}/sanction-letter/status")
+async def sanction_letter_status(
     loan_id: str,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Download sanction letter PDF
+    Sanction letter rendering status, for polling after acceptance
     
     Args:
         loan_id: Loan ID
         current_user: Authenticated user
     
     Returns:
-        PDF file
+        status (PENDING, READY or FAILED) and the download URL once ready
     """
-    from fastapi.responses import FileResponse
-    import os
-    
+    from services.pdf_rendering import STATUS_FAILED, STATUS_PENDING, STATUS_READY, sanction_renderer
+
     try:
-        loan_doc = await mongodb.loans.find_one({
-            "loan_id": loan_id,
-            "user_id": current_user.user_id
-        })
+        app_doc = await mongodb.loan_applications.find_one(
+            {"loan_id": loan_id, "user_id": current_user.user_id},
+            {"sanction_letter_path": 1, "sanction_letter_status": 1, "sanction_letter_updated_at": 1}
+        )
         
-        if not loan_doc:
+        if not app_doc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Loan not found"
             )
         
-        # Get sanction letter from application
-        app_doc = await mongodb.loan_applications.find_one({
+        # A path is only ever written once the file exists, whatever order the writes landed in
+        if app_doc.get("sanction_letter_path"):
+            letter_status = STATUS_READY
+        elif app_doc.get("sanction_letter_status") == STATUS_FAILED:
+            letter_status = STATUS_FAILED
+        else:
+            letter_status = STATUS_PENDING
+        
+        return {
             "loan_id": loan_id,
-            "user_id": current_user.user_id
-        })
+            "status": letter_status,
+            "rendering_here": sanction_renderer.is_rendering(loan_id),
+            "download_url": f"/api/loans/{loan_id}/sanction-letter" if letter_status == STATUS_READY else None,
+            "updated_at": app_doc.get("sanction_letter_updated_at")
+        }
         
-        if not app_doc or not app_doc.get("sanction_letter_path"):
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading sanction letter status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read sanction letter status: {str(e)}"
+        )
+
+
+@router.get("/{loan_id}/sanction-letter")
+async def download_sanction_letter(
+    loan_id: str,
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    if_range: str | None = Header(None, alias="If-Range"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download sanction letter PDF
+    Streams the stored file; supports ETag/If-None-Match (304) and single byte ranges (206).
+    
+    Args:
+        loan_id: Loan ID
+        current_user: Authenticated user
+    
+    Returns:
+        PDF file
+    """
+    from fastapi import Response
+    from services.sanction_store import iter_file, parse_range, sanction_store
+    
+    try:
+        # One lookup: the application carries both the loan ownership and the letter path
+        app_doc = await mongodb.loan_applications.find_one(
+            {"loan_id": loan_id, "user_id": current_user.user_id},
+            {"_id": 0, "sanction_letter_path": 1}
+        )
+        
+        file_path = (app_doc or {}).get("sanction_letter_path")
+        if not file_path:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sanction letter not found"
             )
         
-        file_path = app_doc["sanction_letter_path"]
-        
-        if not os.path.exists(file_path):
+        file_stat = sanction_store.stat(file_path)
+        if file_stat is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sanction letter file not found"
             )
         
+        etag = sanction_store.etag(file_path, file_stat)
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=0, must-revalidate",
+            "Content-Disposition": f'attachment; filename="sanction_letter_{loan_id}.pdf"',
+        }
+        
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if "*" in tags or etag in tags:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        size = file_stat.st_size
+        byte_range = None
+        # A weak validator (legacy file) never satisfies If-Range: send the whole file
+        strong_etag = sanction_store.key_from_path(file_path) is not None
+        if range_header and (not if_range or (strong_etag and if_range.strip() == etag)):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={**headers, "Content-Range": f"bytes */{size}"}
+                )
+        
+        start, end = byte_range or (0, size - 1)
+        headers["Content-Length"] = str(end - start + 1)
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        
         logger.info(f"Sanction letter downloaded for loan {loan_id}")
         
-        return FileResponse(
-            path=file_path,
+        return StreamingResponse(
+            iter_file(file_path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
             media_type="application/pdf",
-            filename=f"sanction_letter_{loan_id}.pdf"
+            headers=headers
         )
         
     except HTTPException:
@@ -13,11 +13,11 @@ import re
 import secrets
 from typing import Any, Dict, Optional
 
-import httpx
 from fastapi import APIRouter, Depends, Header, HTTPException, status
 
 from auth.otp_service import otp_service
 from auth.dependencies import get_current_user
+from auth.user_cache import invalidate_user
 from config import settings
 from database import mongodb, redis_client
 from models.loan_application import ChatMessage
@@ -25,10 +25,15 @@ from models.user import User, UserResponse
 from routes.loans import (
     _build_initial_state,
     _build_pipeline_progress,
+    _load_user_application,
     _normalize_loan_type,
-    chat_with_workflow,
-    run_workflow_stepwise,
+    _process_chat_turn,
+    arun_workflow_stepwise,
 )
+from services.analytics_rollups import analytics_rollups
+from services.application_store import APPEND_ONLY_MESSAGE_WINDOW, application_store
+from services.http_clients import http_clients
+from services.sanction_store import sanction_store
 
 logger = logging.getLogger(__name__)
 
@@ -67,7 +72,7 @@ async def _send_telegram_message(
         logger.warning("TELEGRAM_BOT_TOKEN is not configured; skipping Telegram reply")
         return
 
-    api_url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+    api_path = f"/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
@@ -77,23 +82,32 @@ async def _send_telegram_message(
         payload["reply_markup"] = reply_markup
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(api_url, json=payload)
-            response.raise_for_status()
+        response = await http_clients.get("telegram").post(api_path, json=payload, timeout=10.0)
+        response.raise_for_status()
     except Exception as exc:
         logger.error("Failed to send Telegram message: %s", exc, exc_info=True)
 
 
-async def _send_telegram_document(chat_id: str, file_path: str, caption: str | None = None) -> bool:
+async def _send_telegram_document(
+    chat_id: str,
+    file_path: str,
+    caption: str | None = None,
+    file_id: str | None = None,
+    file_name: str | None = None,
+) -> str | None:
+    """
+    Send a PDF by uploading file_path, or by Telegram file_id when one is given.
+    Returns Telegram's file_id for the document ("" if it gave none), or None on failure.
+    """
     if not settings.TELEGRAM_BOT_TOKEN:
         logger.warning("TELEGRAM_BOT_TOKEN is not configured; skipping Telegram document send")
-        return False
+        return None
 
-    if not file_path or not os.path.exists(file_path):
+    if not file_id and (not file_path or not os.path.exists(file_path)):
         logger.warning("Telegram document not found at path: %s", file_path)
-        return False
+        return None
 
-    api_url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendDocument"
+    api_path = f"/bot{settings.TELEGRAM_BOT_TOKEN}/sendDocument"
     data = {
         "chat_id": chat_id,
     }
@@ -101,18 +115,50 @@ async def _send_telegram_document(chat_id: str, file_path: str, caption: str | N
         data["caption"] = caption
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        client = http_clients.get("telegram")
+        if file_id:
+            response = await client.post(api_path, data={**data, "document": file_id})
+        else:
             with open(file_path, "rb") as file_handle:
                 files = {
-                    "document": (os.path.basename(file_path), file_handle, "application/pdf")
+                    "document": (file_name or os.path.basename(file_path), file_handle, "application/pdf")
                 }
-                response = await client.post(api_url, data=data, files=files)
-                response.raise_for_status()
-        return True
+                response = await client.post(api_path, data=data, files=files)
+        response.raise_for_status()
+        document = ((response.json() or {}).get("result") or {}).get("document") or {}
+        return document.get("file_id") or ""
     except Exception as exc:
         logger.error("Failed to send Telegram document: %s", exc, exc_info=True)
+        return None
+
+
+async def _send_sanction_letter(chat_id: str, sanction_doc: Dict[str, Any], caption: str) -> bool:
+    """
+    Send an application's stored sanction letter. Telegram keeps uploaded files, so
+    the file_id from the first send is saved per letter and later resends reuse it
+    instead of uploading the bytes again.
+    """
+    file_path = sanction_doc.get("sanction_letter_path")
+    letter = sanction_store.key_from_path(file_path) or file_path
+    cached = (sanction_doc.get("telegram_notifications") or {}).get("sanction_file") or {}
+    cached_file_id = cached.get("file_id") if cached.get("letter") == letter else None
+    file_name = f"sanction_letter_{sanction_doc.get('loan_id') or 'loan'}.pdf"
+
+    file_id = None
+    if cached_file_id:
+        file_id = await _send_telegram_document(chat_id, file_path, caption, file_id=cached_file_id)
+    if file_id is None:
+        file_id = await _send_telegram_document(chat_id, file_path, caption, file_name=file_name)
+    if file_id is None:
         return False
 
+    if file_id and file_id != cached_file_id:
+        await mongodb.loan_applications.update_one(
+            {"application_id": sanction_doc.get("application_id")},
+            {"$set": {"telegram_notifications.sanction_file": {"letter": letter, "file_id": file_id}}},
+        )
+    return True
+
 
 def _safe_text(value: Any) -> str:
     if value is None:
@@ -222,6 +268,7 @@ async def _get_or_create_user_by_email(email: str) -> Dict[str, Any]:
                 }
             },
         )
+        invalidate_user(existing_user["user_id"])
         existing_user["is_verified"] = True
         return existing_user
 
@@ -268,8 +315,7 @@ def _loan_type_label(loan_type: Optional[str]) -> str:
 
 
 async def _build_history_text(user_id: str) -> str:
-    cursor = mongodb.loan_applications.find({"user_id": user_id}).sort("updated_at", -1).limit(12)
-    applications = await cursor.to_list(length=12)
+    applications = await application_store.list_for_user(user_id, projection="status", sort_field="updated_at", limit=12)
 
     if not applications:
         return "No applications found yet. Start with /new personal|home|business."
@@ -367,6 +413,7 @@ async def _find_latest_sanction_for_user(user_id: str) -> Dict[str, Any]:
             "loan_id": 1,
             "loan_type": 1,
             "sanction_letter_path": 1,
+            "telegram_notifications.sanction_file": 1,
             "updated_at": 1,
         },
         sort=[("updated_at", -1)],
@@ -380,10 +427,7 @@ async def _find_or_create_application(
     telegram_context: Dict[str, Any],
 ) -> Dict[str, Any]:
     if not force_new:
-        existing = await mongodb.loan_applications.find_one(
-            {"user_id": user.user_id, "status": "IN_PROGRESS"},
-            sort=[("updated_at", -1)],
-        )
+        existing = await application_store.latest_for_user(user.user_id, status="IN_PROGRESS")
         if existing:
             return existing
 
@@ -396,7 +440,7 @@ async def _find_or_create_application(
         loan_type=normalized_loan_type,
         user_email=user.email,
     )
-    result_state = run_workflow_stepwise(initial_state)
+    result_state = await arun_workflow_stepwise(initial_state)
 
     now = datetime.now().isoformat()
     app_doc = {
@@ -418,6 +462,7 @@ async def _find_or_create_application(
     }
 
     await mongodb.loan_applications.insert_one(app_doc)
+    await analytics_rollups.record_application_change(None, app_doc)
     return app_doc
 
 
@@ -849,9 +894,9 @@ async def handle_telegram_webhook(
             )
             return {"ok": True, "handled": "sanction_missing"}
 
-        sent = await _send_telegram_document(
-            chat_id=telegram_chat_id,
-            file_path=sanction_path,
+        sent = await _send_sanction_letter(
+            telegram_chat_id,
+            sanction_doc,
             caption=f"Sanction Letter - Loan ID: {sanction_loan_id or 'N/A'}",
         )
         if sent:
@@ -906,10 +951,7 @@ async def handle_telegram_webhook(
         return {"ok": True, "handled": "unlink"}
 
     if text.startswith("/status"):
-        app_doc = await mongodb.loan_applications.find_one(
-            {"user_id": current_user.user_id, "status": "IN_PROGRESS"},
-            sort=[("updated_at", -1)],
-        )
+        app_doc = await application_store.latest_for_user(current_user.user_id, status="IN_PROGRESS")
         if not app_doc:
             await _send_telegram_message(telegram_chat_id, "No active application. Use /new personal|home|business.")
             return {"ok": True, "handled": "status_no_application"}
@@ -954,8 +996,15 @@ async def handle_telegram_webhook(
         telegram_context=telegram_context,
     )
 
-    response = await chat_with_workflow(
+    # Only this turn's replies are sent back, so the stored conversation is not loaded
+    turn_doc = await _load_user_application(
+        app_doc["application_id"],
+        current_user,
+        message_window=APPEND_ONLY_MESSAGE_WINDOW,
+    )
+    response = await _process_chat_turn(
         application_id=app_doc["application_id"],
+        app_doc=turn_doc,
         chat_message=ChatMessage(
             message=text,
             metadata={
@@ -1009,9 +1058,9 @@ async def handle_telegram_webhook(
     )
 
     if sanction_should_send:
-        sent = await _send_telegram_document(
-            chat_id=telegram_chat_id,
-            file_path=sanction_path,
+        sent = await _send_sanction_letter(
+            telegram_chat_id,
+            {**latest_app_doc, "loan_id": sanction_loan_id},
             caption=f"Sanction Letter - Loan ID: {sanction_loan_id}",
         )
         if sent:
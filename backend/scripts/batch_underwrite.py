@@ -0,0 +1,78 @@
+"""
+Batch underwriting CLI for bulk pre-approved offers
+
+Reads applicant records (JSONL or CSV), runs the deterministic engines on a
+process pool and streams decisions back out (JSONL or CSV).
+
+Usage:
+    python scripts/batch_underwrite.py --input applicants.jsonl --output offers.jsonl
+    python scripts/batch_underwrite.py --input applicants.csv --output - --output-format csv --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from services.batch_underwriting import (
+    SUPPORTED_FORMATS,
+    detect_format,
+    format_decisions,
+    iter_applicant_records,
+    run_batch,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate pre-approved offers for a file of applicants")
+    parser.add_argument("--input", required=True, help="Applicant file (.jsonl or .csv), '-' for stdin")
+    parser.add_argument("--output", default="-", help="Decision file, '-' for stdout (default)")
+    parser.add_argument("--input-format", choices=SUPPORTED_FORMATS, help="Defaults to the input file extension")
+    parser.add_argument("--output-format", choices=SUPPORTED_FORMATS, help="Defaults to the output file extension")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Records per worker task (default: 500)")
+    args = parser.parse_args()
+
+    input_format = detect_format(args.input, args.input_format)
+    output_format = detect_format(args.output, args.output_format)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+
+    counts = Counter()
+
+    def counted(decisions):
+        for decision in decisions:
+            counts[decision["decision"]] += 1
+            yield decision
+
+    started = time.perf_counter()
+    try:
+        decisions = run_batch(
+            iter_applicant_records(source, input_format),
+            workers=args.workers,
+            chunk_size=args.chunk_size
+        )
+        for chunk in format_decisions(counted(decisions), output_format):
+            target.write(chunk)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    summary = ", ".join(f"{decision}={count}" for decision, count in sorted(counts.items()))
+    print(
+        f"Underwrote {total:,} applicants in {elapsed:.1f}s "
+        f"({total / elapsed if elapsed else 0:,.0f}/s): {summary}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: per-loan amortization loop vs batch NumPy amortization
+
+Usage:
+    python scripts/benchmark_amortization.py --loans 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from engines.emi_engine import EMIEngine
+
+TENURE_CHOICES = [12, 24, 36, 48, 60, 84, 120, 180, 240, 300, 360]
+RATE_CHOICES = [10.5, 11.25, 11.5, 12.0, 13.75, 14.0, 15.5, 18.0]
+
+
+def build_loan_book(count: int, seed: int):
+    rng = random.Random(seed)
+    base_date = datetime(2026, 1, 1, 10, 30)
+
+    principals = [round(rng.uniform(50_000, 7_500_000), 2) for _ in range(count)]
+    rates = [rng.choice(RATE_CHOICES) for _ in range(count)]
+    tenures = [rng.choice(TENURE_CHOICES) for _ in range(count)]
+    dates = [base_date + timedelta(days=rng.randint(0, 730)) for _ in range(count)]
+    return principals, rates, tenures, dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch amortization against the per-loan loop")
+    parser.add_argument("--loans", type=int, default=100_000, help="Loan book size (default: 100000)")
+    parser.add_argument("--verify", type=int, default=2_000, help="Loans cross-checked row by row (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    principals, rates, tenures, dates = build_loan_book(args.loans, args.seed)
+    total_rows = sum(tenures)
+    print(f"Loan book: {args.loans:,} loans, {total_rows:,} installments")
+
+    started = time.perf_counter()
+    for index in range(args.loans):
+        EMIEngine.generate_amortization_schedule(principals[index], rates[index], tenures[index], dates[index])
+    loop_seconds = time.perf_counter() - started
+    print(f"Per-loan loop : {loop_seconds:8.2f}s  ({total_rows / loop_seconds:,.0f} rows/s)")
+
+    started = time.perf_counter()
+    batch = EMIEngine.generate_amortization_schedules_batch(principals, rates, tenures, dates)
+    batch_seconds = time.perf_counter() - started
+    print(f"Batch (NumPy) : {batch_seconds:8.2f}s  ({total_rows / batch_seconds:,.0f} rows/s)")
+    print(f"Speedup       : {loop_seconds / batch_seconds:8.1f}x")
+
+    mismatches = 0
+    for index in range(min(args.verify, args.loans)):
+        expected = EMIEngine.generate_amortization_schedule(principals[index], rates[index], tenures[index], dates[index])
+        if EMIEngine.batch_schedule_rows(batch, index) != expected:
+            mismatches += 1
+    print(f"Verified {min(args.verify, args.loans):,} loans row by row: {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
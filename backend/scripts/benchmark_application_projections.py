@@ -0,0 +1,127 @@
+"""
+Benchmark: Mongo bytes per request with and without ApplicationStore projections
+
+Builds application documents like the ones a long chat produces and compares the
+BSON size of what each route read before (whole document) and after (named
+projection + $slice). Projections are applied locally, supporting the operators
+services/application_store.py uses, so no MongoDB server is needed.
+
+Usage:
+    python scripts/benchmark_application_projections.py --messages 200 --tenure 60
+"""
+
+import argparse
+import copy
+import os
+import sys
+
+import bson
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from scripts.benchmark_chat_persistence import build_application_doc
+from services.application_store import APPEND_ONLY_MESSAGE_WINDOW, ApplicationStore
+
+
+def _expression(doc: dict, expression):
+    """$size / $ifNull over top-level fields - enough for message_page"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if isinstance(expression, dict) and "$size" in expression:
+        return len(_expression(doc, expression["$size"]))
+    if isinstance(expression, dict) and "$ifNull" in expression:
+        value, fallback = expression["$ifNull"]
+        resolved = _expression(doc, value)
+        return fallback if resolved is None else resolved
+    return expression
+
+
+def _slice(values: list, window):
+    if isinstance(window, list):
+        skip, count = window
+        return values[skip:skip + count]
+    if window >= 0:
+        return values[:window]
+    return values[window:]
+
+
+def apply_projection(doc: dict, projection: dict) -> dict:
+    """Local equivalent of a find() projection for the forms ApplicationStore builds"""
+    plain = {key: value for key, value in projection.items() if key != "_id"}
+    inclusive = any(
+        value == 1 or (isinstance(value, dict) and "$slice" not in value)
+        for value in plain.values()
+    )
+
+    if inclusive:
+        result = {}
+        for key, value in plain.items():
+            if isinstance(value, dict) and "$slice" in value:
+                if key in doc:
+                    result[key] = _slice(doc[key], value["$slice"])
+            elif isinstance(value, dict):
+                result[key] = _expression(doc, value)
+            elif key in doc:
+                result[key] = doc[key]
+    else:
+        result = copy.deepcopy(doc)
+        for key, value in plain.items():
+            parent, _, child = key.partition(".")
+            if isinstance(value, dict) and "$slice" in value:
+                if parent in result:
+                    result[parent] = _slice(result[parent], value["$slice"])
+            elif child:
+                result.get(parent, {}).pop(child, None)
+            else:
+                result.pop(key, None)
+
+    if projection.get("_id", 1) and "_id" in doc:
+        result["_id"] = doc["_id"]
+    return result
+
+
+def size(docs) -> int:
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare route read sizes with and without projections")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per application")
+    parser.add_argument("--tenure", type=int, default=60)
+    parser.add_argument("--applications", type=int, default=10, help="Applications in the user's list view")
+    parser.add_argument("--message-limit", type=int, default=20, help="message_limit used for the detail read")
+    args = parser.parse_args()
+
+    doc = build_application_doc(args.messages, args.tenure)
+    doc["_id"] = bson.ObjectId()
+    doc["source_channel"] = "web"
+    doc["channel_metadata"] = {"channel": "web"}
+    apps = [dict(doc, application_id=f"app-{index}", _id=bson.ObjectId()) for index in range(args.applications)]
+
+    store = ApplicationStore()
+    chat_turn = store.projection("chat_turn")
+    page = {
+        "_id": 0,
+        "message_count": {"$size": {"$ifNull": ["$conversation_messages", []]}},
+        "conversation_messages": {"$slice": -50},
+    }
+
+    cases = [
+        ("POST /chat", [doc], [apply_projection(doc, chat_turn)]),
+        ("POST /chat/stream, Telegram", [doc], [apply_projection(doc, store.projection("chat_turn", APPEND_ONLY_MESSAGE_WINDOW))]),
+        ("GET /applications/{id}", [doc], [apply_projection(doc, store.projection("detail"))]),
+        (f"  ?message_limit={args.message_limit}", [doc], [apply_projection(doc, store.projection("detail", args.message_limit))]),
+        ("GET /applications/{id}/messages", [doc], [apply_projection(doc, page)]),
+        (f"GET /applications ({args.applications})", apps, [apply_projection(app, store.projection("summary")) for app in apps]),
+        ("Telegram /status, /history", [doc], [apply_projection(doc, store.projection("status"))]),
+    ]
+
+    print(f"{args.messages} messages per application, {args.tenure}-month EMI schedule")
+    print(f"{'read':<34}{'before bytes':>14}{'after bytes':>13}{'saved':>8}")
+    for name, before, after in cases:
+        before_bytes, after_bytes = size(before), size(after)
+        print(f"{name:<34}{before_bytes:>14,}{after_bytes:>13,}{100 * (1 - after_bytes / before_bytes):>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
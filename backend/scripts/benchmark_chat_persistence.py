@@ -0,0 +1,135 @@
+"""
+Benchmark: full-state $set vs change-tracked update for a chat turn
+
+Builds an application waiting for offer acceptance with N conversation messages,
+replays one follow-up turn (user question + assistant answer) and measures the
+BSON size and encode time of the update sent to loan_applications both ways.
+
+Usage:
+    python scripts/benchmark_chat_persistence.py --messages 5 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import bson
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from routes.loans import _build_pipeline_progress, _workflow_state_from_document, _workflow_update_doc
+from workflows.state_tracking import StateChangeTracker
+from workflows.tools import generate_emi_schedule, generate_loan_offer
+
+FOLLOW_UP_ANSWER = (
+    "Your monthly EMI is fixed for the full tenure. The first installment is due one month "
+    "after disbursement, and you can prepay after six EMIs without any foreclosure charge."
+)
+
+
+def build_application_doc(message_count: int, tenure_months: int) -> dict:
+    offer = generate_loan_offer.invoke({
+        "loan_type": "personal_loan",
+        "principal": 500000,
+        "tenure_months": tenure_months,
+        "risk_segment": "LOW",
+        "age": 32,
+        "employment_type": "salaried",
+        "city_tier": 1,
+    })
+    emi_schedule = generate_emi_schedule.invoke({
+        "principal": offer["principal"],
+        "interest_rate": offer["interest_rate"],
+        "tenure_months": offer["tenure_months"],
+        "disbursement_date": datetime(2026, 3, 14).isoformat(),
+    })
+    messages = [
+        {
+            "role": "user" if index % 2 else "assistant",
+            "content": f"Message {index}: " + ("Could you explain that part of my offer again? " * 3),
+            "timestamp": datetime(2026, 3, 14, 10, 0, index % 60).isoformat(),
+        }
+        for index in range(message_count)
+    ]
+    doc = {
+        "application_id": "app-benchmark",
+        "user_id": "user-benchmark",
+        "loan_type": "personal_loan",
+        "status": "IN_PROGRESS",
+        "owner_email": "customer@example.com",
+        "workflow_stage": "await_acceptance",
+        "application_data": {
+            "application_id": "app-benchmark", "email": "customer@example.com",
+            "aadhaar": "123456789012", "pan": "ABCDE1234F", "monthly_income": 85000.0,
+            "requested_amount": 500000.0, "tenure_months": tenure_months, "age": 32,
+            "employment_type": "salaried", "employment_years": 6, "city_tier": 1,
+        },
+        "kyc_data": {"verified": True, "applicant_name": "Benchmark Customer", "dob": "1994-02-11"},
+        "credit_data": {"credit_score": 782, "active_loans": 1, "bureau_flags": [], "name": "Benchmark Customer"},
+        "policy_validation": {"eligible": True, "violations": [], "policy_version": "1.0"},
+        "affordability_result": {"affordable": True, "foir_requested": 0.31, "max_eligible_amount": 1250000.0},
+        "risk_assessment": {"risk_score": 0.21, "risk_segment": "LOW", "recommendation": "APPROVE"},
+        "loan_offer": offer,
+        "emi_schedule": emi_schedule,
+        "loan_id": None,
+        "sanction_letter_path": None,
+        "conversation_messages": messages,
+        "is_eligible": True,
+        "is_accepted": False,
+        "rejection_reason": None,
+        "created_at": datetime(2026, 3, 14, 10, 0).isoformat(),
+        "updated_at": datetime(2026, 3, 14, 10, 5).isoformat(),
+    }
+    # Round-trip through BSON so the baseline looks exactly like a document read from Mongo
+    doc = bson.decode(bson.encode(doc))
+    doc["progress"] = _build_pipeline_progress(_workflow_state_from_document("app-benchmark", "user-benchmark", doc), "IN_PROGRESS")
+    return doc
+
+
+def replay_follow_up_turn(doc: dict) -> tuple:
+    """Same mutations chat_with_workflow makes for a follow-up question; returns (full, tracked) updates"""
+    changes = StateChangeTracker(doc)
+    state = _workflow_state_from_document("app-benchmark", "user-benchmark", doc)
+    now = datetime.now().isoformat()
+    state["messages"].append({"role": "user", "content": "What is my EMI?", "timestamp": now, "metadata": {}})
+    state["messages"].append({"role": "assistant", "content": FOLLOW_UP_ANSWER, "timestamp": now})
+
+    update_doc = _workflow_update_doc(state)
+    update_doc["status"] = "IN_PROGRESS"
+    update_doc["progress"] = _build_pipeline_progress(state, "IN_PROGRESS")
+
+    return {"$set": update_doc}, changes.update_for(update_doc)
+
+
+def encode_ms(update: dict, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        bson.encode(update)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes written per chat turn: full $set vs tracked delta")
+    parser.add_argument("--messages", type=int, nargs="+", default=[5, 200], help="Conversation lengths to test")
+    parser.add_argument("--tenure", type=int, default=60)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"Follow-up turn on an offer with a {args.tenure}-month EMI schedule")
+    print(f"{'messages':>9}{'full bytes':>12}{'delta bytes':>13}{'full enc ms':>13}{'delta enc ms':>14}{'saved':>8}")
+    for message_count in args.messages:
+        full, tracked = replay_follow_up_turn(build_application_doc(message_count, args.tenure))
+        full_bytes = len(bson.encode(full))
+        tracked_bytes = len(bson.encode(tracked))
+        print(
+            f"{message_count:>9}{full_bytes:>12,}{tracked_bytes:>13,}"
+            f"{encode_ms(full, args.iterations):>13.3f}{encode_ms(tracked, args.iterations):>14.3f}"
+            f"{100 * (1 - tracked_bytes / full_bytes):>7.1f}%"
+        )
+        print(f"{'':>9}  delta: $set {sorted(tracked.get('$set', {}))}, $push {len(tracked['$push']['conversation_messages']['$each'])} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark: outbound email throughput and OTP latency through the email dispatcher
+
+Starts a local SMTP sink (accepts EHLO/AUTH PLAIN/MAIL/RCPT/DATA, answers each
+command after --latency-ms to stand in for a remote relay), queues --bulk decision
+mails and then --otp OTP mails, and runs three ways:
+- per-message:  a new SMTP connection and login per mail (the previous behaviour)
+- pooled-fifo:  pooled connections, OTP queued at bulk priority
+- pooled:       pooled connections, OTP ahead of bulk mail
+
+--fail-rate answers that share of messages with a transient 451 to exercise retries.
+
+Usage:
+    python scripts/benchmark_email_dispatch.py --bulk 500 --otp 20
+    python scripts/benchmark_email_dispatch.py --latency-ms 40 --fail-rate 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import settings
+from services.email_dispatch import PRIORITY_BULK, PRIORITY_OTP, email_dispatcher, smtp_pool
+from services.email_service import email_service
+
+
+class SMTPSink:
+    """Minimal SMTP server on its own thread and event loop; counts accepted messages"""
+
+    def __init__(self, latency_ms: float, fail_rate: float):
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.port = None
+        self.connections = 0
+        self.messages = 0
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True).start()
+        self._ready.wait()
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def _reply(self, writer, text: str):
+        await asyncio.sleep(self.latency)
+        writer.write(text.encode("ascii") + b"\r\n")
+        await writer.drain()
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        await self._reply(writer, "220 sink ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("ascii", "replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    await self._reply(writer, "250-sink\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+                elif command.startswith("AUTH"):
+                    await self._reply(writer, "235 Authenticated")
+                elif command == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    if random.random() < self.fail_rate:
+                        await self._reply(writer, "451 Try again later")
+                    else:
+                        self.messages += 1
+                        await self._reply(writer, "250 Queued")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    break
+                else:
+                    await self._reply(writer, "250 OK")
+        finally:
+            writer.close()
+
+
+async def run_mode(mode: str, bulk: int, otp: int) -> tuple:
+    settings.SMTP_CONNECTION_MAX_MESSAGES = 1 if mode == "per-message" else 1000
+    otp_priority = PRIORITY_BULK if mode == "pooled-fifo" else PRIORITY_OTP
+    opened_before = smtp_pool.opened
+    email_dispatcher.start()
+
+    started = time.perf_counter()
+    bulk_sends = [
+        asyncio.create_task(email_service.send_email(
+            to_email=f"customer{index}@example.com",
+            subject=f"Loan Decision Update: app-{index}",
+            body_text="Your loan request has been processed.\n" * 20,
+        ))
+        for index in range(bulk)
+    ]
+    await asyncio.sleep(0)  # Bulk mail is queued before the OTP requests arrive
+
+    async def request_otp(index: int) -> float:
+        requested = time.perf_counter()
+        await email_service.send_email(
+            to_email=f"otp{index}@example.com",
+            subject="Your NBFC Loan Platform OTP",
+            body_text=f"Your OTP is: {index:06d}",
+            priority=otp_priority,
+        )
+        return (time.perf_counter() - requested) * 1000
+
+    otp_ms = sorted(await asyncio.gather(*(request_otp(index) for index in range(otp))))
+    results = await asyncio.gather(*bulk_sends)
+    elapsed = time.perf_counter() - started
+    await email_dispatcher.stop()
+    return elapsed, sum(results), otp_ms, smtp_pool.opened - opened_before
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Email dispatcher throughput and OTP latency against a local SMTP sink")
+    parser.add_argument("--bulk", type=int, default=500, help="Decision mails queued per mode")
+    parser.add_argument("--otp", type=int, default=20, help="OTP mails requested after the bulk mail")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Sink delay before each reply")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of messages answered with 451")
+    parser.add_argument("--modes", nargs="+", default=["per-message", "pooled-fifo", "pooled"],
+                        choices=["per-message", "pooled-fifo", "pooled"])
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.latency_ms, args.fail_rate)
+    sink.start()
+    settings.RESEND_API_KEY = ""
+    settings.SMTP_HOST = "127.0.0.1"
+    settings.SMTP_PORT = sink.port
+    settings.SMTP_USERNAME = "benchmark"
+    settings.SMTP_PASSWORD = "benchmark"
+    settings.SMTP_FROM_EMAIL = "noreply@example.com"
+    settings.SMTP_USE_TLS = False
+    settings.SMTP_USE_SSL = False
+    settings.EMAIL_QUEUE_SIZE = max(settings.EMAIL_QUEUE_SIZE, args.bulk)
+    settings.EMAIL_RETRY_BACKOFF_SECONDS = 0.05
+
+    print(f"{args.bulk} bulk + {args.otp} OTP mails, {settings.EMAIL_DISPATCH_WORKERS} workers, "
+          f"{args.latency_ms:.0f} ms per SMTP reply, {args.fail_rate:.0%} transient failures")
+    print(f"{'mode':<13}{'wall':>9}{'mail/s':>9}{'sent':>7}{'conns':>7}{'OTP p50':>10}{'OTP max':>10}")
+    for mode in args.modes:
+        elapsed, sent, otp_ms, opened = await run_mode(mode, args.bulk, args.otp)
+        p50 = otp_ms[len(otp_ms) // 2] if otp_ms else 0.0
+        worst = otp_ms[-1] if otp_ms else 0.0
+        rate = (args.bulk + args.otp) / elapsed
+        print(f"{mode:<13}{elapsed:>8.2f}s{rate:>9.0f}{sent:>7}{opened:>7}{p50:>8.0f}ms{worst:>8.0f}ms")
+    print(f"Sink accepted {sink.messages} messages over {sink.connections} connections; "
+          f"dispatcher retries: {email_dispatcher.retries}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+Benchmark: per-message latency of Resend/Telegram calls with and without the shared HTTP clients
+
+Starts a local HTTPS stub of both APIs (self-signed certificate, trusted through
+SSL_CERT_FILE) and sends the same messages two ways:
+- per-call:  a new httpx.AsyncClient per message (the previous behaviour: TCP + TLS
+             handshake every time)
+- shared:    the app-scoped clients from services.http_clients (keep-alive pool)
+
+Each mode runs --messages sequential sends (latency) and then the same number with
+--concurrency senders (throughput). On a real network every handshake also costs
+extra round trips, so the gap grows with distance to the API.
+
+Usage:
+    python scripts/benchmark_http_clients.py --messages 300 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import ssl
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import settings
+from services.http_clients import http_clients
+
+BOT_TOKEN = "123456:benchmark"
+
+
+def write_certificate(directory: str) -> tuple:
+    """Self-signed certificate for 127.0.0.1; returns (cert_path, key_path)"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "stub.pem")
+    key_path = os.path.join(directory, "stub.key")
+    with open(cert_path, "wb") as handle:
+        handle.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as handle:
+        handle.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    return cert_path, key_path
+
+
+class StubAPI:
+    """HTTPS stub of POST /emails (Resend) and /bot<token>/sendMessage (Telegram) on its own thread"""
+
+    def __init__(self, cert_path: str, key_path: str):
+        self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.ssl_context.load_cert_chain(cert_path, key_path)
+        self.port = None
+        self.connections = set()
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True).start()
+        self._ready.wait()
+
+    async def _serve(self):
+        async def resend(request: web.Request) -> web.Response:
+            self.connections.add(request.transport)
+            await request.read()
+            return web.json_response({"id": "email-benchmark"})
+
+        async def telegram(request: web.Request) -> web.Response:
+            self.connections.add(request.transport)
+            await request.read()
+            return web.json_response({"ok": True, "result": {"message_id": 1}})
+
+        app = web.Application()
+        app.router.add_post("/emails", resend)
+        app.router.add_post(f"/bot{BOT_TOKEN}/sendMessage", telegram)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=self.ssl_context)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await asyncio.Event().wait()
+
+
+def message(index: int) -> tuple:
+    """Alternate Telegram replies and Resend emails: (client name, path, json payload)"""
+    if index % 2:
+        return "resend", "/emails", {
+            "from": "noreply@example.com",
+            "to": [f"customer{index}@example.com"],
+            "subject": f"Loan Decision Update: app-{index}",
+            "text": "Your loan request has been processed.",
+        }
+    return "telegram", f"/bot{BOT_TOKEN}/sendMessage", {
+        "chat_id": str(index),
+        "text": "Sanction letter sent.",
+        "disable_web_page_preview": True,
+    }
+
+
+async def send(mode: str, index: int) -> float:
+    name, path, payload = message(index)
+    started = time.perf_counter()
+    if mode == "per-call":
+        base_url = settings.RESEND_API_BASE_URL if name == "resend" else settings.TELEGRAM_API_BASE_URL
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(f"{base_url}{path}", json=payload)
+    else:
+        response = await http_clients.get(name).post(path, json=payload)
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def run_mode(mode: str, messages: int, concurrency: int) -> tuple:
+    latencies = sorted([await send(mode, index) for index in range(messages)])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int):
+        async with semaphore:
+            await send(mode, index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(index) for index in range(messages)))
+    throughput = messages / (time.perf_counter() - started)
+    return latencies, throughput
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-message latency with and without shared HTTP clients")
+    parser.add_argument("--messages", type=int, default=300, help="Messages per mode (sequential, then concurrent)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent senders for the throughput run")
+    parser.add_argument("--modes", nargs="+", default=["per-call", "shared"], choices=["per-call", "shared"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = write_certificate(directory)
+        os.environ["SSL_CERT_FILE"] = cert_path
+        stub = StubAPI(cert_path, key_path)
+        stub.start()
+        settings.RESEND_API_BASE_URL = f"https://127.0.0.1:{stub.port}"
+        settings.TELEGRAM_API_BASE_URL = f"https://127.0.0.1:{stub.port}"
+        http_clients.start()
+
+        print(f"{args.messages} messages per mode (half Telegram, half Resend), HTTPS stub on 127.0.0.1, "
+              f"HTTP/2 {'on' if http_clients.http2 else 'off'}")
+        print(f"{'mode':<10}{'p50':>9}{'p99':>9}{'conns':>8}{'msg/s @' + str(args.concurrency):>12}")
+        try:
+            for mode in args.modes:
+                before = len(stub.connections)
+                latencies, throughput = await run_mode(mode, args.messages, args.concurrency)
+                p50 = latencies[len(latencies) // 2]
+                p99 = latencies[int(len(latencies) * 0.99)]
+                opened = len(stub.connections) - before
+                print(f"{mode:<10}{p50:>7.2f}ms{p99:>7.2f}ms{opened:>8}{throughput:>12.0f}")
+        finally:
+            await http_clients.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
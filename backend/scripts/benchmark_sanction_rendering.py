@@ -0,0 +1,136 @@
+"""
+Benchmark: event-loop lag while N offer acceptances render sanction letters at once
+
+Each acceptance runs the generate_sanction step three ways:
+- inline:  generate_sanction_node on the event loop (blocks it for every render)
+- thread:  asyncio.to_thread(generate_sanction_node), the previous arun_workflow_stepwise path
+- pool:    agenerate_sanction_node, rendering on the SanctionLetterRenderer process pool
+
+A ticker task sleeps TICK_MS in a loop; lag is how late each wake-up is. The
+letters written are deleted afterwards.
+
+Usage:
+    python scripts/benchmark_sanction_rendering.py --acceptances 50
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import settings
+from services.pdf_rendering import sanction_renderer
+from workflows.loan_graph import agenerate_sanction_node, generate_sanction_node
+from workflows.tools import generate_emi_schedule, generate_loan_offer
+
+TICK_MS = 5
+
+
+def build_state() -> dict:
+    offer = generate_loan_offer.invoke({
+        "loan_type": "personal_loan",
+        "principal": 500000,
+        "tenure_months": 36,
+        "risk_segment": "LOW",
+        "age": 32,
+        "employment_type": "salaried",
+        "city_tier": 1,
+    })
+    emi_schedule = generate_emi_schedule.invoke({
+        "principal": offer["principal"],
+        "interest_rate": offer["interest_rate"],
+        "tenure_months": offer["tenure_months"],
+        "disbursement_date": datetime(2026, 3, 14).isoformat(),
+    })
+    return {
+        "application_id": "app-benchmark",
+        "user_id": "user-benchmark",
+        "loan_type": "personal_loan",
+        "stage": "generate_sanction",
+        "messages": [],
+        "application_data": {"email": "customer@example.com", "pan": "ABCDE1234F"},
+        "kyc_data": {"applicant_name": "Benchmark Customer"},
+        "loan_offer": offer,
+        "emi_schedule": emi_schedule,
+        "loan_id": None,
+        "sanction_letter_path": None,
+    }
+
+
+async def measure_lag(stop: asyncio.Event) -> list:
+    lags = []
+    interval = TICK_MS / 1000
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+    return lags
+
+
+async def run_mode(mode: str, base_state: dict, acceptances: int) -> tuple:
+    states = []
+    for _ in range(acceptances):
+        state = copy.deepcopy(base_state)
+        state["loan_id"] = str(uuid.uuid4())
+        states.append(state)
+
+    async def accept(state):
+        if mode == "inline":
+            return generate_sanction_node(state)
+        if mode == "thread":
+            return await asyncio.to_thread(generate_sanction_node, state)
+        return await agenerate_sanction_node(state)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(accept(state) for state in states))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = sorted(await ticker)
+
+    for state in results:
+        path = state.get("sanction_letter_path")
+        if path and os.path.exists(path):
+            os.remove(path)
+    rendered = sum(1 for state in results if state.get("sanction_letter_path"))
+    return elapsed, rendered, lags
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag during concurrent sanction letter rendering")
+    parser.add_argument("--acceptances", type=int, default=50, help="Concurrent acceptances per mode")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "pool"], choices=["inline", "thread", "pool"])
+    args = parser.parse_args()
+
+    # Wait for every letter so each mode renders the same work
+    settings.PDF_RENDER_WAIT_SECONDS = 600
+    settings.PDF_RENDER_QUEUE_SIZE = max(settings.PDF_RENDER_QUEUE_SIZE, args.acceptances)
+    base_state = build_state()
+    sanction_renderer.start()
+    # Warm the pool so process start-up is not charged to the first mode
+    await run_mode("pool", base_state, sanction_renderer.workers)
+
+    print(f"{args.acceptances} concurrent acceptances, {os.cpu_count()} CPUs, "
+          f"{sanction_renderer.workers} render workers, {TICK_MS} ms ticker")
+    print(f"{'mode':<8}{'wall':>9}{'letters':>9}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+    try:
+        for mode in args.modes:
+            elapsed, rendered, lags = await run_mode(mode, base_state, args.acceptances)
+            p50 = lags[len(lags) // 2] if lags else 0.0
+            p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+            worst = lags[-1] if lags else 0.0
+            print(f"{mode:<8}{elapsed:>8.2f}s{rendered:>9}{p50:>8.1f}ms{p99:>8.1f}ms{worst:>8.1f}ms")
+    finally:
+        await sanction_renderer.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
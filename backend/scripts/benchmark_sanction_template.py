@@ -0,0 +1,102 @@
+"""
+Benchmark: per-letter sanction letter render time, cached template vs rebuilt
+
+- rebuilt: a new SanctionLetterTemplate per letter, i.e. the previous behaviour
+  (sample stylesheet, custom styles and every static paragraph parsed each time)
+- cached:  the per-process template from sanction_letter_template()
+
+Letters are built into memory (no disk I/O) so only rendering is timed, and the
+two paths are checked to produce identical PDFs.
+
+Usage:
+    python scripts/benchmark_sanction_template.py --letters 200
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate
+
+from engines.pdf_engine import SanctionLetterTemplate, sanction_letter_template
+from workflows.tools import generate_emi_schedule, generate_loan_offer
+
+
+def letter_args() -> dict:
+    offer = generate_loan_offer.invoke({
+        "loan_type": "personal_loan",
+        "principal": 500000,
+        "tenure_months": 36,
+        "risk_segment": "LOW",
+        "age": 32,
+        "employment_type": "salaried",
+        "city_tier": 1,
+    })
+    emi_schedule = generate_emi_schedule.invoke({
+        "principal": offer["principal"],
+        "interest_rate": offer["interest_rate"],
+        "tenure_months": offer["tenure_months"],
+        "disbursement_date": datetime(2026, 3, 14).isoformat(),
+    })
+    return {
+        "loan_id": "loan-benchmark",
+        "application_data": {"application_id": "app-benchmark", "email": "customer@example.com"},
+        "offer_data": offer,
+        "user_data": {"user_id": "user-benchmark", "full_name": "Benchmark Customer", "email": "customer@example.com"},
+        "emi_schedule_summary": emi_schedule["summary"],
+        "issue_date": datetime(2026, 3, 14),
+    }
+
+
+def render(template: SanctionLetterTemplate, args: dict) -> bytes:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
+    doc.build(template.flowables(**args))
+    return buffer.getvalue()
+
+
+def time_letters(letters: int, args: dict, cached: bool) -> list:
+    samples = []
+    for _ in range(letters):
+        started = time.perf_counter()
+        render(sanction_letter_template() if cached else SanctionLetterTemplate(), args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sanction letter render time with and without the cached template")
+    parser.add_argument("--letters", type=int, default=200, help="Letters rendered per path")
+    args = parser.parse_args()
+
+    rl_config.invariant = 1  # Deterministic output, so the two paths can be compared byte for byte
+    letter = letter_args()
+
+    started = time.perf_counter()
+    template = sanction_letter_template()
+    print(f"Template built once in {(time.perf_counter() - started) * 1000:.1f} ms")
+    identical = render(SanctionLetterTemplate(), letter) == render(template, letter)
+    print(f"Rebuilt and cached paths produce identical PDFs: {identical}")
+
+    print(f"\n{args.letters} letters per path, milliseconds per letter")
+    print(f"{'path':<10}{'mean':>8}{'p50':>8}{'p99':>8}")
+    results = {}
+    for label, cached in (("rebuilt", False), ("cached", True)):
+        samples = sorted(time_letters(args.letters, letter, cached))
+        results[label] = statistics.mean(samples)
+        print(f"{label:<10}{results[label]:>8.2f}{samples[len(samples) // 2]:>8.2f}{samples[int(len(samples) * 0.99)]:>8.2f}")
+    print(f"Saved {results['rebuilt'] - results['cached']:.2f} ms per letter "
+          f"({(1 - results['cached'] / results['rebuilt']) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
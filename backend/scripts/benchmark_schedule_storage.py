@@ -0,0 +1,91 @@
+"""
+Benchmark: legacy list-of-rows vs compact EMI schedule storage on loan documents
+
+Measures BSON document size and read latency (decode + rebuild rows + summary),
+which is what GET /loans/{loan_id}/emi-schedule pays per request.
+
+Usage:
+    python scripts/benchmark_schedule_storage.py --tenure 240 --paid 12
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import bson
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from engines.emi_engine import emi_engine
+
+
+def build_loan_doc(schedule) -> dict:
+    return {
+        "loan_id": "loan-benchmark",
+        "application_id": "app-benchmark",
+        "user_id": "user-benchmark",
+        "loan_type": "home_loan",
+        "status": "ACTIVE",
+        "emi_schedule": schedule,
+    }
+
+
+def read_schedule(encoded: bytes) -> dict:
+    loan_doc = bson.decode(encoded)
+    total_paid = 0
+    rows = 0
+    for inst in emi_engine.iter_stored_schedule(loan_doc.get("emi_schedule")):
+        rows += 1
+        if inst.get("status") == "PAID":
+            total_paid += inst["emi_amount"]
+    return {"rows": rows, "total_paid": total_paid}
+
+
+def time_reads(encoded: bytes, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        read_schedule(encoded)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare EMI schedule storage formats")
+    parser.add_argument("--principal", type=float, default=4_500_000)
+    parser.add_argument("--rate", type=float, default=8.75)
+    parser.add_argument("--tenure", type=int, default=240)
+    parser.add_argument("--paid", type=int, default=12, help="Installments marked as paid")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    schedule = emi_engine.generate_amortization_schedule(
+        args.principal, args.rate, args.tenure, datetime(2026, 3, 14, 11, 25, 7, 123456)
+    )
+    # Round-trip through BSON first, exactly like a schedule read back from loan_applications
+    schedule = bson.decode(bson.encode({"rows": schedule}))["rows"]
+    for inst in schedule[:args.paid]:
+        inst["status"] = "PAID"
+        inst["paid_date"] = inst["due_date"]
+        inst["payment_transaction_id"] = f"txn-{inst['month']:04d}"
+
+    legacy = bson.encode(build_loan_doc(schedule))
+    compact = bson.encode(build_loan_doc(
+        emi_engine.compact_schedule(schedule, args.principal, args.rate, args.tenure)
+    ))
+
+    assert emi_engine.expand_schedule(bson.decode(compact)["emi_schedule"]) == schedule
+    assert read_schedule(legacy) == read_schedule(compact)
+
+    legacy_ms = time_reads(legacy, args.iterations)
+    compact_ms = time_reads(compact, args.iterations)
+
+    print(f"Schedule: {args.tenure} installments, {args.paid} paid")
+    print(f"{'format':<10}{'doc bytes':>12}{'read ms':>12}")
+    print(f"{'legacy':<10}{len(legacy):>12,}{legacy_ms:>12.3f}")
+    print(f"{'compact':<10}{len(compact):>12,}{compact_ms:>12.3f}")
+    print(f"Size reduction: {100 * (1 - len(compact) / len(legacy)):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: local bloom filter vs Redis for the JWT blacklist check
+
+1. False-positive rate: fills a BloomFilter with N blacklisted jtis and probes
+   fresh jtis, at the configured fill and at 2x (before a grow-rebuild kicks in).
+2. Latency: times TokenBlacklistFilter.is_blacklisted for valid tokens (filter
+   miss, no Redis) against the plain Redis EXISTS check verify_token used to make.
+   Uses REDIS_URL when reachable, otherwise the in-memory stand-in (which has no
+   network round trip, so it understates the saving).
+
+Usage:
+    python scripts/benchmark_token_blacklist.py --blacklisted 100000 --probes 200000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from auth.token_blacklist import BloomFilter, TokenBlacklistFilter
+from config import settings
+from database import redis_client
+
+
+def measure_false_positive_rate(capacity: int, fill: int, probes: int, rate: float) -> float:
+    bloom = BloomFilter(capacity, rate)
+    for _ in range(fill):
+        bloom.add(str(uuid.uuid4()))
+    hits = sum(str(uuid.uuid4()) in bloom for _ in range(probes))
+    return hits / probes
+
+
+async def time_checks(check, token_ids) -> tuple:
+    samples = []
+    for token_id in token_ids:
+        started = time.perf_counter()
+        await check(token_id)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="JWT blacklist filter FPR and latency")
+    parser.add_argument("--blacklisted", type=int, default=settings.JWT_BLACKLIST_FILTER_CAPACITY)
+    parser.add_argument("--probes", type=int, default=200000, help="Fresh jtis probed for the FPR")
+    parser.add_argument("--checks", type=int, default=5000, help="Timed checks per path")
+    parser.add_argument("--seed-redis", type=int, default=2000, help="Blacklisted keys written to Redis for the latency run")
+    args = parser.parse_args()
+
+    rate = settings.JWT_BLACKLIST_FILTER_FALSE_POSITIVE_RATE
+    bloom = BloomFilter(args.blacklisted, rate)
+    print(f"Filter for {args.blacklisted:,} jtis at target FPR {rate}: "
+          f"{len(bloom._bits) / 1024:,.0f} KiB, {bloom.hash_count} hashes")
+    for fill in (args.blacklisted, 2 * args.blacklisted):
+        observed = measure_false_positive_rate(args.blacklisted, fill, args.probes, rate)
+        print(f"  fill {fill:>9,}: observed FPR {observed:.5f} ({args.probes:,} probes)")
+
+    await redis_client.connect()
+    backend = "Redis at " + settings.REDIS_URL if redis_client.is_connected else "in-memory stand-in"
+    try:
+        revoked = [f"benchmark-{uuid.uuid4()}" for _ in range(args.seed_redis)]
+        for token_id in revoked:
+            await redis_client.client.set(f"jwt_blacklist:{token_id}", "1", ex=300)
+
+        blacklist_filter = TokenBlacklistFilter()
+        await blacklist_filter.rebuild()
+
+        valid = [str(uuid.uuid4()) for _ in range(args.checks)]
+        redis_p50, redis_p99 = await time_checks(redis_client.is_token_blacklisted, valid)
+        filter_p50, filter_p99 = await time_checks(blacklist_filter.is_blacklisted, valid)
+        revoked_p50, revoked_p99 = await time_checks(blacklist_filter.is_blacklisted, revoked[:args.checks])
+
+        print(f"\nBlacklist check latency ({backend}), microseconds")
+        print(f"{'path':<34}{'p50':>10}{'p99':>10}")
+        print(f"{'Redis EXISTS (before)':<34}{redis_p50:>10.1f}{redis_p99:>10.1f}")
+        print(f"{'filter, valid token':<34}{filter_p50:>10.1f}{filter_p99:>10.1f}")
+        print(f"{'filter hit + Redis, revoked token':<34}{revoked_p50:>10.1f}{revoked_p99:>10.1f}")
+        print(f"Redis lookups for {args.checks:,} valid tokens: "
+              f"{blacklist_filter.redis_lookups - min(args.checks, len(revoked))}")
+    finally:
+        for token_id in revoked:
+            await redis_client.client.delete(f"jwt_blacklist:{token_id}")
+        await redis_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Query plan guard for CI / pre-deploy checks
+
+Applies the index registry (database_indexes.py) to the configured database, then
+explains every known route query shape and exits non-zero if any is planned as a
+collection scan.
+
+Usage:
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --skip-ensure   # check the indexes already present
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import mongodb
+from database_indexes import QUERY_SHAPES, ensure_indexes, find_collection_scans
+
+
+async def run(skip_ensure: bool) -> int:
+    await mongodb.connect()
+    try:
+        if not skip_ensure:
+            applied = await ensure_indexes(mongodb.db)
+            for collection_name, names in applied.items():
+                print(f"{collection_name:<22}{', '.join(names)}")
+
+        violations = await find_collection_scans(mongodb.db)
+    finally:
+        await mongodb.disconnect()
+
+    if violations:
+        print(f"\nCOLLSCAN in {len(violations)} of {len(QUERY_SHAPES)} query shapes:")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+
+    print(f"\nAll {len(QUERY_SHAPES)} query shapes use an index")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a known query shape would scan a whole collection")
+    parser.add_argument("--skip-ensure", action="store_true", help="Do not create missing indexes first")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.skip_ensure)))
+
+
+if __name__ == "__main__":
+    main()
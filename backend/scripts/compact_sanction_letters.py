@@ -0,0 +1,48 @@
+"""
+Compact the sanction letter store
+
+Moves letters saved under the old timestamped names into the content-addressed
+store (updating sanction_letter_path), then deletes letters no loan application
+references once they are older than the retention period, plus render leftovers.
+Run it from a scheduler on the host that owns SANCTION_LETTERS_DIR.
+
+Usage:
+    python scripts/compact_sanction_letters.py --dry-run
+    python scripts/compact_sanction_letters.py --retention-days 7
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import settings
+from database import mongodb
+from services.sanction_store import sanction_store
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Migrate and garbage-collect stored sanction letters")
+    parser.add_argument("--retention-days", type=int, default=settings.SANCTION_STORE_RETENTION_DAYS,
+                        help="Keep unreferenced letters younger than this")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching files")
+    args = parser.parse_args()
+
+    await mongodb.connect()
+    try:
+        started = time.perf_counter()
+        stats = await sanction_store.compact(mongodb.db, retention_days=args.retention_days, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - started
+
+        print(f"Compacted {sanction_store.root} in {elapsed:.1f}s{' (dry run)' if args.dry_run else ''}")
+        print(json.dumps(stats, indent=2))
+    finally:
+        await mongodb.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Load test: event-loop health while LLM follow-ups are slow
+
+Starts the stub Groq server (scripts/stub_llm_server.py) and a uvicorn worker
+exposing a cheap endpoint plus the follow-up LLM call in its blocking (invoke)
+and async (ainvoke) forms. While --llm-calls slow follow-ups are in flight it
+polls the cheap endpoint and reports its latency percentiles for each mode.
+
+Usage:
+    python scripts/load_test_llm.py --llm-calls 20 --llm-delay 2.0
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+STUB_PORT = _free_port()
+APP_PORT = _free_port()
+
+# ChatGroq reads these when workflows.loan_graph builds its client
+os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{STUB_PORT}"
+os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from scripts.stub_llm_server import start_stub_server
+from workflows.loan_graph import agenerate_follow_up_response, generate_follow_up_response
+
+
+def _follow_up_state() -> dict:
+    return {
+        "application_id": "load-test",
+        "user_id": "load-test",
+        "loan_type": "personal_loan",
+        "stage": "await_acceptance",
+        "application_data": {"monthly_income": 85000, "requested_amount": 500000, "tenure_months": 36},
+        "credit_data": {"credit_score": 780},
+        "risk_assessment": {"risk_segment": "LOW"},
+        "loan_offer": {"principal": 500000, "interest_rate": 11.5, "tenure_months": 36, "monthly_emi": 16488.0},
+        "messages": [],
+        "is_accepted": False,
+    }
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/follow-up/blocking")
+    async def follow_up_blocking():
+        # What chat_with_workflow used to do: sync invoke inside an async handler
+        return {"reply": generate_follow_up_response(_follow_up_state(), "What is my EMI?")}
+
+    @app.post("/follow-up/async")
+    async def follow_up_async():
+        return {"reply": await agenerate_follow_up_response(_follow_up_state(), "What is my EMI?")}
+
+    return app
+
+
+def start_app_server() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=APP_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(client: httpx.AsyncClient, mode: str, llm_calls: int, probe_interval: float) -> dict:
+    base = f"http://127.0.0.1:{APP_PORT}"
+    latencies = []
+
+    async def slow_call():
+        await client.post(f"{base}/follow-up/{mode}")
+
+    started = time.perf_counter()
+    llm_tasks = [asyncio.create_task(slow_call()) for _ in range(llm_calls)]
+    await asyncio.sleep(0.05)
+
+    while not all(task.done() for task in llm_tasks):
+        probe_started = time.perf_counter()
+        await client.get(f"{base}/health")
+        latencies.append((time.perf_counter() - probe_started) * 1000)
+        await asyncio.sleep(probe_interval)
+
+    await asyncio.gather(*llm_tasks)
+    return {
+        "mode": mode,
+        "wall_s": time.perf_counter() - started,
+        "probes": len(latencies),
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) if latencies else 0.0,
+        "max_ms": max(latencies) if latencies else 0.0,
+    }
+
+
+async def main_async(args):
+    stub = await start_stub_server(STUB_PORT, args.llm_delay)
+    server = start_app_server()
+    try:
+        limits = httpx.Limits(max_connections=args.llm_calls + 10)
+        async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+            results = [
+                await run_mode(client, mode, args.llm_calls, args.probe_interval)
+                for mode in ("blocking", "async")
+            ]
+    finally:
+        server.should_exit = True
+        await stub.cleanup()
+
+    print(f"{args.llm_calls} concurrent follow-ups, stub LLM delay {args.llm_delay:.1f}s")
+    print(f"{'mode':<10}{'wall s':>9}{'probes':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(
+            f"{result['mode']:<10}{result['wall_s']:>9.2f}{result['probes']:>8}"
+            f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /health latency while LLM calls are slow")
+    parser.add_argument("--llm-calls", type=int, default=20, help="Concurrent slow follow-up requests")
+    parser.add_argument("--llm-delay", type=float, default=2.0, help="Stub LLM latency per call (seconds)")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Delay between /health probes")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
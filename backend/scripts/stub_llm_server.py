@@ -0,0 +1,106 @@
+"""
+Local stub of the Groq chat-completions API for load tests
+
+Answers POST /openai/v1/chat/completions after a fixed delay, with or without
+streaming, so LLM latency can be simulated without network calls or API keys.
+Point ChatGroq at it with GROQ_API_BASE=http://127.0.0.1:<port>.
+
+Usage:
+    python scripts/stub_llm_server.py --port 8790 --delay 2.0
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from aiohttp import web
+
+STUB_REPLY = (
+    "Thanks for your question. Your application details are saved and your offer "
+    "terms are unchanged. You can review the EMI schedule on the loan details page."
+)
+
+
+def _completion_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+
+def build_app(delay_seconds: float, reply: str = STUB_REPLY, token_delay_seconds: float = 0.02) -> web.Application:
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        model = payload.get("model", "stub")
+        created = int(time.time())
+        completion_id = _completion_id()
+
+        await asyncio.sleep(delay_seconds)
+
+        if not payload.get("stream"):
+            return web.json_response({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(reply.split()), "total_tokens": 100 + len(reply.split())}
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        words = reply.split(" ")
+        for index, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if index == 0 else f" {word}"},
+                    "finish_reason": None
+                }]
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(token_delay_seconds)
+
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        }
+        await response.write(f"data: {json.dumps(final)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/openai/v1/chat/completions", chat_completions)
+    return app
+
+
+async def start_stub_server(port: int, delay_seconds: float, **kwargs) -> web.AppRunner:
+    """Start the stub on the running event loop; call runner.cleanup() to stop it"""
+    runner = web.AppRunner(build_app(delay_seconds, **kwargs))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Groq chat-completions server")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--delay", type=float, default=2.0, help="Seconds before each completion starts")
+    args = parser.parse_args()
+
+    web.run_app(build_app(args.delay), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
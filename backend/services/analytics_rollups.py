@@ -0,0 +1,318 @@
+"""
+Analytics Rollups
+Pre-aggregated counters behind the admin analytics endpoints. Every application or
+loan write applies the difference it makes to per-status, per-loan-type,
+per-risk-segment and per-day counters ($inc), so the dashboard reads a handful of
+small documents instead of grouping the whole collections on each refresh.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from database import mongodb
+
+logger = logging.getLogger(__name__)
+
+
+APPLICATION_TOTALS_ID = "applications:totals"
+LOAN_TOTALS_ID = "loans:totals"
+DAY_ID_PREFIX = "applications:day:"
+
+# Startup builds take a marker document here so only one worker scans the collections;
+# a marker older than this is treated as left by a crashed build
+BUILD_LOCK_COLLECTION = "analytics_rollups_build_lock"
+BUILD_LOCK_STALE_SECONDS = 3600
+
+# Application fields the counters derive from (add these to any projection a writer diffs)
+ROLLUP_PROJECTION = {
+    "_id": 0,
+    "status": 1,
+    "loan_type": 1,
+    "created_at": 1,
+    "risk_assessment.risk_segment": 1,
+    "risk_assessment.risk_score": 1,
+}
+
+DECIDED_STATUSES = ("APPROVED", "REJECTED", "DECLINED")
+
+# {(rollup document _id, counter field): amount}
+Counters = Dict[Tuple[str, str], float]
+
+
+def _key(value: Any) -> str:
+    """Counter field name segment; Mongo field names cannot contain dots or start with $"""
+    if value in (None, ""):
+        return "unknown"
+    return str(value).replace(".", "_").lstrip("$")
+
+
+def rollup_snapshot(document: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Copy of the rollup fields of an application, taken before a turn mutates it
+    Has the document's shape, so a snapshot of a snapshot is the same snapshot
+    """
+    if not document:
+        return {}
+    risk = document.get("risk_assessment") or {}
+    return {
+        "status": document.get("status"),
+        "loan_type": document.get("loan_type"),
+        "created_at": document.get("created_at"),
+        "risk_assessment": {
+            "risk_segment": risk.get("risk_segment"),
+            "risk_score": risk.get("risk_score"),
+        } if risk else None,
+    }
+
+
+def application_counters(document: Optional[Dict[str, Any]]) -> Counters:
+    """Counter increments one application contributes; {} for no application"""
+    values = rollup_snapshot(document)
+    if not values:
+        return {}
+
+    status = _key(values.get("status"))
+    loan_type = _key(values.get("loan_type"))
+    counters: Counters = {
+        (APPLICATION_TOTALS_ID, "total"): 1,
+        (APPLICATION_TOTALS_ID, f"status.{status}"): 1,
+        (APPLICATION_TOTALS_ID, f"loan_type.{loan_type}.total"): 1,
+    }
+    if values.get("status") == "APPROVED":
+        counters[(APPLICATION_TOTALS_ID, f"loan_type.{loan_type}.approved")] = 1
+
+    risk = values["risk_assessment"] or {}
+    if risk.get("risk_segment") is not None:
+        segment = _key(risk["risk_segment"])
+        counters[(APPLICATION_TOTALS_ID, f"risk_segment.{segment}.count")] = 1
+        counters[(APPLICATION_TOTALS_ID, f"risk_segment.{segment}.risk_score_sum")] = float(risk.get("risk_score") or 0)
+
+    created_at = str(values.get("created_at") or "")
+    if len(created_at) >= 10:
+        day_id = DAY_ID_PREFIX + created_at[:10]
+        counters[(day_id, "created")] = 1
+        counters[(day_id, f"status.{status}")] = 1
+        counters[(day_id, f"loan_type.{loan_type}")] = 1
+    return counters
+
+
+def loan_counters(loan: Optional[Dict[str, Any]]) -> Counters:
+    """Counter increments one loan contributes (only ACTIVE loans are counted)"""
+    if not loan or loan.get("status") != "ACTIVE":
+        return {}
+    return {
+        (LOAN_TOTALS_ID, "active"): 1,
+        (LOAN_TOTALS_ID, "disbursed_amount"): float(loan.get("disbursement_amount") or 0),
+    }
+
+
+def counter_delta(before: Counters, after: Counters) -> Counters:
+    """after - before, without the counters that did not move"""
+    delta: Counters = {}
+    for counter in set(before) | set(after):
+        amount = after.get(counter, 0) - before.get(counter, 0)
+        if amount:
+            delta[counter] = amount
+    return delta
+
+
+def rollup_documents(counters: Counters) -> Dict[str, Dict[str, Any]]:
+    """Group flat counters into nested rollup documents keyed by _id"""
+    documents: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    for (rollup_id, field), amount in counters.items():
+        node = documents[rollup_id]
+        *parents, leaf = field.split(".")
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = node.get(leaf, 0) + amount
+    for rollup_id, document in documents.items():
+        document["_id"] = rollup_id
+        if rollup_id.startswith(DAY_ID_PREFIX):
+            document["day"] = rollup_id[len(DAY_ID_PREFIX):]
+    return dict(documents)
+
+
+class AnalyticsRollups:
+    """Maintains and reads mongodb.analytics_rollups"""
+
+    async def apply(self, delta: Counters) -> None:
+        """$inc the changed counters; a failed write is logged, never raised into the request"""
+        if not delta:
+            return
+
+        increments: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for (rollup_id, field), amount in delta.items():
+            increments[rollup_id][field] = amount
+
+        operations = []
+        for rollup_id, fields in increments.items():
+            update: Dict[str, Any] = {"$inc": fields, "$set": {"updated_at": datetime.now().isoformat()}}
+            if rollup_id.startswith(DAY_ID_PREFIX):
+                update["$setOnInsert"] = {"day": rollup_id[len(DAY_ID_PREFIX):]}
+            operations.append(UpdateOne({"_id": rollup_id}, update, upsert=True))
+
+        try:
+            await mongodb.analytics_rollups.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Analytics rollup update failed (run scripts/rebuild_analytics_rollups.py): {e}")
+
+    async def record_application_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> None:
+        """
+        Apply an application write
+        before/after are application documents or rollup_snapshot()s; None for a new application
+        """
+        await self.apply(counter_delta(application_counters(before), application_counters(after)))
+
+    async def record_loan_created(self, loan: Dict[str, Any]) -> None:
+        await self.apply(loan_counters(loan))
+
+    async def _totals(self, rollup_id: str) -> Dict[str, Any]:
+        return await mongodb.analytics_rollups.find_one({"_id": rollup_id}) or {}
+
+    async def overview(self) -> Dict[str, Any]:
+        """Platform totals; recent applications are counted in whole days back to 7 days ago"""
+        applications = await self._totals(APPLICATION_TOTALS_ID)
+        loans = await self._totals(LOAN_TOTALS_ID)
+
+        first_day = (datetime.now() - timedelta(days=7)).date().isoformat()
+        cursor = mongodb.analytics_rollups.find(
+            {"_id": {"$gte": DAY_ID_PREFIX + first_day, "$lt": DAY_ID_PREFIX + "~"}},
+            {"created": 1}
+        )
+        recent = sum(day.get("created", 0) for day in await cursor.to_list(None))
+
+        status_distribution = {
+            status: count for status, count in (applications.get("status") or {}).items() if count
+        }
+        decided = sum(status_distribution.get(status, 0) for status in DECIDED_STATUSES)
+        approval_rate = (status_distribution.get("APPROVED", 0) / decided * 100) if decided > 0 else 0
+
+        return {
+            "total_applications": applications.get("total", 0),
+            "status_distribution": status_distribution,
+            "total_active_loans": loans.get("active", 0),
+            "total_disbursed_amount": loans.get("disbursed_amount", 0),
+            "recent_applications_7d": recent,
+            "approval_rate": round(approval_rate, 2),
+        }
+
+    async def risk_distribution(self) -> Dict[str, Dict[str, Any]]:
+        applications = await self._totals(APPLICATION_TOTALS_ID)
+        return {
+            segment: {
+                "count": values["count"],
+                "avg_risk_score": round(values.get("risk_score_sum", 0) / values["count"], 3)
+            }
+            for segment, values in (applications.get("risk_segment") or {}).items()
+            if values.get("count")
+        }
+
+    async def loan_type_stats(self) -> Dict[str, Dict[str, Any]]:
+        applications = await self._totals(APPLICATION_TOTALS_ID)
+        return {
+            loan_type: {
+                "total_applications": values["total"],
+                "approved": values.get("approved", 0),
+                "approval_rate": round(values.get("approved", 0) / values["total"] * 100, 2)
+            }
+            for loan_type, values in (applications.get("loan_type") or {}).items()
+            if values.get("total")
+        }
+
+    async def rebuild(self, db=None, batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Recount every rollup from loan_applications and loans
+        Counters are built in a side collection and renamed over analytics_rollups,
+        so readers never see a partial rebuild. Writes made while it runs are lost;
+        run it when traffic is quiet.
+        """
+        db = db if db is not None else mongodb.db
+        counters: Counters = defaultdict(int)
+
+        applications = 0
+        cursor = db.loan_applications.find({}, ROLLUP_PROJECTION, batch_size=batch_size)
+        async for application in cursor:
+            for counter, amount in application_counters(application).items():
+                counters[counter] += amount
+            applications += 1
+
+        loans = 0
+        cursor = db.loans.find({"status": "ACTIVE"}, {"_id": 0, "status": 1, "disbursement_amount": 1}, batch_size=batch_size)
+        async for loan in cursor:
+            for counter, amount in loan_counters(loan).items():
+                counters[counter] += amount
+            loans += 1
+
+        documents = rollup_documents(counters)
+        # Empty databases still get their totals documents, which marks the rollups as built
+        rebuilt_at = datetime.now().isoformat()
+        for rollup_id in (APPLICATION_TOTALS_ID, LOAN_TOTALS_ID):
+            documents.setdefault(rollup_id, {"_id": rollup_id})
+        for document in documents.values():
+            document["updated_at"] = rebuilt_at
+
+        # Own staging collection per rebuild, so concurrent rebuilds cannot drop or rename each other's
+        staging = db[f"analytics_rollups_rebuild_{uuid.uuid4().hex[:12]}"]
+        try:
+            await staging.insert_many(list(documents.values()))
+            await staging.rename("analytics_rollups", dropTarget=True)
+        except Exception:
+            await staging.drop()
+            raise
+
+        logger.info(f"Analytics rollups rebuilt from {applications} applications and {loans} active loans")
+        return {"applications": applications, "active_loans": loans, "rollup_documents": len(documents)}
+
+    async def _acquire_build_lock(self, lock) -> bool:
+        now = datetime.now()
+        try:
+            await lock.insert_one({"_id": "build", "locked_at": now})
+            return True
+        except DuplicateKeyError:
+            pass
+        # Take over a marker left by a build that never finished
+        stale = await lock.delete_one({"_id": "build", "locked_at": {"$lt": now - timedelta(seconds=BUILD_LOCK_STALE_SECONDS)}})
+        if not stale.deleted_count:
+            return False
+        try:
+            await lock.insert_one({"_id": "build", "locked_at": now})
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def ensure_built(self) -> None:
+        """
+        Build the rollups once on a database that has never had them
+        Only the worker holding the build lock scans the collections; the others start
+        without waiting (analytics read empty counters until the build lands). This is a
+        full scan that blocks startup, so build large databases beforehand with
+        scripts/rebuild_analytics_rollups.py.
+        """
+        if await mongodb.analytics_rollups.find_one({"_id": APPLICATION_TOTALS_ID}, {"_id": 1}) is not None:
+            return
+
+        lock = mongodb.db[BUILD_LOCK_COLLECTION]
+        if not await self._acquire_build_lock(lock):
+            logger.info("Analytics rollups are being built by another worker")
+            return
+        try:
+            # Another worker may have finished the build before this one took the lock
+            if await mongodb.analytics_rollups.find_one({"_id": APPLICATION_TOTALS_ID}, {"_id": 1}) is None:
+                logger.info("Analytics rollups missing; building them from the collections")
+                await self.rebuild()
+        finally:
+            await lock.delete_one({"_id": "build"})
+
+
+# Global instance
+analytics_rollups = AnalyticsRollups()
@@ -0,0 +1,157 @@
+"""
+Application Store
+Read access to loan_applications through named projections, so each route pulls
+only the fields it uses instead of the whole conversation and EMI schedule
+"""
+
+import copy
+import logging
+from typing import Any, Dict, List, Optional
+
+from database import mongodb
+
+logger = logging.getLogger(__name__)
+
+
+# Fields a chat turn rebuilds LoanWorkflowState from and writes back
+_CHAT_TURN_FIELDS = (
+    "application_id", "user_id", "loan_type", "owner_email", "status", "progress",
+    "workflow_stage", "application_data", "kyc_data", "credit_data", "policy_validation",
+    "affordability_result", "risk_assessment", "loan_offer", "emi_schedule", "loan_id",
+    "sanction_letter_path", "conversation_messages", "is_eligible", "is_accepted",
+    "rejection_reason", "created_at", "updated_at", "source_channel", "channel_metadata",
+)
+
+APPLICATION_PROJECTIONS: Dict[str, Dict[str, Any]] = {
+    # Workflow state for one chat turn
+    "chat_turn": {"_id": 0, **{field: 1 for field in _CHAT_TURN_FIELDS}},
+    # Application page: everything except the amortization rows (summary is kept)
+    "detail": {"_id": 0, "emi_schedule.schedule": 0},
+    "full": {"_id": 0},
+    # Dashboard / history lists
+    "summary": {"_id": 0, "conversation_messages": 0, "emi_schedule": 0},
+    # Stage lookups (Telegram /status, resuming the open application); includes the
+    # fields analytics rollups diff on, so a status-only write can update them
+    "status": {
+        "_id": 0, "application_id": 1, "loan_type": 1, "status": 1,
+        "workflow_stage": 1, "owner_email": 1, "created_at": 1, "updated_at": 1,
+        "risk_assessment.risk_segment": 1, "risk_assessment.risk_score": 1,
+    },
+}
+
+# Turns whose caller only needs the new messages load none of the history ($push handles the write)
+APPEND_ONLY_MESSAGE_WINDOW = 0
+
+DEFAULT_MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
+
+class ApplicationStore:
+    """Named-projection reads over mongodb.loan_applications"""
+
+    @staticmethod
+    def projection(name: str, message_window: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Named projection, optionally keeping only the last message_window messages
+        message_window=0 loads none (turns that only append)
+        """
+        if name not in APPLICATION_PROJECTIONS:
+            raise ValueError(f"Unknown application projection '{name}'. Use one of: {', '.join(APPLICATION_PROJECTIONS)}")
+
+        projection = copy.deepcopy(APPLICATION_PROJECTIONS[name])
+        if message_window is not None:
+            projection["conversation_messages"] = {"$slice": -message_window if message_window > 0 else 0}
+        return projection
+
+    async def get_for_user(
+        self,
+        application_id: str,
+        user_id: str,
+        projection: str = "detail",
+        message_window: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await mongodb.loan_applications.find_one(
+            {"application_id": application_id, "user_id": user_id},
+            self.projection(projection, message_window)
+        )
+
+    async def latest_for_user(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        projection: str = "status"
+    ) -> Optional[Dict[str, Any]]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        return await mongodb.loan_applications.find_one(
+            query,
+            self.projection(projection),
+            sort=[("updated_at", -1)]
+        )
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        projection: str = "summary",
+        sort_field: str = "created_at",
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        cursor = mongodb.loan_applications.find(query, self.projection(projection)).sort(sort_field, -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def message_page(
+        self,
+        application_id: str,
+        user_id: str,
+        before: Optional[int] = None,
+        limit: int = DEFAULT_MESSAGE_PAGE_SIZE
+    ) -> Optional[Dict[str, Any]]:
+        """
+        One page of conversation history via $slice
+        Without before: the latest `limit` messages. With before: the `limit` messages
+        preceding index `before` (pass the previous page's start to walk backwards).
+        """
+        limit = max(1, min(limit, MAX_MESSAGE_PAGE_SIZE))
+        if before is None:
+            window: Any = -limit
+            skip = None
+        else:
+            skip = max(0, before - limit)
+            # $slice needs a positive count; an empty page still returns the total
+            window = [skip, max(1, before - skip)]
+
+        doc = await mongodb.loan_applications.find_one(
+            {"application_id": application_id, "user_id": user_id},
+            {
+                "_id": 0,
+                "message_count": {"$size": {"$ifNull": ["$conversation_messages", []]}},
+                "conversation_messages": {"$slice": window},
+            }
+        )
+        if doc is None:
+            return None
+
+        total = doc.get("message_count", 0)
+        messages = doc.get("conversation_messages") or []
+        if skip is None:
+            start = total - len(messages)
+        else:
+            start = min(skip, total)
+            messages = messages[:max(0, min(before, total) - start)]
+
+        return {
+            "application_id": application_id,
+            "messages": messages,
+            "start": start,
+            "total": total,
+            "has_more": start > 0,
+        }
+
+
+# Global instance
+application_store = ApplicationStore()
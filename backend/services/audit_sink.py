@@ -0,0 +1,250 @@
+"""
+Audit Sink
+Buffers audit events in-process and writes them to mongodb.audit_logs in batches
+(insert_many, unordered) when a batch fills or the flush interval passes.
+
+- A full queue makes AuditLogger.log wait (backpressure); if it stays full past
+  AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS the event goes to the spill file instead
+- Batches Mongo rejects (server down, timeouts) are appended to a local JSONL spill
+  file and replayed once writes succeed again; log_id is unique, so replays that
+  already landed are skipped as duplicates
+- stop() drains the queue before shutdown
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from config import settings
+from database import mongodb
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DUPLICATE_KEY_ERROR = 11000
+
+
+class AuditSink:
+    """Batched, spill-backed writer for audit_logs"""
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        flush_interval: float = None,
+        queue_size: int = None,
+        spill_path: str = None
+    ):
+        self.batch_size = batch_size or settings.AUDIT_SINK_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.AUDIT_SINK_FLUSH_INTERVAL_SECONDS
+        self.queue_size = queue_size or settings.AUDIT_SINK_QUEUE_SIZE
+        spill_path = spill_path or settings.AUDIT_SINK_SPILL_PATH
+        self.spill_path = spill_path if os.path.isabs(spill_path) else os.path.join(BACKEND_DIR, spill_path)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._spill_lock = threading.Lock()
+        self._next_replay = 0.0
+        self._overflowing = False
+
+        self._enqueued = 0
+        self._written = 0
+        self._spilled = 0
+        self._backpressure_waits = 0
+        self._flushes = 0
+        self._flush_ms_total = 0.0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._flusher is not None and not self._flusher.done()
+
+    async def start(self):
+        """Start the background flusher and replay anything spilled by a previous run"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        await self._replay_spill()
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything queued, then stop the flusher"""
+        if not self.is_running:
+            return
+        await self._queue.join()
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+        logger.info(f"Audit sink drained ({self._written} written, {self._spilled} spilled)")
+
+    async def submit(self, entry: Dict[str, Any]):
+        """
+        Queue one audit entry
+        Waits while the queue is full; spills to disk if it stays full past the timeout.
+        Without a running flusher (scripts, tests) the entry is written directly.
+        """
+        if not self.is_running:
+            await self._write([entry])
+            return
+
+        self._enqueued += 1
+        try:
+            self._queue.put_nowait(entry)
+            self._overflowing = False
+            return
+        except asyncio.QueueFull:
+            self._backpressure_waits += 1
+
+        try:
+            await asyncio.wait_for(self._queue.put(entry), timeout=settings.AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            if not self._overflowing:
+                logger.warning(
+                    f"Audit queue full for {settings.AUDIT_SINK_ENQUEUE_TIMEOUT_SECONDS}s; "
+                    f"spilling new entries to {self.spill_path} until it drains"
+                )
+                self._overflowing = True
+            await self._spill([entry])
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first entry, then collect until the batch fills or the interval passes"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        """insert_many one batch; whatever Mongo does not accept is spilled"""
+        started = time.perf_counter()
+        try:
+            await mongodb.audit_logs.insert_many(batch, ordered=False)
+            self._written += len(batch)
+        except BulkWriteError as e:
+            failed = {
+                error["index"] for error in e.details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY_ERROR
+            }
+            self._written += e.details.get("nInserted", 0)
+            if failed:
+                logger.error(f"Audit batch: {len(failed)} of {len(batch)} entries rejected; spilling them")
+                await self._spill([entry for index, entry in enumerate(batch) if index in failed])
+        except Exception as e:
+            logger.error(f"Audit batch of {len(batch)} not written ({e}); spilling to {self.spill_path}")
+            await self._spill(batch)
+            return
+        finally:
+            self._record_flush((time.perf_counter() - started) * 1000)
+
+        if time.monotonic() >= self._next_replay and (
+            os.path.exists(self.spill_path) or os.path.exists(f"{self.spill_path}.replay")
+        ):
+            await self._replay_spill()
+
+    def _record_flush(self, elapsed_ms: float):
+        self._flushes += 1
+        self._flush_ms_total += elapsed_ms
+        self._last_flush_ms = elapsed_ms
+        self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+
+    def _append_spill(self, entries: List[Dict[str, Any]]):
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                for entry in entries:
+                    entry.pop("_id", None)
+                    spill.write(json.dumps(entry, default=str) + "\n")
+
+    async def _spill(self, entries: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._append_spill, entries)
+        self._spilled += len(entries)
+        # Give Mongo time to come back before replaying
+        self._next_replay = time.monotonic() + settings.AUDIT_SINK_SPILL_REPLAY_SECONDS
+
+    def _take_spill(self) -> List[Dict[str, Any]]:
+        """Move the spill file aside and read it (a .replay left by an interrupted replay is kept)"""
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                with open(self.spill_path, encoding="utf-8") as spill, open(replay_path, "a", encoding="utf-8") as replay:
+                    replay.write(spill.read())
+                os.remove(self.spill_path)
+        if not os.path.exists(replay_path):
+            return []
+        with open(replay_path, encoding="utf-8") as replay:
+            entries = [json.loads(line) for line in replay if line.strip()]
+        os.remove(replay_path)
+        return entries
+
+    async def _replay_spill(self):
+        """Re-insert spilled entries; anything that fails again goes back to the spill file"""
+        self._next_replay = time.monotonic() + settings.AUDIT_SINK_SPILL_REPLAY_SECONDS
+        entries = await asyncio.to_thread(self._take_spill)
+        if not entries:
+            return
+
+        logger.info(f"Replaying {len(entries)} spilled audit entries")
+        for start in range(0, len(entries), self.batch_size):
+            chunk = entries[start:start + self.batch_size]
+            try:
+                await mongodb.audit_logs.insert_many(chunk, ordered=False)
+                self._written += len(chunk)
+            except BulkWriteError as e:
+                self._written += e.details.get("nInserted", 0)
+                failed = {
+                    error["index"] for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY_ERROR
+                }
+                if failed:
+                    await asyncio.to_thread(self._append_spill, [entry for index, entry in enumerate(chunk) if index in failed])
+            except Exception as e:
+                logger.error(f"Audit spill replay stopped ({e}); {len(entries) - start} entries kept on disk")
+                await asyncio.to_thread(self._append_spill, entries[start:])
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and flush latency"""
+        return {
+            "running": self.is_running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.queue_size,
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "spilled": self._spilled,
+            "spill_file_bytes": os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0,
+            "backpressure_waits": self._backpressure_waits,
+            "flushes": self._flushes,
+            "flush_ms": {
+                "last": round(self._last_flush_ms, 2),
+                "avg": round(self._flush_ms_total / self._flushes, 2) if self._flushes else 0.0,
+                "max": round(self._max_flush_ms, 2),
+            },
+        }
+
+
+# Global instance
+audit_sink = AuditSink()
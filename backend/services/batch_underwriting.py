@@ -0,0 +1,329 @@
+"""
+Batch Underwriting Service
+Runs the deterministic engines (KYC, bureau, policy, affordability, risk, pricing)
+over streamed applicant records for bulk pre-approved offer generation.
+No LLM, no chat state - one record in, one decision out.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("jsonl", "csv")
+
+MIN_CREDIT_SCORE = 700
+DEFAULT_FOIR_LIMIT = 0.60
+
+NUMERIC_FIELDS = {
+    "monthly_income": float,
+    "requested_amount": float,
+    "tenure_months": int,
+    "age": int,
+    "employment_years": int,
+    "city_tier": int,
+}
+
+# Offer fields copied from PricingEngine.generate_loan_offer
+OFFER_FIELDS = [
+    "principal",
+    "tenure_months",
+    "interest_rate",
+    "monthly_emi",
+    "total_interest",
+    "total_repayment",
+    "total_processing_fee",
+    "net_disbursement",
+    "effective_apr",
+]
+
+# Column order for CSV output
+OUTPUT_FIELDS = [
+    "applicant_id",
+    "loan_type",
+    "decision",
+    "stage",
+    "reason",
+    "credit_score",
+    "risk_score",
+    "risk_segment",
+    "eligible_amount",
+] + OFFER_FIELDS
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    """Resolve input/output format from an explicit value or file extension"""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith(".csv"):
+        fmt = "csv"
+    else:
+        fmt = "jsonl"
+
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+    return fmt
+
+
+def iter_applicant_records(stream: TextIO, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Read applicant records lazily, one line at a time"""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"_parse_error": f"Line {line_number}: {e.msg}"}
+
+
+def _normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Coerce CSV strings / loose JSON values into engine input types"""
+    normalized = dict(record)
+    for field, cast in NUMERIC_FIELDS.items():
+        value = normalized.get(field)
+        if value in (None, ""):
+            continue
+        normalized[field] = cast(float(value))
+
+    normalized["loan_type"] = (normalized.get("loan_type") or "personal_loan").strip().lower()
+    normalized["employment_type"] = (normalized.get("employment_type") or "salaried").strip().lower()
+    return normalized
+
+
+def _decision(record: Dict[str, Any], decision: str, stage: str, reason: str = "", **fields) -> Dict[str, Any]:
+    return {
+        "applicant_id": record["applicant_id"] if record.get("applicant_id") is not None else record.get("user_id"),
+        "loan_type": record.get("loan_type"),
+        "decision": decision,
+        "stage": stage,
+        "reason": reason,
+        **fields
+    }
+
+
+def underwrite_applicant(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one applicant through the same engine sequence as the chat workflow
+    (verify_kyc -> fetch_credit -> check_policy -> assess_affordability ->
+    assess_risk -> generate_offer) and return a flat decision record
+    """
+    from engines.kyc_engine import kyc_engine
+    from engines.bureau_engine import bureau_engine
+    from engines.policy_engine import policy_engine
+    from engines.affordability_engine import affordability_engine
+    from engines.risk_engine import risk_engine
+    from engines.pricing_engine import pricing_engine
+
+    if "_parse_error" in record:
+        return _decision(record, "ERROR", "init", record["_parse_error"])
+
+    try:
+        app_data = _normalize_record(record)
+    except (TypeError, ValueError) as e:
+        return _decision(record, "ERROR", "init", f"Invalid field value: {e}")
+
+    stage = "collect_info"
+    try:
+        missing = [field for field in ("aadhaar", "pan", "monthly_income", "requested_amount", "tenure_months")
+                   if not app_data.get(field)]
+        if missing:
+            return _decision(app_data, "ERROR", stage, f"Missing fields: {', '.join(missing)}")
+
+        loan_type = app_data["loan_type"]
+
+        # KYC
+        stage = "verify_kyc"
+        kyc = kyc_engine.process_kyc(
+            aadhaar=str(app_data["aadhaar"]),
+            pan=str(app_data["pan"]),
+            user_id=app_data.get("user_id")
+        )
+        if kyc.get("kyc_status") != "VERIFIED":
+            return _decision(app_data, "REJECTED", stage, kyc.get("reason", "KYC verification failed"))
+
+        # Bureau
+        stage = "fetch_credit"
+        report = bureau_engine.fetch_credit_report(str(app_data["pan"]))
+        credit_score = report.get("credit_score", 0)
+        existing_emi = report.get("existing_emi", 0)
+        if credit_score < MIN_CREDIT_SCORE:
+            return _decision(
+                app_data, "REJECTED", stage,
+                f"Credit score {credit_score} below minimum requirement",
+                credit_score=credit_score
+            )
+
+        # Policy
+        stage = "check_policy"
+        is_eligible, violations = policy_engine.validate_application(
+            loan_type,
+            {
+                "age": app_data.get("age", 30),
+                "income": app_data["monthly_income"],
+                "monthly_income": app_data["monthly_income"],
+                "employment_type": app_data["employment_type"],
+                "requested_amount": app_data["requested_amount"],
+                "tenure_months": app_data["tenure_months"],
+                "existing_emi": existing_emi
+            },
+            credit_score=credit_score,
+            bureau_data={
+                "active_loans": report.get("active_loans", 0),
+                "dpd_30_days": report.get("dpd_30_days", 0)
+            }
+        )
+        if not is_eligible:
+            return _decision(
+                app_data, "REJECTED", stage,
+                f"Policy violations: {', '.join(violations)}",
+                credit_score=credit_score
+            )
+
+        # Affordability
+        stage = "assess_affordability"
+        base_rate = policy_engine.get_interest_rate(loan_type, "MEDIUM", app_data)
+        affordability = affordability_engine.determine_affordable_amount(
+            income=app_data["monthly_income"],
+            existing_emi=existing_emi,
+            requested_amount=app_data["requested_amount"],
+            interest_rate=base_rate,
+            tenure_months=app_data["tenure_months"],
+            foir_limit=DEFAULT_FOIR_LIMIT
+        )
+        if affordability["status"] not in ("APPROVED", "REDUCED"):
+            return _decision(
+                app_data, "REJECTED", stage, "Requested amount not affordable",
+                credit_score=credit_score
+            )
+
+        # Risk (explanations are not needed for batch output)
+        stage = "assess_risk"
+        risk = risk_engine.calculate_risk_score(
+            credit_score=credit_score,
+            foir=affordability["foir_requested"],
+            employment_type=app_data["employment_type"],
+            years_experience=app_data.get("employment_years", 2),
+            city_tier=app_data.get("city_tier", 2),
+            bureau_flags=report.get("bureau_flags") or []
+        )
+
+        # Pricing
+        stage = "generate_offer"
+        application_data = {
+            "age": app_data.get("age", 30),
+            "employment_type": app_data["employment_type"],
+            "city_tier": app_data.get("city_tier", 2)
+        }
+        principal = affordability["eligible_amount"]
+        interest_rate = pricing_engine.determine_interest_rate(loan_type, risk["risk_segment"], application_data)
+        monthly_emi = affordability_engine.calculate_emi(principal, interest_rate, app_data["tenure_months"])
+        offer = pricing_engine.generate_loan_offer(
+            loan_type=loan_type,
+            risk_segment=risk["risk_segment"],
+            eligible_amount=principal,
+            tenure_months=app_data["tenure_months"],
+            monthly_emi=monthly_emi,
+            application_data=application_data
+        )
+
+        return _decision(
+            app_data, "OFFERED", stage,
+            affordability["message"],
+            credit_score=credit_score,
+            risk_score=risk["risk_score"],
+            risk_segment=risk["risk_segment"],
+            eligible_amount=affordability["eligible_amount"],
+            **{field: offer.get(field) for field in OFFER_FIELDS}
+        )
+
+    except Exception as e:
+        return _decision(app_data, "ERROR", stage, str(e))
+
+
+def underwrite_chunk(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Process-pool task: underwrite a chunk of records against one policy snapshot"""
+    from engines.policy_engine import policy_engine
+
+    with policy_engine.pinned():
+        return [underwrite_applicant(record) for record in records]
+
+
+def _init_worker():
+    """Quiet per-record engine logging and warm engine globals in each worker"""
+    logging.getLogger("engines").setLevel(logging.WARNING)
+    from engines.bureau_engine import bureau_engine
+    bureau_engine.load_mock_dataset()
+
+
+def run_batch(
+    records: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Underwrite a stream of records on a process pool, yielding decisions in input order.
+    At most 2 chunks per worker are in flight, so memory stays bounded by
+    workers × chunk_size regardless of input size.
+    """
+    # Never more processes than CPUs, whatever the caller asks for
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or settings.BATCH_UNDERWRITING_WORKERS or cpus, cpus))
+    chunk_size = chunk_size or settings.BATCH_UNDERWRITING_CHUNK_SIZE
+    max_pending = workers * 2
+
+    records = iter(records)
+    pending = deque()
+    processed = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        while True:
+            while len(pending) < max_pending:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(underwrite_chunk, chunk))
+
+            if not pending:
+                break
+
+            for decision in pending.popleft().result():
+                processed += 1
+                yield decision
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info(f"Batch underwriting finished: {processed} records, {workers} workers")
+
+
+def format_decisions(decisions: Iterable[Dict[str, Any]], fmt: str) -> Iterator[str]:
+    """Serialize decisions as JSONL lines or CSV rows (header first)"""
+    if fmt == "jsonl":
+        for decision in decisions:
+            yield json.dumps(decision, default=str) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for decision in decisions:
+        writer.writerow(decision)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,137 @@
+"""
+Bureau Report Cache
+Two tiers in front of the bureau engine: an in-process LRU (TTLCache), then Redis
+(bureau_cache:<PAN>, JSON). Concurrent lookups for the same PAN share one load
+(single flight), so a burst of retries costs one Redis read or one bureau call.
+
+The workflow nodes run in worker threads, so arun_workflow_stepwise fetches the
+report here on the event loop and hands it to the node through prefetched();
+fetch_credit_report picks it up with prefetched_report().
+"""
+
+import asyncio
+import copy
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from config import settings
+from database import redis_client
+from engines.bureau_engine import bureau_engine
+from services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_prefetched_reports: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("bureau_prefetched_reports", default=None)
+
+
+def _normalize(pan: str) -> str:
+    return (pan or "").upper().strip()
+
+
+class BureauCache:
+    """In-process LRU -> Redis -> bureau engine, with single-flight loads"""
+
+    def __init__(self):
+        self._local = TTLCache(settings.BUREAU_CACHE_LOCAL_SIZE, settings.BUREAU_CACHE_LOCAL_TTL_SECONDS)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.redis_hits = 0
+        self.bureau_calls = 0
+        self.coalesced = 0
+
+    async def get_report(self, pan: str) -> Dict[str, Any]:
+        """
+        Credit report for a PAN
+        Raises ValueError like BureauEngine.fetch_credit_report when the PAN is unknown
+        (failures are not cached).
+        """
+        pan = _normalize(pan)
+        report = self._local.get(pan)
+        if report is None:
+            load = self._inflight.get(pan)
+            if load is None:
+                load = asyncio.ensure_future(self._load(pan))
+                self._inflight[pan] = load
+                load.add_done_callback(lambda done: self._finish(pan, done))
+            else:
+                self.coalesced += 1
+            # Shielded: a cancelled caller must not cancel the load other callers wait on
+            report = await asyncio.shield(load)
+        return copy.deepcopy(report)
+
+    def _finish(self, pan: str, load: asyncio.Task):
+        if self._inflight.get(pan) is load:
+            del self._inflight[pan]
+        if not load.cancelled():
+            load.exception()  # Retrieved here, so an unawaited failure is not logged as lost
+
+    async def _load(self, pan: str) -> Dict[str, Any]:
+        report = None
+        if settings.BUREAU_CACHE_TTL_SECONDS > 0:
+            try:
+                report = await redis_client.get_cached_bureau_data(pan)
+            except Exception as e:
+                logger.warning(f"Bureau cache read failed for PAN ending {pan[-4:]}: {e}")
+
+        if report is not None:
+            self.redis_hits += 1
+        else:
+            self.bureau_calls += 1
+            report = bureau_engine.fetch_credit_report(pan)
+            if settings.BUREAU_CACHE_TTL_SECONDS > 0:
+                try:
+                    await redis_client.cache_bureau_data(pan, report, settings.BUREAU_CACHE_TTL_SECONDS)
+                except Exception as e:
+                    logger.warning(f"Bureau cache write failed for PAN ending {pan[-4:]}: {e}")
+
+        self._local.set(pan, report)
+        return report
+
+    async def invalidate(self, pan: str):
+        """Drop a PAN from both tiers (this process's LRU only; other workers expire theirs)"""
+        pan = _normalize(pan)
+        self._local.pop(pan)
+        await redis_client.delete_cached_bureau_data(pan)
+
+    async def try_get_report(self, pan: Optional[str]) -> Optional[Dict[str, Any]]:
+        """get_report, or None on any failure (the caller falls back to the bureau engine)"""
+        if not pan:
+            return None
+        try:
+            return await self.get_report(pan)
+        except Exception as e:
+            logger.debug(f"Bureau prefetch skipped for PAN ending {str(pan)[-4:]}: {e}")
+            return None
+
+    @contextmanager
+    def prefetched(self, pan: Optional[str], report: Optional[Dict[str, Any]]):
+        """Make a report fetched on the event loop visible to code run via asyncio.to_thread"""
+        if not pan or report is None:
+            yield
+            return
+        token = _prefetched_reports.set({_normalize(pan): report})
+        try:
+            yield
+        finally:
+            _prefetched_reports.reset(token)
+
+    def prefetched_report(self, pan: str) -> Optional[Dict[str, Any]]:
+        reports = _prefetched_reports.get()
+        if not reports:
+            return None
+        return reports.get(_normalize(pan))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self._local.stats(),
+            "redis_ttl_seconds": settings.BUREAU_CACHE_TTL_SECONDS,
+            "redis_hits": self.redis_hits,
+            "bureau_calls": self.bureau_calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+# Global instance
+bureau_cache = BureauCache()
@@ -0,0 +1,335 @@
+"""
+Email Dispatch
+Outbound mail goes through a priority queue drained by worker tasks instead of being
+sent inline by the request that triggered it.
+
+- OTP mail (PRIORITY_OTP) is taken ahead of decision and report mail (PRIORITY_BULK)
+- At most EMAIL_QUEUE_SIZE bulk mails are queued or retrying; beyond that submit
+  raises EmailQueueFull. OTP mail is never refused for queue space
+- TransientEmailError (connection loss, 4xx replies, provider 429/5xx) is retried
+  with exponential backoff up to EMAIL_MAX_ATTEMPTS; other errors fail the mail
+- SMTP sends reuse logged-in connections from SMTPConnectionPool; a connection idle
+  longer than SMTP_HEALTHCHECK_IDLE_SECONDS is checked with NOOP before reuse
+- stop() drains the queue (up to EMAIL_SHUTDOWN_TIMEOUT_SECONDS) before shutdown
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_OTP = 0
+PRIORITY_BULK = 10
+
+
+class TransientEmailError(Exception):
+    """A send that may succeed if retried later"""
+
+
+class EmailQueueFull(Exception):
+    """Raised when EMAIL_QUEUE_SIZE bulk mails are already pending"""
+
+
+def _is_transient_smtp_error(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # Dropped connections, socket errors and timeouts
+    return isinstance(error, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class SMTPConnectionPool:
+    """Logged-in smtplib connections shared by the dispatch workers (used from worker threads)"""
+
+    def __init__(self, size: int = None):
+        self.size = size or settings.SMTP_POOL_SIZE
+        self._idle: List[Tuple[smtplib.SMTP, float, int]] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.healthcheck_failures = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if settings.SMTP_USE_SSL:
+            server = smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        else:
+            server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+            server.ehlo()
+            if settings.SMTP_USE_TLS:
+                server.starttls()
+                server.ehlo()
+        try:
+            if settings.SMTP_USERNAME:
+                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        except Exception:
+            self._close(server)
+            raise
+        self.opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _healthy(self, server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> Tuple[smtplib.SMTP, int, bool]:
+        """An idle connection (NOOP-checked if it sat too long), or a new one"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used, sent = self._idle.pop()
+            if time.monotonic() - last_used < settings.SMTP_HEALTHCHECK_IDLE_SECONDS or self._healthy(server):
+                self.reused += 1
+                return server, sent, True
+            self.healthcheck_failures += 1
+            server.close()
+        return self._connect(), 0, False
+
+    def _release(self, server: smtplib.SMTP, sent: int):
+        if sent < settings.SMTP_CONNECTION_MAX_MESSAGES:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append((server, time.monotonic(), sent))
+                    return
+        self._close(server)
+
+    def send(self, message: EmailMessage):
+        """
+        Send one message on a pooled connection
+        Raises TransientEmailError for failures worth retrying; other errors as raised by smtplib.
+        """
+        try:
+            server, sent, reused = self._acquire()
+        except Exception as e:
+            if _is_transient_smtp_error(e):
+                raise TransientEmailError(f"SMTP connect failed: {e}") from e
+            raise
+
+        try:
+            server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            server.close()
+            if not reused:
+                raise TransientEmailError("SMTP server disconnected")
+            # The server dropped an idle connection between the health check and the send
+            return self.send(message)
+        except Exception as e:
+            if isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                # The server refused this message; the session itself is still good
+                self._reset_or_close(server, sent)
+            else:
+                server.close()
+            if _is_transient_smtp_error(e):
+                raise TransientEmailError(f"SMTP send failed: {e}") from e
+            raise
+        self._release(server, sent + 1)
+
+    def _reset_or_close(self, server: smtplib.SMTP, sent: int):
+        try:
+            server.rset()
+        except Exception:
+            server.close()
+            return
+        self._release(server, sent)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _, _ in idle:
+            self._close(server)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "opened": self.opened,
+            "reused": self.reused,
+            "healthcheck_failures": self.healthcheck_failures,
+        }
+
+
+class _EmailJob:
+    __slots__ = ("deliver", "label", "priority", "attempts", "future", "enqueued_at")
+
+    def __init__(self, deliver: Callable[[], Awaitable[bool]], label: str, priority: int):
+        self.deliver = deliver
+        self.label = label
+        self.priority = priority
+        self.attempts = 0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class EmailDispatcher:
+    """Priority queue of outbound mails, drained by EMAIL_DISPATCH_WORKERS tasks"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: set = set()
+        self._inline_sends: set = set()
+        self._sequence = itertools.count()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected = 0
+        self._wait_ms: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self):
+        if self.is_running:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._run()) for _ in range(max(1, settings.EMAIL_DISPATCH_WORKERS))
+        ]
+
+    async def stop(self):
+        """Wait for queued and retrying mails (bounded), then stop the workers and close SMTP connections"""
+        if not self.is_running:
+            return
+        if self._jobs:
+            await asyncio.wait(set(self._jobs), timeout=settings.EMAIL_SHUTDOWN_TIMEOUT_SECONDS)
+        unsent = sum(1 for future in self._jobs if not future.done())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for future in list(self._jobs):
+            if not future.done():
+                future.set_result(False)
+        await asyncio.to_thread(smtp_pool.close)
+        if unsent:
+            logger.warning(f"Email dispatcher stopped with {unsent} mails unsent")
+        logger.info(f"Email dispatcher drained ({self.sent} sent, {self.failed} failed)")
+
+    def submit(self, deliver: Callable[[], Awaitable[bool]], label: str, priority: int = PRIORITY_BULK) -> asyncio.Future:
+        """
+        Queue a mail; the future resolves to True once sent, False once it has failed.
+        deliver() sends it and raises TransientEmailError when it should be retried.
+        Without running workers (scripts) the mail is sent right away, still with retries.
+        """
+        if priority > PRIORITY_OTP and len(self._jobs) >= settings.EMAIL_QUEUE_SIZE:
+            self.rejected += 1
+            raise EmailQueueFull(f"{len(self._jobs)} emails already queued")
+
+        job = _EmailJob(deliver, label, priority)
+        self._jobs.add(job.future)
+        job.future.add_done_callback(self._jobs.discard)
+        if self.is_running:
+            self._enqueue(job)
+        else:
+            # Held until done: the loop keeps only weak references to tasks
+            send = asyncio.ensure_future(self._send_inline(job))
+            self._inline_sends.add(send)
+            send.add_done_callback(self._inline_sends.discard)
+        return job.future
+
+    def _enqueue(self, job: _EmailJob):
+        if job.future.done():
+            return
+        if not self.is_running:
+            # Stopped while the retry was waiting
+            job.future.set_result(False)
+            return
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+
+    async def _send_inline(self, job: _EmailJob):
+        while not job.future.done():
+            delay = await self._attempt(job)
+            if delay is not None:
+                await asyncio.sleep(delay)
+
+    async def _run(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                self._record_wait(job)
+                delay = await self._attempt(job)
+                if delay is not None:
+                    # Retry later without holding a worker
+                    job.enqueued_at = time.monotonic() + delay
+                    asyncio.get_running_loop().call_later(delay, self._enqueue, job)
+            finally:
+                self._queue.task_done()
+
+    async def _attempt(self, job: _EmailJob) -> Optional[float]:
+        """Try one send; returns the backoff before the next attempt, or None once the job is settled"""
+        job.attempts += 1
+        try:
+            sent = await job.deliver()
+        except TransientEmailError as e:
+            if job.attempts < settings.EMAIL_MAX_ATTEMPTS:
+                self.retries += 1
+                delay = min(
+                    settings.EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1),
+                    settings.EMAIL_RETRY_BACKOFF_MAX_SECONDS,
+                )
+                delay *= random.uniform(0.8, 1.2)
+                logger.warning(f"Email {job.label} failed (attempt {job.attempts}): {e}; retrying in {delay:.1f}s")
+                return delay
+            logger.error(f"Email {job.label} failed after {job.attempts} attempts: {e}")
+            sent = False
+        except Exception as e:
+            logger.error(f"Email {job.label} failed: {e}", exc_info=True)
+            sent = False
+
+        if sent:
+            self.sent += 1
+        else:
+            self.failed += 1
+        if not job.future.done():
+            job.future.set_result(bool(sent))
+        return None
+
+    def _record_wait(self, job: _EmailJob):
+        name = "otp" if job.priority <= PRIORITY_OTP else "bulk"
+        wait_ms = max(0.0, time.monotonic() - job.enqueued_at) * 1000
+        waits = self._wait_ms.setdefault(name, {"last": 0.0, "max": 0.0})
+        waits["last"] = round(wait_ms, 2)
+        waits["max"] = round(max(waits["max"], wait_ms), 2)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending": len(self._jobs),
+            "queue_size": settings.EMAIL_QUEUE_SIZE,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "queue_wait_ms": self._wait_ms,
+            "smtp_pool": smtp_pool.stats(),
+        }
+
+
+# Global instances
+smtp_pool = SMTPConnectionPool()
+email_dispatcher = EmailDispatcher()
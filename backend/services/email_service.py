@@ -1,13 +1,15 @@
 """
 Email Service
 Supports Resend API (preferred) and SMTP fallback for OTP and loan reports.
+Sends go through the email dispatcher (services/email_dispatch.py): queued by
+priority, retried on transient failures, and over pooled SMTP connections.
 """
 
 import asyncio
 import base64
+import functools
 import logging
 import os
-import smtplib
 from email.message import EmailMessage
 from email.utils import formataddr, parseaddr
 from typing import Iterable, Optional
@@ -15,6 +17,15 @@ from typing import Iterable, Optional
 import httpx
 
 from config import settings
+from services.email_dispatch import (
+    PRIORITY_BULK,
+    PRIORITY_OTP,
+    EmailQueueFull,
+    TransientEmailError,
+    email_dispatcher,
+    smtp_pool,
+)
+from services.http_clients import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -122,15 +133,16 @@ class EmailService:
             "Authorization": f"Bearer {settings.RESEND_API_KEY}",
             "Content-Type": "application/json",
         }
-        url = f"{settings.RESEND_API_BASE_URL.rstrip('/')}/emails"
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
+            response = await http_clients.get("resend").post("/emails", headers=headers, json=payload)
+            response.raise_for_status()
             logger.info("Email sent via Resend to %s with subject '%s'", to_email, subject)
             return True
         except httpx.HTTPStatusError as error:
+            status_code = getattr(error.response, "status_code", 0)
+            if status_code == 429 or status_code >= 500:
+                raise TransientEmailError(f"Resend returned {status_code}") from error
             response_text = ""
             try:
                 response_text = error.response.text
@@ -139,11 +151,13 @@ class EmailService:
             logger.error(
                 "Resend send failed for %s: status=%s response=%s",
                 to_email,
-                getattr(error.response, "status_code", "unknown"),
+                status_code or "unknown",
                 response_text,
                 exc_info=True,
             )
             return False
+        except httpx.TransportError as error:
+            raise TransientEmailError(f"Resend request failed: {error}") from error
         except Exception as error:
             logger.error("Resend send failed for %s: %s", to_email, error, exc_info=True)
             return False
@@ -178,30 +192,18 @@ class EmailService:
                     filename=filename,
                 )
 
-        if settings.SMTP_USE_SSL:
-            with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30) as server:
-                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.send_message(message)
-            return
+        smtp_pool.send(message)
 
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30) as server:
-            server.ehlo()
-            if settings.SMTP_USE_TLS:
-                server.starttls()
-                server.ehlo()
-            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(message)
-
-    async def send_email(
+    async def _deliver(
         self,
+        provider: str,
         to_email: str,
         subject: str,
         body_text: str,
-        body_html: Optional[str] = None,
-        attachments: Optional[Iterable[str]] = None,
+        body_html: Optional[str],
+        attachments: list[str],
     ) -> bool:
-        provider = self.active_provider
-
+        """One send attempt (run by a dispatch worker); raises TransientEmailError to be retried"""
         if provider == "resend":
             return await self._send_via_resend(
                 to_email=to_email,
@@ -211,23 +213,36 @@ class EmailService:
                 attachments=attachments,
             )
 
-        if provider == "smtp":
-            try:
-                await asyncio.to_thread(
-                    self._send_sync,
-                    to_email,
-                    subject,
-                    body_text,
-                    body_html,
-                    attachments,
-                )
-                logger.info("Email sent via SMTP to %s with subject '%s'", to_email, subject)
-                return True
-            except Exception as error:
-                logger.error("SMTP send failed for %s: %s", to_email, error, exc_info=True)
-                return False
+        await asyncio.to_thread(
+            self._send_sync,
+            to_email,
+            subject,
+            body_text,
+            body_html,
+            attachments,
+        )
+        logger.info("Email sent via SMTP to %s with subject '%s'", to_email, subject)
+        return True
 
-        if not self.is_configured:
+    async def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        body_text: str,
+        body_html: Optional[str] = None,
+        attachments: Optional[Iterable[str]] = None,
+        priority: int = PRIORITY_BULK,
+        wait: bool = True,
+        wait_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue an email. With wait, returns whether it was sent (False if it is still
+        queued or retrying after wait_seconds; it carries on in the background).
+        Without wait, returns whether it was accepted into the queue.
+        """
+        provider = self.active_provider
+
+        if provider == "none":
             logger.warning(
                 "Email provider not configured. Missing: %s. Skipping email for %s",
                 ", ".join(self.missing_config_fields()),
@@ -235,7 +250,29 @@ class EmailService:
             )
             return False
 
-        return False
+        deliver = functools.partial(
+            self._deliver,
+            provider,
+            to_email,
+            subject,
+            body_text,
+            body_html,
+            list(attachments or []),
+        )
+        try:
+            job = email_dispatcher.submit(deliver, label=f"'{subject}' to {to_email}", priority=priority)
+        except EmailQueueFull as error:
+            logger.warning("Email to %s not queued: %s", to_email, error)
+            return False
+
+        if not wait:
+            return True
+        try:
+            # Shielded: giving up on the wait must not cancel the send
+            return await asyncio.wait_for(asyncio.shield(job), timeout=wait_seconds)
+        except asyncio.TimeoutError:
+            logger.warning("Email '%s' to %s still pending after %ss", subject, to_email, wait_seconds)
+            return False
 
     async def send_otp_email(self, to_email: str, otp: str, expiry_minutes: int) -> bool:
         subject = "Your NBFC Loan Platform OTP"
@@ -247,7 +284,13 @@ class EmailService:
             "Regards,\n"
             "NBFC Loan Platform"
         )
-        return await self.send_email(to_email=to_email, subject=subject, body_text=body)
+        return await self.send_email(
+            to_email=to_email,
+            subject=subject,
+            body_text=body,
+            priority=PRIORITY_OTP,
+            wait_seconds=settings.EMAIL_OTP_WAIT_SECONDS,
+        )
 
 
 email_service = EmailService()
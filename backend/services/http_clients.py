@@ -0,0 +1,98 @@
+"""
+Shared HTTP Clients
+One long-lived httpx.AsyncClient per outbound API (Resend, Telegram), so calls reuse
+keep-alive connections instead of paying a TCP+TLS handshake per message.
+
+- Clients are opened in main.lifespan and closed at shutdown; code running outside
+  the app (scripts) gets one created on first use
+- Each client talks to one host, so its pool limits are the per-host limits
+  (HTTP_CLIENT_MAX_CONNECTIONS, HTTP_CLIENT_MAX_KEEPALIVE)
+- HTTP/2 is negotiated when HTTP_CLIENT_HTTP2 is set and the h2 package is installed
+"""
+
+import logging
+from typing import Any, Dict
+
+import httpx
+
+from config import settings
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+def _client_settings() -> Dict[str, Dict[str, Any]]:
+    """base_url and default timeout of each named client"""
+    return {
+        "resend": {"base_url": settings.RESEND_API_BASE_URL, "timeout": 30.0},
+        "telegram": {"base_url": settings.TELEGRAM_API_BASE_URL, "timeout": 30.0},
+    }
+
+
+class HTTPClientRegistry:
+    """Named, app-scoped httpx.AsyncClient instances"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+
+    @property
+    def http2(self) -> bool:
+        return settings.HTTP_CLIENT_HTTP2 and h2 is not None
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        config = _client_settings()[name]
+
+        async def count_request(request: httpx.Request):
+            self._requests[name] = self._requests.get(name, 0) + 1
+
+        return httpx.AsyncClient(
+            base_url=config["base_url"].rstrip("/"),
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(config["timeout"], connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [count_request]},
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """The shared client for an API (created on first use)"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+            self._clients[name] = client
+        return client
+
+    def start(self):
+        for name in _client_settings():
+            self.get(name)
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            "max_keepalive_per_host": settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            "clients": {
+                name: {
+                    "open": name in self._clients and not self._clients[name].is_closed,
+                    "requests": self._requests.get(name, 0),
+                }
+                for name in _client_settings()
+            },
+        }
+
+
+# Global instance
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,136 @@
+"""
+Keyset Pagination
+Cursor-based pages and streaming exports over a (sort field, unique tie-breaker)
+order, e.g. audit_logs by (timestamp, log_id). Each page resumes strictly after
+the last row of the previous one, so deep pages cost the same as the first and
+rows inserted meanwhile never shift or duplicate what a client already has.
+"""
+
+import base64
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_BATCH_SIZE = 500
+
+
+def encode_cursor(document: Dict[str, Any], sort_field: str, tie_field: str) -> str:
+    """Opaque cursor pointing just after document"""
+    payload = json.dumps([document.get(sort_field), document.get(tie_field)], default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """(sort value, tie value) from a cursor; ValueError if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, tie_value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    return sort_value, tie_value
+
+
+def keyset_query(
+    query: Dict[str, Any],
+    sort_field: str,
+    tie_field: str,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """query restricted to rows after cursor in (sort_field, tie_field) descending order"""
+    if not cursor:
+        return query
+
+    sort_value, tie_value = decode_cursor(cursor)
+    after = {"$or": [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, tie_field: {"$lt": tie_value}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def keyset_sort(sort_field: str, tie_field: str) -> List[Tuple[str, int]]:
+    return [(sort_field, -1), (tie_field, -1)]
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    tie_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page, newest first, plus the cursor for the next one (None on the last page)
+    Reads limit + 1 rows to know whether another page exists.
+    """
+    mongo_cursor = collection.find(
+        keyset_query(query, sort_field, tie_field, cursor),
+        projection
+    ).sort(keyset_sort(sort_field, tie_field)).limit(limit + 1)
+    documents = await mongo_cursor.to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1], sort_field, tie_field)
+    return documents, next_cursor
+
+
+async def iter_documents(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    tie_field: str,
+    projection: Optional[Dict[str, Any]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[Dict[str, Any]]:
+    """Every matching document in keyset order; the driver fetches batch_size at a time"""
+    mongo_cursor = collection.find(query, projection, batch_size=batch_size).sort(keyset_sort(sort_field, tie_field))
+    try:
+        async for document in mongo_cursor:
+            yield document
+    finally:
+        await mongo_cursor.close()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def stream_export(
+    documents: AsyncIterator[Dict[str, Any]],
+    fmt: str,
+    fields: Sequence[str],
+    chunk_rows: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[str]:
+    """
+    Serialize documents as NDJSON lines or CSV rows (header first)
+    Rows are grouped into chunks of chunk_rows so the response is not one write per row;
+    at most one chunk is held in memory.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=list(fields), extrasaction="ignore")
+        writer.writeheader()
+
+    rows = 0
+    async for document in documents:
+        if writer is None:
+            buffer.write(json.dumps({field: document.get(field) for field in fields}, default=str) + "\n")
+        else:
+            writer.writerow({field: _csv_value(document.get(field)) for field in fields})
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,160 @@
+"""
+Sanction Letter Rendering Service
+Renders sanction letter PDFs (PDFEngine, via the sanction store) on a process pool, so ReportLab neither
+blocks the event loop nor competes with it for the GIL the way a worker thread does.
+
+- At most PDF_RENDER_QUEUE_SIZE letters are queued or rendering per process; beyond
+  that submit raises RenderQueueFull and the caller asks the customer to retry
+- A second request for a loan already rendering joins that render
+- Every finished render is recorded on the loan application (sanction_letter_path,
+  sanction_letter_status), so a letter the chat turn stopped waiting for still lands
+  and GET /api/loans/{loan_id}/sanction-letter/status reports it from any worker
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import settings
+from database import mongodb
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "PENDING"
+STATUS_READY = "READY"
+STATUS_FAILED = "FAILED"
+
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is at PDF_RENDER_QUEUE_SIZE"""
+
+
+def _init_worker():
+    """Quiet engine logging and build the letter template before the first render"""
+    logging.getLogger("engines").setLevel(logging.WARNING)
+    from engines.pdf_engine import sanction_letter_template
+
+    sanction_letter_template()
+
+
+def _render(render_args: Dict[str, Any]) -> str:
+    """Process-pool task: render one letter (or find it already stored), return its file path"""
+    from services.sanction_store import sanction_store
+
+    return sanction_store.get_or_render(**render_args)
+
+
+class SanctionLetterRenderer:
+    """Bounded process-pool queue of sanction letter renders, keyed by loan_id"""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, asyncio.Future] = {}
+        self._pending_writes: set = set()
+        self.rendered = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_render_seconds = 0.0
+
+    @property
+    def workers(self) -> int:
+        return settings.PDF_RENDER_WORKERS or min(2, os.cpu_count() or 1)
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    async def stop(self):
+        """Finish queued renders (and their Mongo writes), then shut the pool down"""
+        if self._jobs:
+            await asyncio.gather(*self._jobs.values(), return_exceptions=True)
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True)
+
+    def submit(self, application_id: str, loan_id: str, render_args: Dict[str, Any]) -> asyncio.Future:
+        """Queue a render (or join the one already running for loan_id)"""
+        job = self._jobs.get(loan_id)
+        if job is not None:
+            return job
+        if len(self._jobs) >= settings.PDF_RENDER_QUEUE_SIZE:
+            self.rejected += 1
+            raise RenderQueueFull(f"{len(self._jobs)} sanction letters already queued")
+
+        self.start()
+        submitted_at = time.perf_counter()
+        job = asyncio.wrap_future(self._executor.submit(_render, {"loan_id": loan_id, **render_args}))
+        self._jobs[loan_id] = job
+        job.add_done_callback(lambda done: self._finish(application_id, loan_id, done, submitted_at))
+        return job
+
+    async def render(self, application_id: str, loan_id: str, render_args: Dict[str, Any],
+                     wait_seconds: Optional[float] = None) -> Optional[str]:
+        """
+        File path once the letter is rendered, or None if it is still rendering after
+        wait_seconds (it carries on and is recorded on the application when done).
+        Raises RenderQueueFull, or the render's own exception.
+        """
+        job = self.submit(application_id, loan_id, render_args)
+        timeout = settings.PDF_RENDER_WAIT_SECONDS if wait_seconds is None else wait_seconds
+        try:
+            # Shielded: giving up on the wait must not cancel the render
+            return await asyncio.wait_for(asyncio.shield(job), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.info(f"Sanction letter for loan {loan_id} still rendering; finishing in the background")
+            return None
+
+    def _finish(self, application_id: str, loan_id: str, job: asyncio.Future, submitted_at: float):
+        self._jobs.pop(loan_id, None)
+        self.last_render_seconds = time.perf_counter() - submitted_at
+        if job.cancelled():
+            return
+
+        error = job.exception()
+        if error is None:
+            self.rendered += 1
+            update = {"sanction_letter_path": job.result(), "sanction_letter_status": STATUS_READY}
+        else:
+            self.failed += 1
+            logger.error(f"Sanction letter render failed for loan {loan_id}: {error}")
+            update = {"sanction_letter_status": STATUS_FAILED, "sanction_letter_error": str(error)}
+
+        write = asyncio.ensure_future(self._record(application_id, loan_id, update))
+        self._pending_writes.add(write)
+        write.add_done_callback(self._pending_writes.discard)
+
+    async def _record(self, application_id: str, loan_id: str, update: Dict[str, Any]):
+        if mongodb.loan_applications is None:
+            return  # Not connected (scripts)
+        try:
+            # loan_id may not be saved yet: the chat turn writes it after it stops waiting
+            await mongodb.loan_applications.update_one(
+                {"application_id": application_id, "loan_id": {"$in": [loan_id, None]}},
+                {"$set": {**update, "sanction_letter_updated_at": datetime.now().isoformat()}}
+            )
+        except Exception as e:
+            logger.error(f"Recording sanction letter result for loan {loan_id} failed: {e}")
+
+    def is_rendering(self, loan_id: str) -> bool:
+        return loan_id in self._jobs
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "queued": len(self._jobs),
+            "queue_size": settings.PDF_RENDER_QUEUE_SIZE,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "last_render_seconds": round(self.last_render_seconds, 3),
+        }
+
+
+# Global instance
+sanction_renderer = SanctionLetterRenderer()
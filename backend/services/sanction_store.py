@@ -0,0 +1,217 @@
+"""
+Sanction Letter Store
+Content-addressed storage for sanction letter PDFs. A letter's key is the SHA-256 of
+(loan_id, offer terms, template version) and its file is
+SANCTION_LETTERS_DIR/<key[:2]>/<key>.pdf, so re-running the sanction step or
+resending a letter reuses the stored file instead of rendering again.
+
+- Renders go to a temporary name and are renamed into place: concurrent renders of
+  one key (in any process) are safe and readers never see a partial PDF
+- Stored files never change, which makes the key a strong ETag for downloads
+- compact() migrates letters saved under the old timestamped names into the store
+  and deletes files no application references once they are past retention
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config import SANCTION_LETTERS_DIR, settings
+from engines.pdf_engine import SANCTION_TEMPLATE_VERSION, pdf_engine
+
+logger = logging.getLogger(__name__)
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+PARTIAL_SUFFIX = ".partial"
+PARTIAL_MAX_AGE_SECONDS = 3600
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def letter_key(loan_id: str, offer_data: Dict[str, Any], template_version: str = SANCTION_TEMPLATE_VERSION) -> str:
+    """SHA-256 over the loan, its offer terms and the letter template version"""
+    canonical = json.dumps(
+        {"loan_id": loan_id, "offer": offer_data, "template_version": template_version},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single-range "bytes=" header, or None to send the
+    whole file (no header, or a form this endpoint does not serve, e.g. multi-range).
+    Raises ValueError when the range cannot be satisfied (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, separator, end_text = header[len("bytes="):].strip().partition("-")
+    if not separator or not (start_text or end_text):
+        return None
+    if any(text and not text.isdigit() for text in (start_text, end_text)):
+        return None
+
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, min(end, size - 1)
+
+
+def iter_file(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Bytes start..end (inclusive) of a file, in chunks (Starlette runs this in its threadpool)"""
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class SanctionLetterStore:
+    """Content-addressed sanction letter files under one directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    @staticmethod
+    def key_from_path(path: Optional[str]) -> Optional[str]:
+        """The key of a stored letter's path (None for legacy timestamped files)"""
+        if not path:
+            return None
+        name = os.path.basename(path)
+        key = name[:-len(".pdf")] if name.endswith(".pdf") else ""
+        return key if KEY_PATTERN.match(key) else None
+
+    def get_or_render(
+        self,
+        loan_id: str,
+        application_data: Dict[str, Any],
+        offer_data: Dict[str, Any],
+        user_data: Dict[str, Any],
+        emi_schedule_summary: Dict[str, Any]
+    ) -> str:
+        """Path of the stored letter for these terms, rendering it only if it is not stored yet"""
+        key = letter_key(loan_id, offer_data)
+        path = self.path_for(key)
+        if os.path.exists(path):
+            logger.info(f"Sanction letter for loan {loan_id} reused from store ({key[:12]})")
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = f"{path}.{os.getpid()}{PARTIAL_SUFFIX}"
+        try:
+            pdf_engine.generate_sanction_letter(
+                loan_id=loan_id,
+                application_data=application_data,
+                offer_data=offer_data,
+                user_data=user_data,
+                emi_schedule_summary=emi_schedule_summary,
+                filepath=partial_path,
+            )
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        return path
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    @classmethod
+    def etag(cls, path: str, stat: os.stat_result) -> str:
+        key = cls.key_from_path(path)
+        if key:
+            return f'"{key}"'
+        # Legacy file: weak validator from size and mtime
+        return f'W/"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+    async def compact(self, db, retention_days: Optional[int] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Move referenced legacy letters into the store, then delete letters no
+        application references that are older than retention_days, and stale partials
+        """
+        retention_days = settings.SANCTION_STORE_RETENTION_DAYS if retention_days is None else retention_days
+        stats = {"referenced": 0, "migrated": 0, "deduplicated": 0, "deleted": 0, "partials_deleted": 0, "bytes_freed": 0}
+        referenced = set()
+
+        cursor = db.loan_applications.find(
+            {"sanction_letter_path": {"$nin": [None, ""]}},
+            {"_id": 0, "application_id": 1, "loan_id": 1, "loan_offer": 1, "sanction_letter_path": 1},
+        )
+        async for doc in cursor:
+            path = doc["sanction_letter_path"]
+            stats["referenced"] += 1
+            if self.key_from_path(path) or not doc.get("loan_id") or not doc.get("loan_offer"):
+                referenced.add(os.path.abspath(path))
+                continue
+
+            target = self.path_for(letter_key(doc["loan_id"], doc["loan_offer"]))
+            if not os.path.exists(path) and not os.path.exists(target):
+                referenced.add(os.path.abspath(path))
+                continue
+            if os.path.exists(target):
+                stats["deduplicated"] += 1
+            else:
+                stats["migrated"] += 1
+                if not dry_run:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(path, target)
+            if dry_run:
+                referenced.add(os.path.abspath(path))
+            else:
+                await db.loan_applications.update_one(
+                    {"application_id": doc["application_id"], "sanction_letter_path": path},
+                    {"$set": {"sanction_letter_path": target}},
+                )
+            referenced.add(os.path.abspath(target))
+
+        now = time.time()
+        cutoff = now - retention_days * 86400
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.abspath(os.path.join(directory, name))
+                file_stat = self.stat(path)
+                if file_stat is None:
+                    continue
+                if name.endswith(PARTIAL_SUFFIX):
+                    if file_stat.st_mtime < now - PARTIAL_MAX_AGE_SECONDS:
+                        stats["partials_deleted"] += 1
+                        stats["bytes_freed"] += file_stat.st_size
+                        if not dry_run:
+                            os.remove(path)
+                    continue
+                if not name.endswith(".pdf") or path in referenced or file_stat.st_mtime >= cutoff:
+                    continue
+                stats["deleted"] += 1
+                stats["bytes_freed"] += file_stat.st_size
+                if not dry_run:
+                    os.remove(path)
+
+        logger.info(f"Sanction store compaction{' (dry run)' if dry_run else ''}: {stats}")
+        return stats
+
+
+# Global instance
+sanction_store = SanctionLetterStore(SANCTION_LETTERS_DIR)
@@ -3,12 +3,14 @@ LangGraph Loan Application Workflow
 Stateful workflow orchestration using LangGraph
 """
 
-from typing import TypedDict, Annotated, Literal, List, Dict, Any, Optional
+from typing import TypedDict, Annotated, Literal, List, Dict, Any, Optional, Tuple, AsyncIterator
 from langgraph.graph import StateGraph, END
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+import asyncio
 import logging
 from datetime import datetime
+import functools
 import json
 import uuid
 
@@ -164,6 +166,27 @@ llm = ChatGroq(
     max_retries=2
 )
 
+# Async LLM calls share one limiter per worker so a slow provider cannot pile up requests
+_llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+FOLLOW_UP_FALLBACK_REPLY = (
+    "I'm unable to answer that right now. Your application details are saved - "
+    "please try again in a moment or check the loan details page."
+)
+REJECTION_FALLBACK_REPLY = (
+    "We're sorry, your application could not be approved at this time. "
+    "Reason: {reason}. You may start a fresh application any time from your dashboard."
+)
+
+
+async def _ainvoke_llm(messages: list):
+    """ainvoke with the shared concurrency limit; the timeout covers the wait for a slot"""
+    async def call():
+        async with _llm_semaphore:
+            return await llm.ainvoke(messages)
+
+    return await asyncio.wait_for(call(), timeout=settings.LLM_TIMEOUT_SECONDS)
+
 
 # Node functions
 
@@ -569,11 +592,7 @@ def explain_offer_node(state: LoanWorkflowState) -> LoanWorkflowState:
     return state
 
 
-def generate_follow_up_response(state: LoanWorkflowState, user_message: str) -> str:
-    """
-    Answer follow-up questions without mutating the underwriting decision.
-    Used for offer clarifications and post-completion chat.
-    """
+def _follow_up_messages(state: LoanWorkflowState, user_message: str) -> list:
     context = {
         "stage": state["stage"],
         "application_id": state["application_id"],
@@ -600,7 +619,7 @@ Your task:
 5. Keep the answer concise, clear, and specific to the customer's current application.
 """
 
-    response = llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(
             content=(
@@ -608,11 +627,78 @@ Your task:
                 f"Customer question: {user_message}"
             )
         )
-    ])
+    ]
+
+
+def generate_follow_up_response(state: LoanWorkflowState, user_message: str) -> str:
+    """
+    Answer follow-up questions without mutating the underwriting decision.
+    Used for offer clarifications and post-completion chat.
+    """
+    response = llm.invoke(_follow_up_messages(state, user_message))
 
     return response.content
 
 
+async def agenerate_follow_up_response(state: LoanWorkflowState, user_message: str) -> str:
+    """
+    Async generate_follow_up_response for request handlers.
+    Uses ainvoke under the shared LLM limiter and timeout; falls back to a fixed reply.
+    """
+    try:
+        response = await _ainvoke_llm(_follow_up_messages(state, user_message))
+        return response.content
+    except Exception as e:
+        logger.error(f"Follow-up LLM call failed: {type(e).__name__}: {e}")
+        return FOLLOW_UP_FALLBACK_REPLY
+
+
+async def astream_follow_up_response(state: LoanWorkflowState, user_message: str) -> AsyncIterator[str]:
+    """
+    Streaming agenerate_follow_up_response: yields content deltas from llm.astream.
+    LLM_TIMEOUT_SECONDS bounds the wait for a limiter slot and for each chunk; if the
+    call fails before any text was produced the fallback reply is yielded instead.
+    """
+    produced = False
+    try:
+        await asyncio.wait_for(_llm_semaphore.acquire(), timeout=settings.LLM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.error("Follow-up LLM stream timed out waiting for a concurrency slot")
+        yield FOLLOW_UP_FALLBACK_REPLY
+        return
+
+    chunks = llm.astream(_follow_up_messages(state, user_message)).__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.LLM_TIMEOUT_SECONDS)
+            except StopAsyncIteration:
+                break
+            if chunk.content:
+                produced = True
+                yield chunk.content
+    except Exception as e:
+        logger.error(f"Follow-up LLM stream failed: {type(e).__name__}: {e}")
+        if not produced:
+            yield FOLLOW_UP_FALLBACK_REPLY
+    finally:
+        _llm_semaphore.release()
+        await chunks.aclose()
+
+
+def _pin_policies(run_workflow):
+    """Evaluate a whole workflow run against one policy snapshot, even if policies reload mid-run"""
+    @functools.wraps(run_workflow)
+    def wrapper(state: LoanWorkflowState) -> LoanWorkflowState:
+        from engines.policy_engine import policy_engine
+
+        with policy_engine.pinned():
+            return run_workflow(state)
+
+    return wrapper
+
+
+@_pin_policies
 def run_workflow_until_pause(state: LoanWorkflowState) -> LoanWorkflowState:
     """
     Execute the workflow from the state's current stage until user input is needed again.
@@ -684,22 +770,22 @@ def run_workflow_until_pause(state: LoanWorkflowState) -> LoanWorkflowState:
         return state
 
 
-def run_workflow_stepwise(state: LoanWorkflowState) -> LoanWorkflowState:
+def _run_single_step(state: LoanWorkflowState) -> Tuple[LoanWorkflowState, bool]:
     """
-    Execute exactly one workflow step and then pause.
-    This enables explicit customer confirmation between stages.
+    Execute exactly one deterministic workflow step.
+    Returns (state, needs_rejection_handling); the LLM rejection node is left to the caller.
     """
     current_stage = state["stage"]
 
     if current_stage == "init":
-        return init_application(state)
+        return init_application(state), False
 
     if current_stage == "collect_info":
         state = collect_information(state)
         next_stage = should_continue_after_info(state)
         if next_stage != END:
             state["stage"] = next_stage
-        return state
+        return state, False
 
     if current_stage == "verify_kyc":
         state = verify_kyc_node(state)
@@ -722,19 +808,59 @@ def run_workflow_stepwise(state: LoanWorkflowState) -> LoanWorkflowState:
     elif current_stage == "simulate_disbursement":
         state = simulate_disbursement_node(state)
     elif current_stage == "rejected":
-        state = handle_rejection_node(state)
+        pass
     elif current_stage in {"await_acceptance", "completed"}:
-        return state
+        return state, False
     else:
         logger.warning(f"Unknown workflow stage encountered: {current_stage}")
-        return state
+        return state, False
+
+    return state, state.get("stage") == "rejected"
+
+
+@_pin_policies
+def run_workflow_stepwise(state: LoanWorkflowState) -> LoanWorkflowState:
+    """
+    Execute exactly one workflow step and then pause.
+    This enables explicit customer confirmation between stages.
+    """
+    state, rejected = _run_single_step(state)
 
-    if state.get("stage") == "rejected":
+    if rejected:
         state = handle_rejection_node(state)
 
     return state
 
 
+async def arun_workflow_stepwise(state: LoanWorkflowState) -> LoanWorkflowState:
+    """
+    Async run_workflow_stepwise for request handlers.
+    The deterministic step runs in a worker thread, sanction letters render on the PDF
+    process pool and the rejection message uses ahandle_rejection_node, so the event
+    loop is never blocked.
+    Bureau reports come from services.bureau_cache, so retried applications skip the bureau.
+    """
+    from engines.policy_engine import policy_engine
+    from services.bureau_cache import bureau_cache
+
+    if state.get("stage") == "generate_sanction":
+        # Rendered on the PDF process pool rather than in a worker thread
+        return await agenerate_sanction_node(state)
+
+    # The credit step reads the bureau through the async two-tier cache, fetched here on the loop
+    pan = (state.get("application_data") or {}).get("pan") if state.get("stage") == "fetch_credit" else None
+    credit_report = await bureau_cache.try_get_report(pan)
+
+    with policy_engine.pinned(), bureau_cache.prefetched(pan, credit_report):
+        # to_thread copies the context, so the step sees the pinned policy snapshot and the report
+        state, rejected = await asyncio.to_thread(_run_single_step, state)
+
+    if rejected:
+        state = await ahandle_rejection_node(state)
+
+    return state
+
+
 def handle_acceptance_node(state: LoanWorkflowState) -> LoanWorkflowState:
     """
     Decision node: Handle customer's acceptance/rejection
@@ -764,6 +890,54 @@ def handle_acceptance_node(state: LoanWorkflowState) -> LoanWorkflowState:
     return state
 
 
+def _sanction_letter_args(state: LoanWorkflowState) -> Dict[str, Any]:
+    """PDFEngine.generate_sanction_letter arguments (besides loan_id) for the accepted offer"""
+    application_data_for_pdf = {
+        **(state.get("application_data") or {}),
+        "application_id": state.get("application_id"),
+    }
+    kyc_data = state.get("kyc_data") or {}
+    return {
+        "application_data": application_data_for_pdf,
+        "offer_data": state["loan_offer"],
+        "user_data": {
+            "user_id": state["user_id"],
+            "full_name": kyc_data.get("applicant_name"),
+            "email": application_data_for_pdf.get("email"),
+        },
+        "emi_schedule_summary": state["emi_schedule"]["summary"],
+    }
+
+
+def _sanction_letter_generated(state: LoanWorkflowState, file_path: Optional[str]) -> LoanWorkflowState:
+    """Advance to disbursement; file_path None means the letter is still rendering"""
+    state["sanction_letter_path"] = file_path
+    state["stage"] = "simulate_disbursement"
+    if file_path:
+        letter_line = "Sanction letter generated successfully and attached to your loan record."
+    else:
+        letter_line = "Sanction letter is being generated and will appear on your loan record shortly."
+    _add_assistant_message(
+        state,
+        (
+            f"{letter_line}\n"
+            f"• Application ID: {state.get('application_id')}\n"
+            f"• Loan ID: {state.get('loan_id')}\n"
+            "Reply 'ok' to complete disbursement simulation."
+        ),
+    )
+    return state
+
+
+def _sanction_letter_failed(state: LoanWorkflowState, error: Exception) -> LoanWorkflowState:
+    logger.error(f"Sanction generation error: {str(error)}")
+    state["messages"].append({
+        "role": "assistant",
+        "content": f"There was an issue generating your sanction letter. Please contact support. Error: {str(error)}"
+    })
+    return state
+
+
 def generate_sanction_node(state: LoanWorkflowState) -> LoanWorkflowState:
     """
     Tool node: Generate sanction letter
@@ -771,51 +945,51 @@ def generate_sanction_node(state: LoanWorkflowState) -> LoanWorkflowState:
     try:
         from workflows.tools import generate_sanction_letter
 
-        application_data_for_pdf = {
-            **(state.get("application_data") or {}),
-            "application_id": state.get("application_id"),
-        }
-        kyc_data = state.get("kyc_data") or {}
-        applicant_name = kyc_data.get("applicant_name")
-        applicant_email = application_data_for_pdf.get("email")
-        
+        render_args = _sanction_letter_args(state)
         result = generate_sanction_letter.invoke({
             "loan_id": state["loan_id"],
-            "application_data": application_data_for_pdf,
-            "offer_data": state["loan_offer"],
-            "user_data": {
-                "user_id": state["user_id"],
-                "full_name": applicant_name,
-                "email": applicant_email,
-            },
-            "emi_summary": state["emi_schedule"]["summary"]
+            "application_data": render_args["application_data"],
+            "offer_data": render_args["offer_data"],
+            "user_data": render_args["user_data"],
+            "emi_summary": render_args["emi_schedule_summary"]
         })
         
-        state["sanction_letter_path"] = result["file_path"]
-        state["stage"] = "simulate_disbursement"
-        _add_assistant_message(
-            state,
-            (
-                "Sanction letter generated successfully and attached to your loan record.\n"
-                f"• Application ID: {state.get('application_id')}\n"
-                f"• Loan ID: {state.get('loan_id')}\n"
-                "Reply 'ok' to complete disbursement simulation."
-            ),
-        )
-        
+        state = _sanction_letter_generated(state, result["file_path"])
         logger.info(f"Sanction letter generated: {result['file_path']}")
         
     except Exception as e:
-        logger.error(f"Sanction generation error: {str(e)}")
-        state["messages"].append({
-            "role": "assistant",
-            "content": f"There was an issue generating your sanction letter. Please contact support. Error: {str(e)}"
-        })
+        state = _sanction_letter_failed(state, e)
     
     state["updated_at"] = datetime.now().isoformat()
     return state
 
 
+async def agenerate_sanction_node(state: LoanWorkflowState) -> LoanWorkflowState:
+    """
+    Async tool node: Generate sanction letter on the rendering process pool
+    Waits up to PDF_RENDER_WAIT_SECONDS; a slower letter finishes in the background.
+    """
+    from services.pdf_rendering import RenderQueueFull, sanction_renderer
+
+    try:
+        file_path = await sanction_renderer.render(
+            state.get("application_id"), state["loan_id"], _sanction_letter_args(state)
+        )
+        state = _sanction_letter_generated(state, file_path)
+        logger.info(f"Sanction letter {'generated: ' + file_path if file_path else 'queued'} for loan {state['loan_id']}")
+    except RenderQueueFull:
+        logger.warning(f"Sanction letter queue full; loan {state['loan_id']} will retry")
+        _add_assistant_message(
+            state,
+            "Our sanction letter service is busy right now. Reply 'ok' in a moment to generate your letter.",
+        )
+    except Exception as e:
+        state = _sanction_letter_failed(state, e)
+
+    state["updated_at"] = datetime.now().isoformat()
+    return state
+
+
 def simulate_disbursement_node(state: LoanWorkflowState) -> LoanWorkflowState:
     """
     LLM node: Simulate disbursement process
@@ -838,21 +1012,17 @@ def simulate_disbursement_node(state: LoanWorkflowState) -> LoanWorkflowState:
     return state
 
 
-def handle_rejection_node(state: LoanWorkflowState) -> LoanWorkflowState:
-    """
-    LLM node: Handle application rejection
-    """
-    system_prompt = PROMPTS["rejection"]
-    messages = [
-        SystemMessage(content=system_prompt),
+def _rejection_messages(state: LoanWorkflowState) -> list:
+    return [
+        SystemMessage(content=PROMPTS["rejection"]),
         HumanMessage(content=f"Application rejected: {state['rejection_reason']}")
     ]
-    
-    response = llm.invoke(messages)
-    
+
+
+def _complete_rejection(state: LoanWorkflowState, content: str) -> LoanWorkflowState:
     state["messages"].append({
         "role": "assistant",
-        "content": response.content
+        "content": content
     })
     
     state["stage"] = "completed"
@@ -862,6 +1032,29 @@ def handle_rejection_node(state: LoanWorkflowState) -> LoanWorkflowState:
     return state
 
 
+def handle_rejection_node(state: LoanWorkflowState) -> LoanWorkflowState:
+    """
+    LLM node: Handle application rejection
+    """
+    response = llm.invoke(_rejection_messages(state))
+    
+    return _complete_rejection(state, response.content)
+
+
+async def ahandle_rejection_node(state: LoanWorkflowState) -> LoanWorkflowState:
+    """
+    Async LLM node: Handle application rejection (ainvoke, limited and timed out)
+    """
+    try:
+        response = await _ainvoke_llm(_rejection_messages(state))
+        content = response.content
+    except Exception as e:
+        logger.error(f"Rejection LLM call failed: {type(e).__name__}: {e}")
+        content = REJECTION_FALLBACK_REPLY.format(reason=state.get("rejection_reason") or "policy criteria not met")
+    
+    return _complete_rejection(state, content)
+
+
 # Define conditional edges
 
 def should_continue_after_info(state: LoanWorkflowState) -> str:
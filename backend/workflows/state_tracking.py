@@ -0,0 +1,61 @@
+"""
+Workflow State Change Tracking
+Remembers the persisted loan_applications fields a chat turn started from, so the
+turn writes back only new conversation messages ($push) and changed fields ($set)
+"""
+
+import copy
+from typing import Any, Dict
+
+
+# Fields the workflow only ever appends to during a turn
+APPEND_ONLY_FIELDS = ("conversation_messages",)
+
+
+class StateChangeTracker:
+    """
+    Baseline of an application document taken before the turn mutates it
+
+    The workflow state shares objects with the loaded document and nodes mutate
+    them in place, so plain fields are deep-copied here. Append-only lists are
+    not copied: the turn is expected to append to the same list object, and
+    anything else (a reset builds a new list) falls back to a full $set.
+    """
+
+    def __init__(self, document: Dict[str, Any]):
+        self._baseline: Dict[str, Any] = {}
+        self._lists: Dict[str, Any] = {}
+        self._list_lengths: Dict[str, int] = {}
+
+        for field, value in document.items():
+            if field in APPEND_ONLY_FIELDS and isinstance(value, list):
+                self._lists[field] = value
+                self._list_lengths[field] = len(value)
+            else:
+                self._baseline[field] = copy.deepcopy(value)
+
+    def update_for(self, update_doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Turn a full-state update document into the minimal Mongo update
+        Returns {} when nothing changed
+        """
+        set_fields: Dict[str, Any] = {}
+        push_fields: Dict[str, Any] = {}
+
+        for field, value in update_doc.items():
+            if field in self._lists:
+                original_length = self._list_lengths[field]
+                if value is self._lists[field] and len(value) >= original_length:
+                    if len(value) > original_length:
+                        push_fields[field] = {"$each": value[original_length:]}
+                else:
+                    set_fields[field] = value
+            elif field not in self._baseline or value != self._baseline[field]:
+                set_fields[field] = value
+
+        update: Dict[str, Any] = {}
+        if set_fields:
+            update["$set"] = set_fields
+        if push_fields:
+            update["$push"] = push_fields
+        return update
@@ -13,8 +13,9 @@ from engines.affordability_engine import affordability_engine
 from engines.risk_engine import risk_engine
 from engines.pricing_engine import pricing_engine
 from engines.emi_engine import emi_engine
-from engines.pdf_engine import pdf_engine
 from engines.policy_engine import policy_engine
+from services.bureau_cache import bureau_cache
+from services.sanction_store import sanction_store
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,7 @@ def verify_kyc(aadhaar: str, pan: str, user_id: str) -> Dict[str, Any]:
 def fetch_credit_report(pan: str) -> Dict[str, Any]:
     """
     Fetch credit report from mock CIBIL bureau dataset.
+    Uses the report arun_workflow_stepwise prefetched through the bureau cache, if any.
 
     Args:
         pan: PAN number (original, not masked)
@@ -62,7 +64,7 @@ def fetch_credit_report(pan: str) -> Dict[str, Any]:
         Dict with credit_score, active_loans, existing_emi, dpd_30_days, bureau_flags
     """
     try:
-        report = bureau_engine.fetch_credit_report(pan)
+        report = bureau_cache.prefetched_report(pan) or bureau_engine.fetch_credit_report(pan)
         analysis = bureau_engine.analyze_credit_report(report)
 
         result = {
@@ -141,7 +143,8 @@ def validate_policy_eligibility(
         result = {
             "is_eligible": is_eligible,
             "violations": violations,
-            "max_eligible_amount": max_eligible
+            "max_eligible_amount": max_eligible,
+            "policy_version": policy_engine.get_compiled_policy(loan_type).version
         }
 
         logger.info(f"Policy validation: eligible={is_eligible}, violations={len(violations)}")
@@ -340,13 +343,13 @@ def generate_sanction_letter(
     emi_summary: Dict[str, Any]
 ) -> Dict[str, Any]:
     """
-    Generate PDF sanction letter.
+    Generate PDF sanction letter (reused from the sanction store when already rendered).
 
     Returns:
         Dict with file_path and download_url
     """
     try:
-        filepath = pdf_engine.generate_sanction_letter(
+        filepath = sanction_store.get_or_render(
             loan_id=loan_id,
             application_data=application_data,
             offer_data=offer_data,